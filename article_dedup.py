@@ -0,0 +1,145 @@
+#!/usr/bin/env python3
+"""
+Near-Duplicate Article Clustering
+Groups syndicated copies of the same story (Marketaux, Google News, CNBC)
+with MinHash signatures and LSH banding, so each story is classified and
+alerted once.
+"""
+
+import os
+import re
+import hashlib
+import random
+
+DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", "0.5"))
+
+NUM_PERM = 32
+BANDS = 8
+ROWS = NUM_PERM // BANDS
+MAX_DESCRIPTION_WORDS = 60
+
+MERSENNE_PRIME = (1 << 61) - 1
+_rng = random.Random(1729)
+PERMUTATIONS = [
+    (_rng.randrange(1, MERSENNE_PRIME), _rng.randrange(0, MERSENNE_PRIME))
+    for _ in range(NUM_PERM)
+]
+
+
+def words(text):
+    """Lowercase words with HTML and punctuation removed"""
+    text = re.sub(r"<[^>]+>", " ", text or "")
+    return re.sub(r"[^\w\s]", " ", text.lower()).split()
+
+
+def clean_title(title):
+    """Drop the trailing ' - Publisher' that Google News appends to titles"""
+    return re.sub(r"\s+[-|]\s+[^-|]{1,40}$", "", title or "")
+
+
+def shingles(tokens, k=2):
+    """Set of k-word shingles (the tokens themselves for very short texts)"""
+    if len(tokens) < k:
+        return set(tokens)
+    return {" ".join(tokens[i:i + k]) for i in range(len(tokens) - k + 1)}
+
+
+def minhash(shingle_set):
+    """MinHash signature of a shingle set"""
+    hashes = [
+        int.from_bytes(hashlib.blake2b(s.encode(), digest_size=8).digest(), "little")
+        for s in shingle_set
+    ]
+    if not hashes:
+        return None
+
+    return tuple(
+        min((a * h + b) % MERSENNE_PRIME for h in hashes)
+        for a, b in PERMUTATIONS
+    )
+
+
+def jaccard(a, b):
+    """Jaccard similarity of two sets"""
+    if not a or not b:
+        return 0.0
+    return len(a & b) / len(a | b)
+
+
+def cluster_articles(articles, threshold=DEDUP_THRESHOLD):
+    """
+    Cluster near-duplicate articles.
+    Candidates are every pair sharing an LSH bucket on title or full-text
+    signatures, confirmed with exact Jaccard similarity on either.
+    Returns: list of index lists, ordered by each cluster's first article
+    """
+    title_sets = []
+    text_sets = []
+    for article in articles:
+        title_words = words(clean_title(article["title"]))
+        description_words = words(article["description"])[:MAX_DESCRIPTION_WORDS]
+        title_sets.append(shingles(title_words))
+        text_sets.append(shingles(title_words + description_words))
+
+    parent = list(range(len(articles)))
+    checked = set()
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for kind, sets in (("title", title_sets), ("text", text_sets)):
+        buckets = {}
+        for idx, shingle_set in enumerate(sets):
+            signature = minhash(shingle_set)
+            if signature is None:
+                continue
+            for band in range(BANDS):
+                key = (band, signature[band * ROWS:(band + 1) * ROWS])
+                buckets.setdefault(key, []).append(idx)
+
+        for members in buckets.values():
+            for pos, first in enumerate(members):
+                for other in members[pos + 1:]:
+                    if (first, other) in checked or find(first) == find(other):
+                        continue
+                    checked.add((first, other))
+                    if jaccard(title_sets[first], title_sets[other]) >= threshold or \
+                            jaccard(text_sets[first], text_sets[other]) >= threshold:
+                        parent[find(other)] = find(first)
+
+    clusters = {}
+    for idx in range(len(articles)):
+        clusters.setdefault(find(idx), []).append(idx)
+
+    return sorted(clusters.values(), key=lambda members: members[0])
+
+
+def merge_cluster(articles):
+    """
+    Collapse a cluster into one representative article.
+    The first copy is kept; sources, URLs, keywords and tickers are merged.
+    """
+    merged = dict(articles[0])
+    sources = list(dict.fromkeys(article["source"] for article in articles))
+
+    merged["source"] = ", ".join(sources)
+    merged["sources"] = sources
+    merged["urls"] = list(dict.fromkeys(article["url"] for article in articles if article["url"]))
+    merged["duplicates"] = len(articles) - 1
+
+    for field in ("keywords", "tickers"):
+        if any(field in article for article in articles):
+            merged[field] = sorted({value for article in articles for value in article.get(field, [])})
+
+    return merged
+
+
+def dedupe_articles(articles, threshold=DEDUP_THRESHOLD):
+    """One merged representative per near-duplicate cluster"""
+    return [
+        merge_cluster([articles[idx] for idx in members])
+        for members in cluster_articles(articles, threshold)
+    ]
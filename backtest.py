@@ -0,0 +1,376 @@
+#!/usr/bin/env python3
+"""
+Screener Backtest
+Replays the daily screener over years of bars: for every ticker and every
+day it works out what detect_volume_spike() and detect_watchlist_patterns()
+would have reported at that day's 16:20 run, then measures forward
+returns from that day's close. Tickers are split across a process pool
+and each ticker's history is evaluated with numpy in one pass.
+
+Each signal is labelled only from bars available on the day it is
+reported. A spike counts as WAIT on the day it is first reported (with no
+follow-through yet it cannot be anything else), and again as SETUP on the
+day its follow-through makes it one, so SETUP is a later look at a subset
+of the WAIT spikes. Patterns count on the day they complete. Every ticker
+is treated as watchlisted.
+
+History for `run` comes straight from the provider, not the bar store
+(which keeps only BAR_RETENTION_DAYS), so every run downloads the whole
+period again; pass --save once and --fixture afterwards to reuse it.
+
+Usage:
+    python backtest.py run [--fixture FILE] [--period 10y] [--workers N] [--output FILE]
+    python backtest.py run --period 10y --save FILE          Also keep the fetched history as a fixture
+    python backtest.py run --synthetic 900 --bars 2500      Timing run on random bars
+    python backtest.py check [N]                             Parity with the daily detectors
+"""
+
+import os
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import pandas as pd
+import market_data
+from screener_engine import (
+    SPIKE_WINDOW, SPIKE_MIN_PAST, SPIKE_RATIO, SPIKE_PRICE, FOLLOW_BARS, FOLLOW_MIN_BARS, FOLLOW_VOLUME,
+    PATTERN_PRICE, PATTERN_VOLUME
+)
+
+HORIZONS = (1, 5, 10, 20)
+SIGNALS = ["SETUP", "WAIT", "Price↑ Volume↓", "Price↓ Volume↑"]
+CHUNK_SIZE = 50
+
+
+def spike_reports(close, volume):
+    """
+    What detect_volume_spike() returns on each prefix close[:t+1].
+    Returns: (spike_bar, setup) arrays of length n; spike_bar is -1 on days
+    with no spike in the last SPIKE_WINDOW bars
+    """
+    n = len(close)
+    spike_bar = np.full(n, -1)
+    setup = np.zeros(n, dtype=bool)
+    if n < SPIKE_WINDOW:
+        return spike_bar, setup
+
+    csum = np.concatenate([[0.0], np.cumsum(volume)])
+    days = np.arange(SPIKE_WINDOW - 1, n)
+    start = days - (SPIKE_WINDOW - 1)
+    found = np.zeros(len(days), dtype=bool)
+
+    # Latest first, exactly like the reference loop: bar g = day - k with
+    # the average taken over the window bars before it
+    for k in range(SPIKE_WINDOW - 1 - SPIKE_MIN_PAST + 1):
+        bar = days - k
+        past = bar - start
+        with np.errstate(invalid="ignore", divide="ignore"):
+            avg = (csum[bar] - csum[start]) / past
+            hit = (volume[bar] >= SPIKE_RATIO * avg) & (close[bar] >= close[bar - 1] * SPIKE_PRICE)
+        new = hit & ~found
+        spike_bar[days[new]] = bar[new]
+        found |= hit
+
+    # First of the next FOLLOW_BARS bars above FOLLOW_VOLUME × the spike (FOLLOW_BARS + 1 if none)
+    first_loud = np.full(n, FOLLOW_BARS + 1)
+    for j in range(FOLLOW_BARS, 0, -1):
+        loud = np.zeros(n, dtype=bool)
+        loud[:n - j] = volume[j:] > volume[:n - j] * FOLLOW_VOLUME
+        first_loud[loud] = j
+
+    has = spike_bar >= 0
+    follow = np.minimum(np.arange(n) - spike_bar, FOLLOW_BARS)
+    setup[has] = (follow[has] >= FOLLOW_MIN_BARS) & (first_loud[spike_bar[has]] > follow[has])
+    return spike_bar, setup
+
+
+def pattern_bars(close, volume):
+    """
+    Bars completing a watchlist pattern (vs. the bar before).
+    Returns: {pattern type: array of bar indices}
+    """
+    with np.errstate(invalid="ignore", divide="ignore"):
+        price_change = (close[1:] - close[:-1]) / close[:-1] * 100
+        volume_change = (volume[1:] - volume[:-1]) / volume[:-1] * 100
+
+    up = (price_change >= PATTERN_PRICE) & (volume_change <= -PATTERN_VOLUME)
+    down = ~up & (price_change <= -PATTERN_PRICE) & (volume_change >= PATTERN_VOLUME)
+    return {
+        "Price↑ Volume↓": np.flatnonzero(up) + 1,
+        "Price↓ Volume↑": np.flatnonzero(down) + 1
+    }
+
+
+def ticker_signals(close, volume):
+    """
+    Signal days for one ticker.
+    Returns: (signal codes as indices into SIGNALS, report days)
+    """
+    spike_bar, setup = spike_reports(close, volume)
+    codes = []
+    days = []
+
+    # Labels as reported that day: WAIT when first seen, SETUP once it qualifies
+    for code, flags in ((SIGNALS.index("SETUP"), setup), (SIGNALS.index("WAIT"), ~setup)):
+        reported = np.flatnonzero((spike_bar >= 0) & flags)
+        # A spike stays reported for days; count it on the first one
+        _, first = np.unique(spike_bar[reported], return_index=True)
+        days.append(reported[np.sort(first)])
+        codes.append(np.full(len(first), code))
+
+    for kind, bars in pattern_bars(close, volume).items():
+        days.append(bars)
+        codes.append(np.full(len(bars), SIGNALS.index(kind)))
+
+    return np.concatenate(codes), np.concatenate(days)
+
+
+def forward_returns(close, days):
+    """Percent returns from close[days] over each horizon, shape (len(days), len(HORIZONS)); NaN past the data"""
+    returns = np.full((len(days), len(HORIZONS)), np.nan)
+    for idx, h in enumerate(HORIZONS):
+        ok = days + h < len(close)
+        returns[ok, idx] = (close[days[ok] + h] / close[days[ok]] - 1) * 100
+    return returns
+
+
+def backtest_chunk(chunk):
+    """
+    Worker: signals and forward returns for [(ticker, close, volume)].
+    Also returns the unconditional forward returns summed per horizon as
+    a baseline.
+    Returns: (signals DataFrame, baseline_sums, baseline_counts, baseline_hits)
+    """
+    parts = []
+    base_sum = np.zeros(len(HORIZONS))
+    base_count = np.zeros(len(HORIZONS))
+    base_hits = np.zeros(len(HORIZONS))
+
+    for ticker, close, volume in chunk:
+        codes, days = ticker_signals(close, volume)
+        returns = forward_returns(close, days)
+        parts.append(pd.DataFrame({
+            "ticker": ticker,
+            "signal": pd.Categorical.from_codes(codes, SIGNALS),
+            "day": days,
+            **{f"ret_{h}d": returns[:, idx] for idx, h in enumerate(HORIZONS)}
+        }))
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            for idx, h in enumerate(HORIZONS):
+                if len(close) > h:
+                    returns = (close[h:] / close[:-h] - 1) * 100
+                    returns = returns[np.isfinite(returns)]
+                    base_sum[idx] += returns.sum()
+                    base_count[idx] += len(returns)
+                    base_hits[idx] += (returns > 0).sum()
+
+    signals = pd.concat(parts, ignore_index=True) if parts else empty_signals()
+    return signals, base_sum, base_count, base_hits
+
+
+def empty_signals():
+    """Signals frame with no rows, for an empty universe"""
+    return pd.DataFrame({
+        "ticker": pd.Series(dtype=object),
+        "signal": pd.Categorical([], categories=SIGNALS),
+        "day": pd.Series(dtype=int),
+        **{f"ret_{h}d": pd.Series(dtype=float) for h in HORIZONS}
+    })
+
+
+def to_arrays(frames):
+    """[(ticker, close, volume)] float arrays from {ticker: DataFrame}"""
+    return [
+        (ticker, df["Close"].to_numpy(dtype=float), df["Volume"].to_numpy(dtype=float))
+        for ticker, df in frames.items()
+    ]
+
+
+def run_backtest(frames, workers=None):
+    """
+    Backtest every ticker in frames on a process pool.
+    Returns: (signals DataFrame, summary dict)
+    """
+    arrays = to_arrays(frames)
+    chunks = [arrays[i:i + CHUNK_SIZE] for i in range(0, len(arrays), CHUNK_SIZE)] or [[]]
+    workers = workers or os.cpu_count() or 1
+
+    if workers > 1 and len(chunks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(backtest_chunk, chunks))
+    else:
+        results = [backtest_chunk(chunk) for chunk in chunks]
+
+    signals = pd.concat([result[0] for result in results], ignore_index=True)
+    base_sum = sum(result[1] for result in results)
+    base_count = sum(result[2] for result in results)
+    base_hits = sum(result[3] for result in results)
+
+    if len(signals):
+        # Look dates up in one stacked column: ticker offset + day
+        lengths = pd.Series({ticker: len(df) for ticker, df in frames.items()})
+        offsets = lengths.cumsum() - lengths
+        stacked = pd.concat([df["Date"] for df in frames.values()], ignore_index=True)
+        positions = signals["ticker"].map(offsets).to_numpy() + signals["day"].to_numpy()
+        signals["date"] = stacked.iloc[positions].dt.strftime("%Y-%m-%d").to_numpy()
+
+    summary = {"tickers": len(frames), "bars": int(sum(len(df) for df in frames.values())), "signals": {}}
+    summary["baseline"] = {
+        f"{h}d": {
+            "mean": round(float(base_sum[idx] / base_count[idx]), 4) if base_count[idx] else None,
+            "hit_rate": round(float(base_hits[idx] / base_count[idx]), 4) if base_count[idx] else None
+        }
+        for idx, h in enumerate(HORIZONS)
+    }
+
+    for kind in SIGNALS:
+        subset = signals[signals["signal"] == kind]
+        stats = {"count": len(subset)}
+        for h in HORIZONS:
+            returns = subset[f"ret_{h}d"].dropna()
+            stats[f"{h}d"] = {
+                "n": len(returns),
+                "mean": round(float(returns.mean()), 4) if len(returns) else None,
+                "median": round(float(returns.median()), 4) if len(returns) else None,
+                "hit_rate": round(float((returns > 0).mean()), 4) if len(returns) else None
+            }
+        summary["signals"][kind] = stats
+
+    return signals, summary
+
+
+def print_summary(summary, elapsed):
+    print(f"✓ {summary['tickers']} tickers, {summary['bars']:,} bars in {elapsed:.1f}s")
+    header = "".join(f"{f'{h}d mean / hit':>22}" for h in HORIZONS)
+    print(f"   {'signal':<16}{'count':>8}{header}")
+
+    for kind, stats in summary["signals"].items():
+        cells = ""
+        for h in HORIZONS:
+            cell = stats[f"{h}d"]
+            if cell["n"]:
+                cells += f"{cell['mean']:>+13.2f}% / {cell['hit_rate'] * 100:>3.0f}%"
+            else:
+                cells += f"{'-':>22}"
+        print(f"   {kind:<16}{stats['count']:>8}{cells}")
+
+    cells = ""
+    for h in HORIZONS:
+        cell = summary["baseline"][f"{h}d"]
+        if cell["mean"] is not None:
+            cells += f"{cell['mean']:>+13.2f}% / {cell['hit_rate'] * 100:>3.0f}%"
+        else:
+            cells += f"{'-':>22}"
+    print(f"   {'all days':<16}{'':>8}{cells}")
+
+
+def load_history(args):
+    """Bars to backtest: synthetic, a fixture, or the market-data provider"""
+    if args.synthetic:
+        import screener_engine
+        return screener_engine.synthetic_frames(args.synthetic, bars=args.bars)
+
+    if args.fixture:
+        return market_data.load_frames(args.fixture)
+
+    # Straight from the provider: the bar store only keeps BAR_RETENTION_DAYS
+    import volume_screener
+    tickers, _ = volume_screener.get_ticker_universe()
+    frames = market_data.get_provider().fetch(tickers, period=args.period)
+
+    if args.save and frames:
+        df = pd.concat([frame.assign(ticker=ticker) for ticker, frame in frames.items()], ignore_index=True)
+        df = df[["ticker", "Date", "Open", "High", "Low", "Close", "Volume"]]
+        if args.save.endswith(".parquet"):
+            df.to_parquet(args.save, index=False)
+        else:
+            df.to_csv(args.save, index=False)
+        print(f"✓ {len(df):,} bars for {len(frames)} tickers saved to {args.save}")
+    return frames
+
+
+def run(args):
+    frames = load_history(args)
+    frames = {ticker: df.reset_index(drop=True) for ticker, df in frames.items() if len(df)}
+    print(f"⏳ Backtesting {len(frames)} tickers on {args.workers or os.cpu_count()} worker(s)")
+
+    started = time.perf_counter()
+    signals, summary = run_backtest(frames, workers=args.workers)
+    elapsed = time.perf_counter() - started
+
+    summary["seconds"] = round(elapsed, 3)
+    print_summary(summary, elapsed)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(summary, f, indent=2)
+        print(f"✓ Summary written to {args.output}")
+
+    if args.signals:
+        signals.to_csv(args.signals, index=False)
+        print(f"✓ {len(signals)} signals written to {args.signals}")
+
+
+def check_parity(frames):
+    """
+    Compare the per-day spike reports with detect_volume_spike() and the
+    pattern bars with detect_watchlist_patterns() on every prefix.
+    Returns: list of mismatch descriptions (empty when identical)
+    """
+    import screener_engine
+
+    mismatches = []
+    for ticker, close, volume in to_arrays(frames):
+        df = frames[ticker]
+        spike_bar, setup = spike_reports(close, volume)
+        patterns = pattern_bars(close, volume)
+
+        for day, expected, expected_patterns in screener_engine.prefix_reports(df):
+            got = None
+            if spike_bar[day] >= 0:
+                got = (df["Date"].iloc[spike_bar[day]].strftime("%Y-%m-%d"), "SETUP" if setup[day] else "WAIT")
+            if expected is not None:
+                expected = (expected["date"], expected["classification"])
+            if expected != got:
+                mismatches.append(f"{ticker} day {day} spike: {expected} != {got}")
+
+            got = sorted(kind for kind, bars in patterns.items() if day in bars)
+            if sorted(expected_patterns) != got:
+                mismatches.append(f"{ticker} day {day} patterns: {sorted(expected_patterns)} != {got}")
+
+    return mismatches
+
+
+def check(args):
+    import screener_engine
+
+    screener_engine.report_parity(check_parity, args.n, "Backtest signals match the daily detectors", bars=40)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Backtest the volume screener signals")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="Backtest and report forward returns per signal")
+    run_parser.add_argument("--fixture", help="CSV/Parquet bars (file with a ticker column, or directory)")
+    run_parser.add_argument("--period", default="10y", help="History to fetch from the provider")
+    run_parser.add_argument("--save", help="Keep the fetched history as a CSV/Parquet fixture")
+    run_parser.add_argument("--synthetic", type=int, help="Random bars for N tickers instead")
+    run_parser.add_argument("--bars", type=int, default=2500, help="Bars per synthetic ticker")
+    run_parser.add_argument("--workers", type=int, help="Processes (default: one per core)")
+    run_parser.add_argument("--output", help="Write the summary as JSON")
+    run_parser.add_argument("--signals", help="Write every signal with its forward returns as CSV")
+    run_parser.set_defaults(func=run)
+
+    check_parser = sub.add_parser("check", help="Parity with the daily detectors")
+    check_parser.add_argument("n", type=int, nargs="?", default=200)
+    check_parser.set_defaults(func=check)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
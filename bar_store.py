@@ -0,0 +1,242 @@
+#!/usr/bin/env python3
+"""
+Local OHLCV Bar Store
+Daily bars keyed by (ticker, date) in the shared database, so the volume
+screener only fetches the newest bars from Yahoo Finance.
+
+Usage:
+    python bar_store.py stats      Show store size and coverage
+    python bar_store.py compact    Drop bars outside the retention window and VACUUM
+    python bar_store.py rebuild    Wipe the store (next screener run refetches everything)
+"""
+
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import pandas as pd
+import pytz
+import storage
+
+load_dotenv()
+
+BAR_RETENTION_DAYS = int(os.getenv("BAR_RETENTION_DAYS", "120"))
+
+WIB = pytz.timezone("Asia/Jakarta")
+MARKET_CLOSE = (16, 0)
+
+# Calendar days covered by the yfinance period strings we use
+PERIOD_DAYS = {
+    "5d": 5,
+    "1mo": 31,
+    "3mo": 92,
+    "6mo": 183,
+    "1y": 366,
+    "2y": 731,
+    "5y": 1827,
+    "10y": 3653
+}
+
+COLUMNS = ["Open", "High", "Low", "Close", "Volume"]
+
+# Bars are stored split/dividend adjusted, so a later adjustment moves the
+# whole history. The open of the re-fetched overlap bar is final even if the
+# stored copy was partial; a larger move than this means a new basis.
+ADJUSTMENT_TOLERANCE = 0.005
+
+
+def open_store():
+    """Open the shared database holding the bar store"""
+    return storage.connect()
+
+
+def last_market_close(now=None):
+    """Most recent weekday market close in WIB (holidays are not skipped)"""
+    now = now or datetime.now(WIB)
+    close = now.replace(hour=MARKET_CLOSE[0], minute=MARKET_CLOSE[1], second=0, microsecond=0)
+
+    if now < close:
+        close -= timedelta(days=1)
+    while close.weekday() >= 5:
+        close -= timedelta(days=1)
+
+    return close
+
+
+def period_start(period, now=None):
+    """First date (YYYY-MM-DD) covered by a yfinance period string"""
+    now = now or datetime.now(WIB)
+    days = PERIOD_DAYS.get(period, 31)
+    return (now - timedelta(days=days)).strftime("%Y-%m-%d")
+
+
+def plan_fetch(conn, tickers, period="1mo"):
+    """
+    Work out which bars each ticker still needs.
+    Tickers fetched since the last market close are skipped; the rest
+    refetch from their last stored date (that bar may have been partial,
+    and it is the overlap rebased() checks for a new adjustment basis).
+    Returns: {start_date or None: [tickers]} where None means the full period
+    """
+    fresh_after = last_market_close().timestamp()
+    window_start = period_start(period)
+
+    last_dates = dict(conn.execute("SELECT ticker, MAX(date) FROM bars GROUP BY ticker"))
+    fetched_at = dict(conn.execute("SELECT ticker, fetched_at FROM fetches"))
+
+    plan = {}
+    for ticker in tickers:
+        last_date = last_dates.get(ticker)
+
+        if last_date is None or last_date < window_start:
+            plan.setdefault(None, []).append(ticker)
+        elif fetched_at.get(ticker, 0) < fresh_after:
+            plan.setdefault(last_date, []).append(ticker)
+
+    return plan
+
+
+def rebased(conn, frames):
+    """
+    Tickers whose incremental fetch no longer matches the stored overlap
+    bar (a split or dividend re-adjusted Yahoo's history since).
+    Returns: list of tickers whose stored bars are on an old basis
+    """
+    changed = []
+    for ticker, df in frames.items():
+        if df is None or df.empty:
+            continue
+        first = df.iloc[0]
+        date = pd.to_datetime(first["Date"]).strftime("%Y-%m-%d")
+        row = conn.execute("SELECT open FROM bars WHERE ticker = ? AND date = ?", (ticker, date)).fetchone()
+
+        if row and row[0] and abs(float(first["Open"]) / row[0] - 1) > ADJUSTMENT_TOLERANCE:
+            changed.append(ticker)
+    return changed
+
+
+def drop_tickers(conn, tickers):
+    """Forget every stored bar of tickers, e.g. before a full refetch on a new basis"""
+    tickers = list(tickers)
+    with conn:
+        conn.executemany("DELETE FROM bars WHERE ticker = ?", [(t,) for t in tickers])
+        conn.executemany("DELETE FROM fetches WHERE ticker = ?", [(t,) for t in tickers])
+
+
+def save_bars(conn, frames):
+    """Upsert per-ticker frames (with a Date column) into the store"""
+    now = time.time()
+    rows = []
+
+    for ticker, df in frames.items():
+        dates = pd.to_datetime(df["Date"]).dt.strftime("%Y-%m-%d")
+        values = df[COLUMNS].astype(float).itertuples(index=False, name=None)
+        rows.extend((ticker, date) + tuple(v) for date, v in zip(dates, values))
+
+    with conn:
+        conn.executemany(
+            "INSERT OR REPLACE INTO bars (ticker, date, open, high, low, close, volume) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            rows
+        )
+        conn.executemany(
+            "INSERT OR REPLACE INTO fetches (ticker, fetched_at) VALUES (?, ?)",
+            [(ticker, now) for ticker in frames]
+        )
+
+    return len(rows)
+
+
+def load_bars(conn, tickers, period="1mo"):
+    """
+    Read stored bars for tickers within the period window.
+    Returns: {ticker: DataFrame} shaped like get_ohlcv_data() output
+    """
+    tickers = list(tickers)
+    start = period_start(period)
+    parts = []
+
+    # Stay under SQLite's host parameter limit
+    for offset in range(0, len(tickers), 500):
+        chunk = tickers[offset:offset + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        parts.append(pd.read_sql_query(
+            "SELECT ticker, date AS Date, open AS Open, high AS High, low AS Low, "
+            "close AS Close, volume AS Volume FROM bars "
+            f"WHERE ticker IN ({placeholders}) AND date >= ? ORDER BY ticker, date",
+            conn,
+            params=(*chunk, start)
+        ))
+
+    frames = {}
+    if not parts:
+        return frames
+
+    df = pd.concat(parts, ignore_index=True)
+    df["Date"] = pd.to_datetime(df["Date"])
+
+    for ticker, group in df.groupby("ticker", sort=False):
+        frames[ticker] = group.drop(columns="ticker").reset_index(drop=True)
+
+    return frames
+
+
+def prune(conn, retention_days=BAR_RETENTION_DAYS):
+    """Delete bars older than the retention window"""
+    cutoff = (datetime.now(WIB) - timedelta(days=retention_days)).strftime("%Y-%m-%d")
+    with conn:
+        deleted = conn.execute("DELETE FROM bars WHERE date < ?", (cutoff,)).rowcount
+        conn.execute("DELETE FROM fetches WHERE ticker NOT IN (SELECT DISTINCT ticker FROM bars)")
+    return deleted
+
+
+def compact(conn, retention_days=BAR_RETENTION_DAYS):
+    """Prune old bars and reclaim disk space"""
+    deleted = prune(conn, retention_days)
+    conn.execute("VACUUM")
+    return deleted
+
+
+def clear(conn):
+    """Remove every stored bar so the next run refetches from scratch"""
+    with conn:
+        conn.execute("DELETE FROM bars")
+        conn.execute("DELETE FROM fetches")
+    conn.execute("VACUUM")
+
+
+def stats(conn):
+    """Summarize store contents"""
+    tickers, bars, first, last = conn.execute(
+        "SELECT COUNT(DISTINCT ticker), COUNT(*), MIN(date), MAX(date) FROM bars"
+    ).fetchone()
+    return {"tickers": tickers, "bars": bars, "first_date": first, "last_date": last}
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    conn = open_store()
+
+    if command == "compact":
+        deleted = compact(conn)
+        print(f"✓ Compacted bar store, removed {deleted} bars older than {BAR_RETENTION_DAYS} days")
+    elif command == "rebuild":
+        clear(conn)
+        print("✓ Bar store cleared, next screener run will refetch full history")
+    elif command == "stats":
+        info = stats(conn)
+        size_kb = storage.DB_FILE.stat().st_size / 1024 if storage.DB_FILE.exists() else 0
+        print(f"📦 {storage.DB_FILE} ({size_kb:,.0f} KB)")
+        print(f"   Tickers: {info['tickers']}")
+        print(f"   Bars: {info['bars']}")
+        print(f"   Range: {info['first_date']} → {info['last_date']}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Screener Benchmark
+Times the volume screener stages offline on synthetic or recorded OHLCV
+fixtures: data loading through get_ohlcv_batch() and iter_ohlcv() with
+the bars replayed from memory by the market-data provider, the reference
+detectors, the vectorized engine and report rendering. Results are written as JSON so runs from different
+commits can be compared.
+
+Usage:
+    python bench_screener.py run [--sizes 100,1000,10000] [--fixture FILE] [--output FILE]
+    python bench_screener.py record FILE [--period 1mo]    Dump the bar store to a CSV fixture
+    python bench_screener.py compare OLD.json NEW.json
+"""
+
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+from datetime import datetime, timezone
+from pathlib import Path
+import pandas as pd
+import market_data
+import screener_engine
+import volume_screener
+
+HERE = Path(__file__).resolve().parent
+REFERENCE_SAMPLE = 1000
+COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume"]
+
+
+def replay_provider(frames):
+    """A cold, cached ReplayProvider serving frames, as get_provider() would build it"""
+    provider = market_data.ReplayProvider(path=None)
+    provider.frames = frames
+    provider.as_of = max((df["Date"].iloc[-1] for df in frames.values() if len(df)), default=None)
+    return market_data.CachingProvider(provider)
+
+
+def fetched_with(frames, fetch):
+    """Run fetch() with get_provider() replaying frames from a fresh cache"""
+    original = market_data._provider
+    market_data._provider = replay_provider(frames)
+    try:
+        return fetch()
+    finally:
+        market_data._provider = original
+
+
+def load_fixture(path):
+    """Read a CSV/Parquet fixture (file with a ticker column, or directory) into {ticker: DataFrame}"""
+    return market_data.load_frames(path)
+
+
+def scale_frames(frames, n):
+    """Exactly n tickers: a prefix of frames, or copies under new names"""
+    names = list(frames)
+    if n <= len(names):
+        return {name: frames[name] for name in names[:n]}
+
+    scaled = dict(frames)
+    copy = 1
+    while len(scaled) < n:
+        for name in names:
+            if len(scaled) >= n:
+                break
+            scaled[f"{name}#{copy}"] = frames[name]
+        copy += 1
+    return scaled
+
+
+def timed(func, repeat):
+    """Best wall time in seconds of func() over repeat runs, and its last result"""
+    best = None
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def bench_size(frames, repeat):
+    """
+    Time each screener stage on one universe.
+    Returns: list of {"stage", "tickers", "seconds", "per_ticker_us"}
+    """
+    tickers = list(frames)
+    watchlist = tickers[: max(1, len(tickers) // 10)]
+    watchlist_set = set(watchlist)
+    sample = tickers[:REFERENCE_SAMPLE]
+    results = []
+
+    def record(stage, seconds, count):
+        results.append({
+            "stage": stage,
+            "tickers": count,
+            "seconds": round(seconds, 6),
+            "per_ticker_us": round(seconds / max(count, 1) * 1e6, 2)
+        })
+
+    # Both fetch modes of main(); the replay provider is local, so the bar store is bypassed
+    seconds, loaded = timed(
+        lambda: fetched_with(frames, lambda: volume_screener.get_ohlcv_batch(tickers)), repeat
+    )
+    record("load_batch", seconds, len(tickers))
+
+    seconds, _ = timed(
+        lambda: fetched_with(frames, lambda: dict(volume_screener.iter_ohlcv(tickers))), repeat
+    )
+    record("load_concurrent", seconds, len(tickers))
+    sample = [t for t in sample if t in loaded]
+
+    seconds, _ = timed(lambda: [volume_screener.detect_volume_spike(loaded[t]) for t in sample], repeat)
+    record("detect_volume_spike", seconds, len(sample))
+
+    patterns_sample = [t for t in sample if t in watchlist_set] or sample[:1]
+    seconds, _ = timed(
+        lambda: [volume_screener.detect_watchlist_patterns(loaded[t]) for t in patterns_sample], repeat
+    )
+    record("detect_watchlist_patterns", seconds, len(patterns_sample))
+
+    seconds, screened = timed(lambda: volume_screener.screen_frames(loaded, list(loaded), watchlist_set), repeat)
+    record("engine_screen_frames", seconds, len(loaded))
+
+    setup, _, patterns = screened
+    chats = {str(c): watchlist[c::50] for c in range(min(50, len(watchlist)))}
+
+    def render():
+        limit = volume_screener.REPORT_LIMIT
+        messages = volume_screener.build_report("16:20 WIB", [
+            ([volume_screener.format_spike(s) for s in setup[:limit]], len(setup)),
+            ([volume_screener.format_pattern(p) for p in patterns[:limit]], len(patterns))
+        ])
+        index = volume_screener.fanout.build_ticker_index(chats)
+        per_chat = volume_screener.fanout.merge_sections(
+            volume_screener.fanout.fan_out(setup, index, volume_screener.format_spike, limit),
+            volume_screener.fanout.fan_out(patterns, index, volume_screener.format_pattern, limit)
+        )
+        for sections in per_chat.values():
+            messages.extend(volume_screener.build_report("16:20 WIB", sections))
+        return messages
+
+    seconds, _ = timed(render, repeat)
+    record("render_reports", seconds, len(tickers))
+
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=HERE, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def run(args):
+    sizes = [int(size) for size in args.sizes.split(",")]
+    base = load_fixture(args.fixture) if args.fixture else None
+    if args.fixture and not base:
+        print(f"❌ No bars in {args.fixture}")
+        return 1
+
+    # Per-signal log lines would dominate the engine timings
+    volume_screener.log = lambda msg: None
+
+    report = {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "fixture": args.fixture or "synthetic",
+        "repeat": args.repeat,
+        "results": []
+    }
+
+    for size in sizes:
+        frames = scale_frames(base, size) if args.fixture else screener_engine.synthetic_frames(size)
+        print(f"⏱️  {size} tickers")
+        for result in bench_size(frames, args.repeat):
+            result["universe"] = size
+            report["results"].append(result)
+            print(f"   {result['stage']:<28} {result['seconds'] * 1000:10.1f} ms "
+                  f"({result['per_ticker_us']:.1f} us/ticker over {result['tickers']})")
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"✓ Results written to {args.output}")
+
+
+def record_fixture(args):
+    """Dump every stored bar within the period to a fixture file"""
+    import bar_store
+
+    conn = bar_store.open_store()
+    tickers = [row[0] for row in conn.execute("SELECT DISTINCT ticker FROM bars")]
+    frames = bar_store.load_bars(conn, tickers, period=args.period)
+    conn.close()
+
+    df = pd.concat(
+        [frame.assign(ticker=ticker) for ticker, frame in frames.items()], ignore_index=True
+    ) if frames else pd.DataFrame(columns=["ticker"] + COLUMNS)
+
+    if args.path.endswith(".parquet"):
+        df.to_parquet(args.path, index=False)
+    else:
+        df.to_csv(args.path, index=False)
+    print(f"✓ Recorded {len(frames)} tickers ({len(df)} bars) to {args.path}")
+
+
+def compare(args):
+    """Print per-stage time ratios between two result files"""
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    baseline = {(r["universe"], r["stage"]): r for r in old["results"]}
+    print(f"📊 {old.get('commit')} → {new.get('commit')}")
+
+    for result in new["results"]:
+        before = baseline.get((result["universe"], result["stage"]))
+        if not before:
+            continue
+        ratio = result["per_ticker_us"] / before["per_ticker_us"] if before["per_ticker_us"] else float("inf")
+        marker = "❌" if ratio > 1.1 else "✓"
+        print(f"{marker} {result['universe']:>6} {result['stage']:<28} "
+              f"{before['per_ticker_us']:>10.1f} → {result['per_ticker_us']:>10.1f} us/ticker ({ratio:.2f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Volume screener benchmark")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run")
+    run_parser.add_argument("--sizes", default="100,1000,10000")
+    run_parser.add_argument("--fixture", help="CSV/Parquet with ticker, Date, Open, High, Low, Close, Volume")
+    run_parser.add_argument("--repeat", type=int, default=3)
+    run_parser.add_argument("--output", default="bench_screener.json")
+
+    record_parser = commands.add_parser("record")
+    record_parser.add_argument("path")
+    record_parser.add_argument("--period", default="1mo")
+
+    compare_parser = commands.add_parser("compare")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+
+    args = parser.parse_args()
+    return {"run": run, "record": record_fixture, "compare": compare}[args.command](args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
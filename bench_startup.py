@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Start-up Benchmark
+Times an out-of-slot news_watcher.py run (the fast path most timer runs
+take) against a full import, and lists the slowest imports from
+python -X importtime.
+
+Usage:
+    python bench_startup.py [RUNS] [TOP]    Defaults: 5 runs, top 15 modules
+"""
+
+import os
+import sys
+import time
+import subprocess
+from pathlib import Path
+
+HERE = Path(__file__).resolve().parent
+
+# Inside a slot, run news_watcher.py as __main__ with the slot check
+# forced to "outside" (runpy adds a few ms of its own imports)
+FAST_PATH_SHIM = [
+    "-c",
+    "import runpy, slots; "
+    "slots.get_current_slot = lambda now=None: (None, None); "
+    "runpy.run_path('news_watcher.py', run_name='__main__')"
+]
+FULL_IMPORT = ["-c", "import news_watcher"]
+
+
+def fast_path_args():
+    """Arguments for an out-of-slot run: the real script when we are outside a slot"""
+    sys.path.insert(0, str(HERE))
+    import slots
+
+    if slots.get_current_slot()[0]:
+        return FAST_PATH_SHIM
+    return ["news_watcher.py"]
+
+
+def time_command(args, runs):
+    """Best and median wall time (ms) of `python *args` over runs"""
+    env = dict(os.environ, FORCE_RUN="0")
+    timings = []
+
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, *args], cwd=HERE, env=env,
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL, check=False
+        )
+        timings.append((time.perf_counter() - start) * 1000)
+
+    timings.sort()
+    return timings[0], timings[len(timings) // 2]
+
+
+def import_times(args):
+    """
+    Per-module import times from -X importtime.
+    Returns: list of (module, self_us, cumulative_us), slowest cumulative first
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", *args], cwd=HERE,
+        env=dict(os.environ, FORCE_RUN="0"), capture_output=True, text=True, check=False
+    )
+
+    modules = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        modules.append((name.strip(), int(self_us), int(cumulative_us)))
+
+    return sorted(modules, key=lambda module: module[2], reverse=True)
+
+
+def main():
+    runs = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    top = int(sys.argv[2]) if len(sys.argv) > 2 else 15
+
+    fast_path = fast_path_args()
+    baseline = time_command(["-c", "pass"], runs)
+    fast = time_command(fast_path, runs)
+    full = time_command(FULL_IMPORT, runs)
+
+    print(f"⏱️  Wall time over {runs} runs (best / median)")
+    print(f"   python -c pass            {baseline[0]:7.1f} / {baseline[1]:7.1f} ms")
+    print(f"   out-of-slot news_watcher  {fast[0]:7.1f} / {fast[1]:7.1f} ms")
+    print(f"   import news_watcher       {full[0]:7.1f} / {full[1]:7.1f} ms")
+
+    for label, args in (("Fast path", fast_path), ("Full import", FULL_IMPORT)):
+        modules = import_times(args)
+        total = sum(self_us for _, self_us, _ in modules)
+        print(f"\n📦 {label}: {len(modules)} modules, {total / 1000:.1f} ms importing")
+        print(f"   {'cumulative':>10}  {'self':>8}  module")
+        for name, self_us, cumulative_us in modules[:top]:
+            print(f"   {cumulative_us / 1000:8.1f}ms  {self_us / 1000:6.1f}ms  {name}")
+
+
+if __name__ == "__main__":
+    main()
@@ -5,18 +5,26 @@ Long-running service that handles watchlist management commands.
 """
 
 import os
-import json
 import time
+import atexit
+import functools
+import threading
 from pathlib import Path
 from dotenv import load_dotenv
 from telegram import Update
 from telegram.ext import Application, CommandHandler, MessageHandler, filters, ContextTypes
+import storage
+import metrics
 
 load_dotenv()
 
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
-WATCHLIST_FILE = Path("/opt/indo_badnews/watchlist.json")
 BOT_STATE_FILE = Path("/opt/indo_badnews/bot_state.json")
+WATCHLIST_SAVE_DELAY = float(os.getenv("WATCHLIST_SAVE_DELAY", "2"))
+BOT_METRICS_INTERVAL = int(os.getenv("BOT_METRICS_INTERVAL", "60"))
+
+# The bot never finishes a run, so its metrics are rewritten periodically
+BOT_METRICS = metrics.Periodic("bot", interval=BOT_METRICS_INTERVAL)
 
 
 def log(msg):
@@ -25,18 +33,152 @@ def log(msg):
     print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] {msg}")
 
 
-def load_watchlist():
-    """Load watchlist from disk"""
-    if WATCHLIST_FILE.exists():
-        with open(WATCHLIST_FILE, "r") as f:
-            return json.load(f)
-    return {}
-
-
-def save_watchlist(data):
-    """Save watchlist to disk"""
-    with open(WATCHLIST_FILE, "w") as f:
-        json.dump(data, f, indent=2)
+class WatchlistIndex:
+    """
+    In-memory watchlists: per-chat ordered ticker sets plus a reverse
+    ticker → chats map. Changes are written to the shared database after a
+    short debounce, so a burst of commands costs one transaction. All
+    access goes through a lock.
+    """
+
+    def __init__(self, save_delay=WATCHLIST_SAVE_DELAY):
+        self.save_delay = save_delay
+        self.lock = threading.RLock()
+        self.conn = storage.connect(check_same_thread=False)
+        self.chats = {}
+        self.watchers = {}
+        self.timer = None
+        self.dirty = set()
+        self.version = None
+        self.reload()
+
+    def reload(self):
+        """Rebuild the index from the database"""
+        with self.lock:
+            data = storage.load_watchlists(self.conn)
+            self.chats = {chat_id: dict.fromkeys(tickers) for chat_id, tickers in data.items()}
+            self.watchers = {}
+            for chat_id, tickers in self.chats.items():
+                for ticker in tickers:
+                    self.watchers.setdefault(ticker, set()).add(chat_id)
+            self.version = storage.watchlist_version(self.conn)
+
+    def refresh_if_changed(self):
+        """Pick up changes made by other processes when nothing is pending"""
+        with self.lock:
+            if self.dirty:
+                return
+            if storage.watchlist_version(self.conn) != self.version:
+                self.reload()
+
+    def tickers(self, chat_id):
+        """Tickers for a chat, in the order they were added"""
+        with self.lock:
+            return list(self.chats.get(chat_id, ()))
+
+    def chats_watching(self, ticker):
+        """Chats that have ticker on their watchlist"""
+        with self.lock:
+            return set(self.watchers.get(ticker, ()))
+
+    def add(self, chat_id, tickers):
+        """Add tickers to a chat. Returns the tickers that were new"""
+        with self.lock:
+            added = [t for t in dict.fromkeys(tickers) if t not in self.chats.get(chat_id, {})]
+            if not added:
+                return added
+
+            chat = self.chats.setdefault(chat_id, {})
+            for ticker in added:
+                chat[ticker] = None
+                self.watchers.setdefault(ticker, set()).add(chat_id)
+            self.schedule_save(chat_id)
+            return added
+
+    def remove(self, chat_id, tickers):
+        """Remove tickers from a chat. Returns the tickers that were removed"""
+        with self.lock:
+            chat = self.chats.get(chat_id, {})
+            removed = [t for t in dict.fromkeys(tickers) if t in chat]
+            if not removed:
+                return removed
+
+            for ticker in removed:
+                del chat[ticker]
+                chats = self.watchers.get(ticker, set())
+                chats.discard(chat_id)
+                if not chats:
+                    self.watchers.pop(ticker, None)
+            self.schedule_save(chat_id)
+            return removed
+
+    def schedule_save(self, chat_id):
+        """Write to disk once save_delay has passed since the first pending change"""
+        with self.lock:
+            self.dirty.add(chat_id)
+            if self.timer is None:
+                self.timer = threading.Timer(self.save_delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+    def flush(self):
+        """Write pending changes now, one transaction for all dirty chats"""
+        with self.lock:
+            if self.timer is not None:
+                self.timer.cancel()
+                self.timer = None
+            if not self.dirty:
+                return
+
+            try:
+                started = time.perf_counter()
+                with self.conn:
+                    for chat_id in self.dirty:
+                        storage.replace_chat_watchlist(self.conn, chat_id, list(self.chats.get(chat_id, ())))
+                    # Read inside the transaction, so no other writer's change can slip in between
+                    version = storage.watchlist_version(self.conn)
+                BOT_METRICS.run.observe("watchlist_save", time.perf_counter() - started)
+                BOT_METRICS.run.count("watchlist_saves")
+                self.dirty.clear()
+                self.version = version
+            except Exception as e:
+                BOT_METRICS.run.count("watchlist_save_errors")
+                log(f"❌ Failed to save watchlist: {e}")
+                self.timer = threading.Timer(self.save_delay, self.flush)
+                self.timer.daemon = True
+                self.timer.start()
+
+
+WATCHLIST = None
+
+
+def get_watchlist_index():
+    """Shared WatchlistIndex, created on first use"""
+    global WATCHLIST
+    if WATCHLIST is None:
+        WATCHLIST = WatchlistIndex()
+        atexit.register(WATCHLIST.flush)
+    else:
+        WATCHLIST.refresh_if_changed()
+    return WATCHLIST
+
+
+def instrumented(command):
+    """Record latency, calls and errors of a command handler in BOT_METRICS"""
+    def decorate(handler):
+        @functools.wraps(handler)
+        async def wrapper(update, context):
+            started = time.perf_counter()
+            try:
+                return await handler(update, context)
+            except Exception:
+                BOT_METRICS.run.count("bot_handler_errors", command=command)
+                raise
+            finally:
+                BOT_METRICS.run.observe("bot_handler", time.perf_counter() - started, command=command)
+                BOT_METRICS.flush()
+        return wrapper
+    return decorate
 
 
 def normalize_ticker(ticker):
@@ -47,13 +189,14 @@ def normalize_ticker(ticker):
     return ticker
 
 
+@instrumented("wl")
 async def cmd_wl(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /wl command - show or add tickers"""
     chat_id = str(update.effective_chat.id)
     args = context.args
 
-    watchlist = load_watchlist()
-    chat_watchlist = watchlist.get(chat_id, [])
+    watchlist = get_watchlist_index()
+    chat_watchlist = watchlist.tickers(chat_id)
 
     if not args:
         if chat_watchlist:
@@ -70,21 +213,18 @@ async def cmd_wl(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     new_tickers = [normalize_ticker(t) for t in args]
 
-    for ticker in new_tickers:
-        if ticker not in chat_watchlist:
-            chat_watchlist.append(ticker)
+    added = watchlist.add(chat_id, new_tickers)
+    chat_watchlist = watchlist.tickers(chat_id)
 
-    watchlist[chat_id] = chat_watchlist
-    save_watchlist(watchlist)
-
-    log(f"Chat {chat_id}: Added {new_tickers}")
+    log(f"Chat {chat_id}: Added {added}")
 
     await update.message.reply_text(
-        f"✅ Added {len(new_tickers)} ticker(s)\n\n"
+        f"✅ Added {len(added)} ticker(s)\n\n"
         f"📊 Your watchlist ({len(chat_watchlist)}):\n{', '.join(chat_watchlist)}"
     )
 
 
+@instrumented("unwl")
 async def cmd_unwl(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /unwl command - remove tickers"""
     chat_id = str(update.effective_chat.id)
@@ -97,19 +237,11 @@ async def cmd_unwl(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
         return
 
-    watchlist = load_watchlist()
-    chat_watchlist = watchlist.get(chat_id, [])
+    watchlist = get_watchlist_index()
 
     remove_tickers = [normalize_ticker(t) for t in args]
-    removed_count = 0
-
-    for ticker in remove_tickers:
-        if ticker in chat_watchlist:
-            chat_watchlist.remove(ticker)
-            removed_count += 1
-
-    watchlist[chat_id] = chat_watchlist
-    save_watchlist(watchlist)
+    removed_count = len(watchlist.remove(chat_id, remove_tickers))
+    chat_watchlist = watchlist.tickers(chat_id)
 
     log(f"Chat {chat_id}: Removed {remove_tickers}")
 
@@ -130,6 +262,7 @@ async def cmd_unwl(update: Update, context: ContextTypes.DEFAULT_TYPE):
         )
 
 
+@instrumented("help")
 async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle /start and /help commands"""
     help_text = """
@@ -152,6 +285,7 @@ async def cmd_help(update: Update, context: ContextTypes.DEFAULT_TYPE):
     await update.message.reply_html(help_text)
 
 
+@instrumented("unknown")
 async def handle_unknown(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Handle unknown commands"""
     await update.message.reply_text(
@@ -185,6 +319,9 @@ def main():
             drop_pending_updates=True
         )
 
+        get_watchlist_index().flush()
+        BOT_METRICS.flush(force=True)
+
     except KeyboardInterrupt:
         log("⏸️  Bot stopped by user")
     except Exception as e:
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Per-Chat Alert Fan-Out
+Routes ticker signals (spikes, patterns, bad news) to the chats whose
+watchlists contain the ticker. Each signal is rendered at most once and
+appended to every interested chat in a single pass.
+"""
+
+
+def build_ticker_index(watchlists):
+    """Invert {chat_id: [tickers]} into {ticker: [chat_ids]}"""
+    index = {}
+    for chat_id, tickers in watchlists.items():
+        for ticker in tickers:
+            index.setdefault(ticker, []).append(chat_id)
+    return index
+
+
+def signal_tickers(signal):
+    """Tickers a signal is about (spikes/patterns carry one, articles a list)"""
+    if signal.get("tickers"):
+        return signal["tickers"]
+    return [signal["ticker"]] if signal.get("ticker") else []
+
+
+def fan_out(signals, index, render, limit=None, skip_chats=()):
+    """
+    Group rendered signals by chat in one pass over signals.
+    A signal naming several tickers watched by the same chat is delivered
+    to it once. Only the first `limit` signals per chat are rendered, but
+    every signal is counted.
+    Returns: {chat_id: (fragments, total)}
+    """
+    fragments = {}
+    totals = {}
+
+    for signal in signals:
+        chats = set()
+        for ticker in signal_tickers(signal):
+            chats.update(index.get(ticker, ()))
+        chats.difference_update(skip_chats)
+
+        rendered = None
+        for chat_id in chats:
+            count = totals.get(chat_id, 0)
+            totals[chat_id] = count + 1
+
+            if limit is not None and count >= limit:
+                continue
+            if rendered is None:
+                rendered = render(signal)
+            fragments.setdefault(chat_id, []).append(rendered)
+
+    return {chat_id: (fragments.get(chat_id, []), total) for chat_id, total in totals.items()}
+
+
+def merge_sections(*sections):
+    """
+    Combine several fan_out() results into {chat_id: [section results]},
+    keeping section order with None where a chat has nothing in a section.
+    """
+    merged = {}
+    for position, section in enumerate(sections):
+        for chat_id, result in section.items():
+            merged.setdefault(chat_id, [None] * len(sections))[position] = result
+    return merged
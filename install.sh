@@ -78,6 +78,9 @@ cat > .env <<EOF
 # Telegram Bot Configuration
 TELEGRAM_BOT_TOKEN=your_bot_token_here
 TELEGRAM_CHAT_ID=your_chat_id_here
+TELEGRAM_RATE=25
+TELEGRAM_CHAT_RATE=1
+TELEGRAM_SEND_WORKERS=8
 
 # News API Configuration
 MARKETAUX_API_KEY=your_marketaux_key_here
@@ -85,10 +88,26 @@ MARKETAUX_API_KEY=your_marketaux_key_here
 # Ollama Configuration (local)
 OLLAMA_API_URL=http://localhost:11434/api/generate
 OLLAMA_MODEL=qwen2.5:7b
+OLLAMA_BATCH_SIZE=5
+OLLAMA_CONCURRENCY=2
 
 # Configuration
 MAX_NEWS_AGE_DAYS=3
-MAX_TICKERS_PER_RUN=120
+NEWS_FETCH_WORKERS=8
+FEED_TIMEOUT=10
+NEWS_STREAM=0
+POLL_MIN_INTERVAL=30
+POLL_MAX_INTERVAL=300
+MAX_TICKERS_PER_RUN=1000
+BATCH_SIZE=100
+USE_BAR_STORE=1
+BAR_RETENTION_DAYS=120
+FETCH_MODE=batch
+FETCH_WORKERS=8
+FETCH_RATE=4
+DB_FILE=/opt/indo_badnews/indo_badnews.db
+SCREENER_TIME=16:20
+SCHEDULER_HEALTH_PORT=8787
 TIMEZONE=Asia/Jakarta
 EOF
 
@@ -98,8 +117,6 @@ echo "⚠️  IMPORTANT: Edit /opt/indo_badnews/.env with your API keys!"
 echo ""
 
 # Create initial state files
-echo '{"seen": [], "last_slot": null}' > state.json
-echo '{}' > watchlist.json
 echo '{"offset": 0}' > bot_state.json
 
 echo "✓ State files initialized"
@@ -111,6 +128,23 @@ if [ -f "$SCRIPT_DIR/news_watcher.py" ]; then
     cp "$SCRIPT_DIR/news_watcher.py" /opt/indo_badnews/
     cp "$SCRIPT_DIR/bot_watchlist.py" /opt/indo_badnews/
     cp "$SCRIPT_DIR/volume_screener.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/bar_store.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/screener_engine.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/seen_store.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/article_dedup.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/storage.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/fanout.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/rate_limit.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/telegram_sender.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/scheduler.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/slots.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/bench_startup.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/bench_screener.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/backtest.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/intraday.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/verdict_model.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/market_data.py" /opt/indo_badnews/
+    cp "$SCRIPT_DIR/metrics.py" /opt/indo_badnews/
     chmod +x /opt/indo_badnews/*.py
     echo "✓ Python scripts copied"
 else
@@ -119,6 +153,23 @@ else
     echo "   - news_watcher.py"
     echo "   - bot_watchlist.py"
     echo "   - volume_screener.py"
+    echo "   - bar_store.py"
+    echo "   - screener_engine.py"
+    echo "   - seen_store.py"
+    echo "   - article_dedup.py"
+    echo "   - storage.py"
+    echo "   - fanout.py"
+    echo "   - rate_limit.py"
+    echo "   - telegram_sender.py"
+    echo "   - scheduler.py"
+    echo "   - slots.py"
+    echo "   - bench_startup.py"
+    echo "   - bench_screener.py"
+    echo "   - backtest.py"
+    echo "   - intraday.py"
+    echo "   - verdict_model.py"
+    echo "   - market_data.py"
+    echo "   - metrics.py"
     echo "   to /opt/indo_badnews/"
 fi
 
@@ -192,6 +243,50 @@ AccuracySec=1min
 WantedBy=timers.target
 EOF
 
+sudo tee /etc/systemd/system/indo_verdict_model.service > /dev/null <<EOF
+[Unit]
+Description=Indonesian Bad News verdict model retrain (oneshot)
+
+[Service]
+Type=oneshot
+User=$USER
+WorkingDirectory=/opt/indo_badnews
+Environment="PATH=/opt/indo_badnews/venv/bin"
+ExecStart=/opt/indo_badnews/venv/bin/python /opt/indo_badnews/verdict_model.py train
+# 2 = not enough verdicts logged yet
+SuccessExitStatus=2
+EOF
+
+sudo tee /etc/systemd/system/indo_verdict_model.timer > /dev/null <<EOF
+[Unit]
+Description=Indonesian Bad News verdict model retrain (Sundays 03:00 WIB)
+
+[Timer]
+OnCalendar=Sat 20:00:00 UTC
+Persistent=true
+
+[Install]
+WantedBy=timers.target
+EOF
+
+sudo tee /etc/systemd/system/indo_scheduler.service > /dev/null <<EOF
+[Unit]
+Description=Indonesian Stock Scheduler (news slots + volume screener, replaces both timers)
+After=network.target
+
+[Service]
+Type=simple
+User=$USER
+WorkingDirectory=/opt/indo_badnews
+Environment="PATH=/opt/indo_badnews/venv/bin"
+ExecStart=/opt/indo_badnews/venv/bin/python /opt/indo_badnews/scheduler.py
+Restart=always
+RestartSec=10
+
+[Install]
+WantedBy=multi-user.target
+EOF
+
 echo "✓ Systemd services and timers installed"
 
 # Reload systemd
@@ -209,6 +304,12 @@ echo "   sudo systemctl enable --now indo_badnews_bot.service"
 echo "   sudo systemctl enable --now indo_badnews.timer"
 echo "   sudo systemctl enable --now indo_volume_screener.timer"
 echo ""
+echo "   Or, instead of the two timers, the resident scheduler:"
+echo "   sudo systemctl enable --now indo_scheduler.service"
+echo ""
+echo "   Weekly retrain of the local verdict model (skips until enough verdicts are logged):"
+echo "   sudo systemctl enable --now indo_verdict_model.timer"
+echo ""
 echo "3. Check status:"
 echo "   sudo systemctl status indo_badnews_bot"
 echo "   sudo systemctl list-timers"
@@ -0,0 +1,521 @@
+#!/usr/bin/env python3
+"""
+Intraday Volume Spike Detector
+Consumes 1m/5m bars during the session and runs the volume spike and
+watchlist pattern checks as each bar closes. Every ticker keeps a ring
+buffer of its last INTRADAY_WINDOW volumes with a running sum, so a new
+bar costs O(1) regardless of window or universe size.
+
+A spike alerts on the bar it happens (as WAIT, like the daily detector
+with no follow-through yet) and is upgraded to SETUP once FOLLOW_BARS
+quiet bars follow it.
+
+Usage:
+    python intraday.py                    Run until the session closes (Yahoo bars)
+    python intraday.py replay FILE        Drive the detector from recorded bars, print alerts
+    python intraday.py record FILE        Save the last INTRADAY_RECORD_PERIOD of bars as a fixture
+    python intraday.py check [N]          Parity with the daily detectors on N synthetic tickers
+"""
+
+import os
+import sys
+import math
+import time
+from datetime import datetime, timedelta
+from dotenv import load_dotenv
+import pandas as pd
+import pytz
+import market_data
+import storage
+import screener_engine
+from screener_engine import (
+    SPIKE_MIN_PAST, SPIKE_RATIO, SPIKE_PRICE, FOLLOW_BARS, FOLLOW_MIN_BARS, FOLLOW_VOLUME,
+    PATTERN_PRICE, PATTERN_VOLUME
+)
+import fanout
+import metrics
+import telegram_sender
+
+load_dotenv()
+
+TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
+INTRADAY_INTERVAL = os.getenv("INTRADAY_INTERVAL", "5m")  # 1m | 2m | 5m | 15m
+INTRADAY_WINDOW = int(os.getenv("INTRADAY_WINDOW", "20"))
+INTRADAY_SPIKE_RATIO = float(os.getenv("INTRADAY_SPIKE_RATIO", str(SPIKE_RATIO)))
+INTRADAY_PRICE_MIN = float(os.getenv("INTRADAY_PRICE_MIN", f"{(SPIKE_PRICE - 1) * 100:g}"))  # percent, bar over bar
+INTRADAY_POLL_DELAY = int(os.getenv("INTRADAY_POLL_DELAY", "10"))  # seconds after each bar closes
+INTRADAY_RECORD_PERIOD = os.getenv("INTRADAY_RECORD_PERIOD", "5d")
+
+SESSION_OPEN = (9, 0)
+SESSION_CLOSE = (16, 0)
+REPORT_LIMIT = 10
+
+WIB = pytz.timezone("Asia/Jakarta")
+
+
+def log(msg):
+    """Print with WIB timestamp"""
+    now_wib = datetime.now(WIB).strftime("%Y-%m-%d %H:%M:%S %Z")
+    print(f"[{now_wib}] {msg}")
+
+
+class RollingWindow:
+    """Fixed-size ring buffer with a running sum: O(1) push and mean"""
+
+    __slots__ = ("values", "size", "pos", "count", "total", "pushes")
+
+    def __init__(self, size):
+        self.values = [0.0] * size
+        self.size = size
+        self.pos = 0
+        self.count = 0
+        self.total = 0.0
+        self.pushes = 0
+
+    def push(self, value):
+        if self.count == self.size:
+            self.total -= self.values[self.pos]
+        else:
+            self.count += 1
+
+        self.values[self.pos] = value
+        self.total += value
+        self.pos = (self.pos + 1) % self.size
+
+        # Re-add from scratch now and then so float error can't accumulate
+        self.pushes += 1
+        if self.pushes % (self.size * 64) == 0:
+            self.total = math.fsum(self.values[:self.count] if self.count < self.size else self.values)
+
+    def mean(self):
+        return self.total / self.count if self.count else math.nan
+
+
+class TickerState:
+    """Rolling volume window, previous bar and an unresolved spike for one ticker"""
+
+    __slots__ = ("volumes", "prev_close", "prev_volume", "session", "pending", "follow", "loud")
+
+    def __init__(self, window):
+        self.volumes = RollingWindow(window)
+        self.prev_close = None
+        self.prev_volume = None
+        self.session = None
+        self.pending = None
+        self.follow = 0
+        self.loud = False
+
+
+class IntradayDetector:
+    """
+    Incremental spike and pattern checks for a whole universe.
+    update() takes one closed bar and returns the alerts it triggers.
+    With reset_daily the window starts over each session, so yesterday's
+    closing volume doesn't skew this morning's average.
+    """
+
+    def __init__(self, watchlist=(), window=INTRADAY_WINDOW, spike_ratio=INTRADAY_SPIKE_RATIO,
+                 price_min=INTRADAY_PRICE_MIN, reset_daily=True):
+        self.watchlist = set(watchlist)
+        self.window = window
+        self.spike_ratio = spike_ratio
+        self.price_up = 1 + price_min / 100
+        self.reset_daily = reset_daily
+        self.states = {}
+        self.bars = 0
+
+    def update(self, ticker, when, close, volume):
+        """
+        Feed one closed bar (bars of a ticker must arrive in time order).
+        Returns: list of spike / pattern dicts shaped like the daily ones,
+        plus "time" and, for spikes, "classification" WAIT or SETUP
+        """
+        if close != close or volume != volume:  # NaN bar
+            return []
+
+        events = []
+        state = self.states.get(ticker)
+        session = when.date() if self.reset_daily else None
+        if state is None or state.session != session:
+            if state is not None:
+                events.extend(resolve(state))
+            state = self.states[ticker] = TickerState(self.window)
+            state.session = session
+
+        self.bars += 1
+        prev_close = state.prev_close
+        prev_volume = state.prev_volume
+
+        if state.pending is not None:
+            state.follow += 1
+            if volume > state.pending["spike_volume"] * FOLLOW_VOLUME:
+                state.loud = True
+            if state.follow == FOLLOW_BARS:
+                if not state.loud:
+                    events.append({**state.pending, "classification": "SETUP"})
+                state.pending = None
+
+        if prev_close is not None and state.volumes.count >= SPIKE_MIN_PAST:
+            avg_volume = state.volumes.mean()
+            if avg_volume > 0 and volume >= self.spike_ratio * avg_volume and close >= prev_close * self.price_up:
+                spike = {
+                    "ticker": ticker,
+                    "date": when.strftime("%Y-%m-%d %H:%M"),
+                    "time": when,
+                    "spike_volume": volume,
+                    "avg_volume": avg_volume,
+                    "close": close,
+                    "prev_close": prev_close,
+                    "classification": "WAIT"
+                }
+                events.append(spike)
+                state.pending = spike
+                state.follow = 0
+                state.loud = False
+
+        if ticker in self.watchlist and prev_close and prev_volume:
+            price_change = ((close - prev_close) / prev_close) * 100
+            volume_change = ((volume - prev_volume) / prev_volume) * 100
+
+            if price_change >= PATTERN_PRICE and volume_change <= -PATTERN_VOLUME:
+                kind = "Price↑ Volume↓"
+            elif price_change <= -PATTERN_PRICE and volume_change >= PATTERN_VOLUME:
+                kind = "Price↓ Volume↑"
+            else:
+                kind = None
+
+            if kind:
+                events.append({
+                    "ticker": ticker,
+                    "date": when.strftime("%Y-%m-%d %H:%M"),
+                    "time": when,
+                    "type": kind,
+                    "price_change": price_change,
+                    "volume_change": volume_change,
+                    "close": close
+                })
+
+        state.volumes.push(volume)
+        state.prev_close = close
+        state.prev_volume = volume
+        return events
+
+    def finish(self):
+        """
+        Session over: resolve spikes still waiting on follow-through the
+        way the daily detector would (SETUP with ≥3 quiet bars, else WAIT).
+        """
+        return [event for state in self.states.values() for event in resolve(state)]
+
+
+def resolve(state):
+    """Close out a ticker's pending spike: SETUP after ≥3 quiet bars, else it stays WAIT"""
+    pending, state.pending = state.pending, None
+    if pending is not None and state.follow >= FOLLOW_MIN_BARS and not state.loud:
+        return [{**pending, "classification": "SETUP"}]
+    return []
+
+
+def stream_bars(frames):
+    """
+    Interleave {ticker: DataFrame} bars in time order, as a live feed would.
+    Yields: (ticker, time, close, volume)
+    """
+    parts = [df[["Date", "Close", "Volume"]].assign(ticker=ticker) for ticker, df in frames.items() if len(df)]
+    if not parts:
+        return
+
+    bars = pd.concat(parts, ignore_index=True).sort_values("Date", kind="mergesort")
+    for ticker, when, close, volume in zip(
+        bars["ticker"], bars["Date"], bars["Close"].astype(float), bars["Volume"].astype(float)
+    ):
+        yield ticker, when, close, volume
+
+
+def replay_bars(path):
+    """Recorded bars from a CSV/Parquet fixture (see market_data.load_frames), in time order"""
+    return stream_bars(market_data.load_frames(path))
+
+
+def bar_length(interval=INTRADAY_INTERVAL):
+    """timedelta for a yfinance interval string like "5m" or "1h\""""
+    unit = {"m": "minutes", "h": "hours"}[interval[-1]]
+    return timedelta(**{unit: int(interval[:-1])})
+
+
+class YahooIntradaySource:
+    """
+    Polls Yahoo for today's bars of the whole universe and hands out only
+    bars that have closed and were not handed out before.
+    """
+
+    def __init__(self, tickers, interval=INTRADAY_INTERVAL):
+        self.tickers = list(tickers)
+        self.interval = interval
+        self.length = bar_length(interval)
+        self.provider = market_data.YFinanceProvider()
+        self.last_seen = {}
+
+    def poll(self, now=None):
+        now = now or datetime.now(WIB)
+        frames = self.provider.fetch(self.tickers, period="1d", interval=self.interval)
+        fresh = {}
+
+        for ticker, df in frames.items():
+            df = df.rename(columns={"Datetime": "Date"})
+            df["Date"] = pd.to_datetime(df["Date"]).dt.tz_convert(WIB)
+
+            closed = df["Date"] + self.length <= now
+            last = self.last_seen.get(ticker)
+            if last is not None:
+                closed &= df["Date"] > last
+
+            df = df[closed]
+            if len(df):
+                self.last_seen[ticker] = df["Date"].iloc[-1]
+                fresh[ticker] = df
+
+        return list(stream_bars(fresh))
+
+
+def format_spike_alert(spike):
+    """Render one intraday spike"""
+    ticker_clean = spike["ticker"].replace(".JK", "")
+    price_change = ((spike["close"] - spike["prev_close"]) / spike["prev_close"]) * 100
+    volume_ratio = spike["spike_volume"] / spike["avg_volume"]
+    label = "🚀 SETUP" if spike["classification"] == "SETUP" else "⚡ Spike"
+
+    msg = f"<b>{ticker_clean}</b> {label}\n"
+    msg += f"🕒 {spike['date']}\n"
+    msg += f"💰 Rp {spike['close']:,.0f} (+{price_change:.1f}%)\n"
+    msg += f"📊 Volume: {volume_ratio:.1f}x {INTRADAY_WINDOW}-bar avg\n\n"
+    return msg
+
+
+def format_pattern_alert(pattern):
+    """Render one intraday watchlist pattern"""
+    ticker_clean = pattern["ticker"].replace(".JK", "")
+
+    msg = f"<b>{ticker_clean}</b> - {pattern['type']}\n"
+    msg += f"🕒 {pattern['date']}\n"
+    msg += f"💰 Rp {pattern['close']:,.0f}\n"
+    msg += f"📈 Price: {pattern['price_change']:+.1f}%\n"
+    msg += f"📊 Volume: {pattern['volume_change']:+.1f}%\n\n"
+    return msg
+
+
+def build_alert(now_wib, sections):
+    """One message from (fragments, total) sections: spikes, then patterns"""
+    titles = ["⚡ <b>Intraday Volume Spikes</b>\n\n", "⚠️ <b>Intraday Watchlist Patterns</b>\n\n"]
+    msg = f"📊 <b>Intraday Screener ({INTRADAY_INTERVAL})</b>\n⏰ {now_wib}\n\n"
+    empty = True
+
+    for title, section in zip(titles, sections):
+        if not section or not section[1]:
+            continue
+        fragments, total = section
+        empty = False
+
+        msg += title + "".join(fragments)
+        if total > len(fragments):
+            msg += f"... and {total - len(fragments)} more\n"
+
+    return None if empty else msg
+
+
+def send_alerts(conn, events):
+    """Record events and send them to TELEGRAM_CHAT_ID and the chats watching each ticker"""
+    spikes = [e for e in events if "classification" in e]
+    patterns = [e for e in events if "type" in e]
+
+    storage.record_signals(conn, "intraday_spike", [s for s in spikes if s["classification"] == "WAIT"])
+    storage.record_signals(conn, "intraday_setup", [s for s in spikes if s["classification"] == "SETUP"])
+    storage.record_signals(conn, "intraday_pattern", patterns)
+
+    now_wib = datetime.now(WIB).strftime("%H:%M WIB")
+    sender = telegram_sender.get_sender()
+
+    message = build_alert(now_wib, [
+        ([format_spike_alert(s) for s in spikes[:REPORT_LIMIT]], len(spikes)),
+        ([format_pattern_alert(p) for p in patterns[:REPORT_LIMIT]], len(patterns))
+    ])
+    if message:
+        sender.send(TELEGRAM_CHAT_ID, message)
+
+    index = fanout.build_ticker_index(storage.load_watchlists(conn))
+    per_chat = fanout.merge_sections(
+        fanout.fan_out(spikes, index, format_spike_alert, REPORT_LIMIT, skip_chats={TELEGRAM_CHAT_ID}),
+        fanout.fan_out(patterns, index, format_pattern_alert, REPORT_LIMIT, skip_chats={TELEGRAM_CHAT_ID})
+    )
+    sent = sender.send_many(
+        (chat_id, message)
+        for chat_id, sections in per_chat.items()
+        for message in [build_alert(now_wib, sections)]
+        if message
+    )
+    log(f"✓ Alerted {len(spikes)} spike(s), {len(patterns)} pattern(s); {sent} watchlist chat message(s)")
+
+
+def session_bounds(now):
+    """(open, close) datetimes of today's session in WIB"""
+    start = now.replace(hour=SESSION_OPEN[0], minute=SESSION_OPEN[1], second=0, microsecond=0)
+    end = now.replace(hour=SESSION_CLOSE[0], minute=SESSION_CLOSE[1], second=0, microsecond=0)
+    return start, end
+
+
+def next_poll(now, length):
+    """First bar boundary after now, plus INTRADAY_POLL_DELAY"""
+    start, _ = session_bounds(now)
+    elapsed = max(now - start, timedelta(0))
+    bars = int(elapsed / length) + 1
+    return start + bars * length + timedelta(seconds=INTRADAY_POLL_DELAY)
+
+
+def run_session():
+    """Poll Yahoo once per bar until the session closes, alerting as spikes appear"""
+    import volume_screener
+
+    now = datetime.now(WIB)
+    start, end = session_bounds(now)
+    if now.weekday() >= 5 or not start <= now < end + timedelta(minutes=15):
+        log("⏸️  Outside the trading session, exiting")
+        return
+
+    tickers, watchlist_set = volume_screener.get_ticker_universe()
+    tickers = sorted(tickers)
+    log(f"✓ Streaming {len(tickers)} tickers on {INTRADAY_INTERVAL} bars until {end.strftime('%H:%M')} WIB")
+
+    detector = IntradayDetector(watchlist_set)
+    source = YahooIntradaySource(tickers)
+    length = bar_length()
+    conn = storage.connect()
+
+    try:
+        while True:
+            with metrics.stage("poll"):
+                bars = source.poll()
+
+            with metrics.stage("detect"):
+                events = [event for bar in bars for event in detector.update(*bar)]
+            metrics.count("bars", len(bars))
+            log(f"📊 {len(bars)} new bar(s), {len(events)} alert(s)")
+
+            now = datetime.now(WIB)
+            if now >= end + length:
+                events += detector.finish()
+
+            if events:
+                metrics.count("alerts", len(events))
+                with metrics.stage("telegram"):
+                    send_alerts(conn, events)
+
+            if now >= end + length:
+                break
+
+            time.sleep(max(1, (next_poll(now, length) - datetime.now(WIB)).total_seconds()))
+    finally:
+        conn.close()
+
+
+def replay(path):
+    """Drive the detector from recorded bars, printing alerts and throughput"""
+    frames = market_data.load_frames(path)
+    detector = IntradayDetector(frames)
+    bars = list(stream_bars(frames))
+
+    started = time.perf_counter()
+    events = [event for bar in bars for event in detector.update(*bar)]
+    events += detector.finish()
+    elapsed = time.perf_counter() - started
+
+    for event in events:
+        if "classification" in event:
+            print(format_spike_alert(event).strip().replace("\n", " | "))
+        else:
+            print(format_pattern_alert(event).strip().replace("\n", " | "))
+
+    rate = len(bars) / elapsed if elapsed else 0
+    print(f"✓ {len(bars)} bars for {len(frames)} tickers in {elapsed * 1000:.1f} ms "
+          f"({rate:,.0f} bars/s), {len(events)} alert(s)")
+
+
+def record(path):
+    """Save the last INTRADAY_RECORD_PERIOD of INTRADAY_INTERVAL bars as a replay fixture"""
+    import volume_screener
+
+    tickers, _ = volume_screener.get_ticker_universe()
+    frames = market_data.YFinanceProvider().fetch(
+        sorted(tickers), period=INTRADAY_RECORD_PERIOD, interval=INTRADAY_INTERVAL
+    )
+    df = pd.concat(
+        [frame.rename(columns={"Datetime": "Date"}).assign(ticker=ticker) for ticker, frame in frames.items()],
+        ignore_index=True
+    )
+    df = df[["ticker", "Date", "Open", "High", "Low", "Close", "Volume"]]
+
+    if str(path).endswith(".parquet"):
+        df.to_parquet(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+    print(f"✓ Recorded {len(df)} bars for {len(frames)} tickers to {path}")
+
+
+def check_parity(frames):
+    """
+    Compare the streaming detector with detect_volume_spike() and
+    detect_watchlist_patterns() run on every prefix of each ticker's bars:
+    a bar must alert exactly when the daily detectors flag that bar as the
+    latest one.
+    Returns: list of mismatch descriptions (empty when identical)
+    """
+    detector = IntradayDetector(frames, reset_daily=False)
+    alerts = {}
+    for bar in stream_bars(frames):
+        for event in detector.update(*bar):
+            if event.get("classification") != "SETUP":
+                alerts.setdefault((event["ticker"], event["time"]), []).append(event)
+
+    mismatches = []
+    for ticker, df in frames.items():
+        for bar, expected, expected_patterns in screener_engine.prefix_reports(df):
+            when = df["Date"].iloc[bar]
+            day = when.strftime("%Y-%m-%d")
+            found = alerts.get((ticker, when), [])
+
+            got = next((e for e in found if "classification" in e), None)
+            if expected is not None and expected["date"] != day:
+                expected = None
+            if bar >= screener_engine.SPIKE_WINDOW - 1 and (expected is None) != (got is None):
+                mismatches.append(f"{ticker} {day} spike: {expected} != {got}")
+            elif expected and not math.isclose(expected["avg_volume"], got["avg_volume"], rel_tol=1e-12):
+                mismatches.append(f"{ticker} {day} avg volume: {expected['avg_volume']} != {got['avg_volume']}")
+
+            got = [e["type"] for e in found if "type" in e]
+            if got != expected_patterns:
+                mismatches.append(f"{ticker} {day} patterns: {expected_patterns} != {got}")
+
+    return mismatches
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "run"
+
+    if command == "replay" and len(sys.argv) > 2:
+        replay(sys.argv[2])
+    elif command == "record" and len(sys.argv) > 2:
+        record(sys.argv[2])
+    elif command == "check":
+        n = int(sys.argv[2]) if len(sys.argv) > 2 else 200
+        screener_engine.report_parity(check_parity, n, "Streaming detector matches the daily detectors")
+    elif command == "run":
+        log("=== Intraday Volume Screener ===")
+        with metrics.run("intraday"):
+            run_session()
+        log("=== Intraday Screener Complete ===")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
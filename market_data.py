@@ -0,0 +1,324 @@
+#!/usr/bin/env python3
+"""
+Market Data Providers
+Bulk daily OHLCV fetches behind one interface, so the screener can read
+from Yahoo Finance or replay local CSV/Parquet history.
+
+Every provider has:
+    fetch(tickers, period="1mo", start=None)   -> {ticker: DataFrame}
+    fetch_one(ticker, period="1mo", start=None, timeout=None) -> DataFrame or None
+    remote                                      True if it goes over the network
+
+Frames have a Date column plus Open, High, Low, Close, Volume.
+"""
+
+import os
+import time
+import threading
+from datetime import datetime
+from pathlib import Path
+from dotenv import load_dotenv
+import pandas as pd
+import pytz
+import bar_store
+import metrics
+
+load_dotenv()
+
+MARKET_DATA_PROVIDER = os.getenv("MARKET_DATA_PROVIDER", "yfinance")  # yfinance | replay
+REPLAY_PATH = os.getenv("REPLAY_PATH", "/opt/indo_badnews/replay")
+REPLAY_AS_OF = os.getenv("REPLAY_AS_OF")  # YYYY-MM-DD, default: latest replayed bar
+BATCH_SIZE = int(os.getenv("BATCH_SIZE", "100"))
+BATCH_RETRIES = int(os.getenv("BATCH_RETRIES", "2"))
+
+WIB = pytz.timezone("Asia/Jakarta")
+COLUMNS = ["Date", "Open", "High", "Low", "Close", "Volume"]
+
+
+def log(msg):
+    """Print with WIB timestamp"""
+    now_wib = datetime.now(WIB).strftime("%Y-%m-%d %H:%M:%S %Z")
+    print(f"[{now_wib}] {msg}")
+
+
+def split_batch_frames(data, tickers):
+    """Split a multi-ticker yf.download() result into per-ticker frames"""
+    frames = {}
+    if data is None or data.empty:
+        return frames
+
+    grouped = data.columns.nlevels > 1
+    available = set(data.columns.get_level_values(0)) if grouped else set()
+
+    for ticker in tickers:
+        if grouped:
+            if ticker not in available:
+                continue
+            df = data[ticker]
+        elif len(tickers) == 1:
+            df = data
+        else:
+            continue
+
+        df = df.dropna(how="all")
+        if df.empty:
+            continue
+
+        frames[ticker] = df.reset_index()
+
+    return frames
+
+
+class YFinanceProvider:
+    """Yahoo Finance through yfinance, batched with per-ticker retries"""
+
+    remote = True
+
+    def __init__(self, batch_size=BATCH_SIZE, retries=BATCH_RETRIES):
+        import yfinance
+
+        self.yf = yfinance
+        self.batch_size = batch_size
+        self.retries = retries
+
+    def download_batch(self, tickers, period="1mo", start=None, interval="1d"):
+        """Fetch OHLCV data for several tickers in a single Yahoo request"""
+        if start:
+            span = {"start": start}
+        else:
+            span = {"period": period}
+
+        try:
+            with metrics.timer("external_call", service="yahoo", kind="batch"):
+                data = self.yf.download(
+                    tickers,
+                    **span,
+                    interval=interval,
+                    group_by="ticker",
+                    auto_adjust=True,
+                    threads=True,
+                    progress=False
+                )
+        except Exception as e:
+            log(f"❌ Batch download failed ({len(tickers)} tickers): {e}")
+            return {}
+
+        return split_batch_frames(data, tickers)
+
+    def fetch(self, tickers, period="1mo", start=None, interval="1d"):
+        """
+        Fetch many tickers in chunks of batch_size.
+        Only tickers missing from a chunk's result are retried.
+        Intraday intervals ("1m", "5m") come back with a Datetime column.
+        """
+        tickers = list(tickers)
+        frames = {}
+
+        for offset in range(0, len(tickers), self.batch_size):
+            pending = tickers[offset:offset + self.batch_size]
+
+            for attempt in range(self.retries + 1):
+                if attempt > 0:
+                    metrics.count("yahoo_batch_retries")
+                    log(f"🔁 Retrying {len(pending)} ticker(s) (attempt {attempt + 1})")
+                    time.sleep(2 ** attempt)
+
+                fetched = self.download_batch(pending, period=period, start=start, interval=interval)
+                frames.update(fetched)
+
+                pending = [t for t in pending if t not in fetched]
+                if not pending:
+                    break
+
+            if pending:
+                log(f"⚠️  No data for {len(pending)} ticker(s): {', '.join(pending[:10])}")
+
+            done = min(offset + self.batch_size, len(tickers))
+            log(f"⏳ Downloaded {done}/{len(tickers)}...")
+
+        return frames
+
+    def fetch_one(self, ticker, period="1mo", start=None, timeout=None):
+        """Fetch one ticker; errors propagate so the caller can retry"""
+        if start:
+            span = {"start": start}
+        else:
+            span = {"period": period}
+
+        with metrics.timer("external_call", service="yahoo", kind="ticker"):
+            df = self.yf.Ticker(ticker).history(**span, timeout=timeout)
+        return None if df.empty else df.reset_index()
+
+
+def load_frames(path):
+    """
+    Read recorded bars into {ticker: DataFrame}.
+    path is either one CSV/Parquet file with a ticker column, or a
+    directory of per-ticker files named like BBRI.JK.csv / BBRI.JK.parquet.
+    """
+    path = Path(path)
+    if path.is_dir():
+        files = sorted(path.glob("*.csv")) + sorted(path.glob("*.parquet"))
+        parts = [read_table(f).assign(ticker=f.name.rsplit(".", 1)[0]) for f in files]
+        df = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=["ticker"] + COLUMNS)
+    else:
+        df = read_table(path)
+
+    df["Date"] = pd.to_datetime(df["Date"])
+    return {
+        ticker: group[COLUMNS].sort_values("Date").reset_index(drop=True)
+        for ticker, group in df.groupby("ticker", sort=False)
+    }
+
+
+def read_table(path):
+    if str(path).endswith(".parquet"):
+        return pd.read_parquet(path)
+    return pd.read_csv(path)
+
+
+class ReplayProvider:
+    """
+    Recorded bars served from disk, as if it were `as_of`.
+    Periods are counted back from as_of (default: the latest replayed bar).
+    """
+
+    remote = False
+
+    def __init__(self, path=REPLAY_PATH, as_of=REPLAY_AS_OF):
+        self.path = path
+        self.frames = None
+        self.as_of = pd.Timestamp(as_of) if as_of else None
+        self.lock = threading.Lock()
+
+    def load(self):
+        with self.lock:
+            if self.frames is None:
+                self.frames = load_frames(self.path)
+                if self.as_of is None and self.frames:
+                    self.as_of = max(df["Date"].iloc[-1] for df in self.frames.values() if len(df))
+        return self.frames
+
+    def window(self, df, period, start):
+        if self.as_of is not None:
+            df = df[df["Date"] <= self.as_of]
+
+        if start:
+            first = pd.Timestamp(start)
+        elif period in bar_store.PERIOD_DAYS and self.as_of is not None:
+            first = self.as_of - pd.Timedelta(days=bar_store.PERIOD_DAYS[period])
+        else:
+            first = None
+
+        if first is not None:
+            df = df[df["Date"] >= first]
+        return df.reset_index(drop=True)
+
+    def fetch(self, tickers, period="1mo", start=None, interval="1d"):
+        """Recorded bars are served at whatever interval they were recorded at"""
+        frames = self.load()
+        result = {}
+        for ticker in tickers:
+            if ticker not in frames:
+                continue
+            df = self.window(frames[ticker], period, start)
+            if len(df):
+                result[ticker] = df
+        return result
+
+    def fetch_one(self, ticker, period="1mo", start=None, timeout=None):
+        return self.fetch([ticker], period=period, start=start).get(ticker)
+
+
+class CachingProvider:
+    """
+    Wraps any provider so each (ticker, period, start, interval) is fetched
+    once per trading day in this process. Concurrent requests for the same
+    key wait for the first one instead of fetching again. Intraday
+    intervals always go to the provider.
+    """
+
+    def __init__(self, provider):
+        self.provider = provider
+        self.remote = provider.remote
+        self.cache = {}
+        self.inflight = {}
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def cached(self, tickers, period, start, load, interval="1d"):
+        """Serve tickers from the cache, calling load(missing) -> {ticker: df} for the rest"""
+        day = bar_store.last_market_close().date()
+        keys = {ticker: (ticker, period, start, interval, day) for ticker in tickers}
+        missing = []
+        waiting = []
+
+        with self.lock:
+            # Results for today only; older days can never be hit again
+            for key in [k for k in self.cache if k[-1] != day]:
+                del self.cache[key]
+
+            for ticker, key in keys.items():
+                if key in self.cache:
+                    self.hits += 1
+                elif key in self.inflight:
+                    self.hits += 1
+                    waiting.append(self.inflight[key])
+                else:
+                    self.misses += 1
+                    self.inflight[key] = threading.Event()
+                    missing.append(ticker)
+
+        metrics.count("provider_cache", len(tickers) - len(missing), result="hit")
+        metrics.count("provider_cache", len(missing), result="miss")
+
+        fetched = {}
+        try:
+            if missing:
+                fetched = load(missing)
+        finally:
+            with self.lock:
+                for ticker in missing:
+                    if fetched.get(ticker) is not None:
+                        self.cache[keys[ticker]] = fetched[ticker]
+                    self.inflight.pop(keys[ticker]).set()
+
+        for event in waiting:
+            event.wait()
+
+        with self.lock:
+            found = {ticker: self.cache.get(key) for ticker, key in keys.items()}
+        return {ticker: df.copy() for ticker, df in found.items() if df is not None}
+
+    def fetch(self, tickers, period="1mo", start=None, interval="1d"):
+        # Intraday bars keep arriving during the session; caching them per day would freeze them
+        if interval[-1] in "mh":
+            return self.provider.fetch(tickers, period=period, start=start, interval=interval)
+        return self.cached(
+            list(tickers), period, start,
+            lambda missing: self.provider.fetch(missing, period=period, start=start, interval=interval),
+            interval=interval
+        )
+
+    def fetch_one(self, ticker, period="1mo", start=None, timeout=None):
+        def load(missing):
+            df = self.provider.fetch_one(ticker, period=period, start=start, timeout=timeout)
+            return {} if df is None else {ticker: df}
+
+        return self.cached([ticker], period, start, load).get(ticker)
+
+
+_provider = None
+
+
+def get_provider():
+    """Process-wide provider chosen by MARKET_DATA_PROVIDER, wrapped in the cache"""
+    global _provider
+    if _provider is None:
+        if MARKET_DATA_PROVIDER == "replay":
+            backend = ReplayProvider()
+        else:
+            backend = YFinanceProvider()
+        _provider = CachingProvider(backend)
+    return _provider
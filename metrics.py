@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Run Metrics
+Stage timers, counters and latency histograms shared by the news scanner,
+the volume screener and the bot. Each run writes a JSON summary and a
+Prometheus textfile (for node_exporter's textfile collector) to
+METRICS_DIR. METRICS_PROFILE=1 also dumps a cProfile and tracemalloc
+report for the run.
+
+Standard library only, so the news scanner's fast path stays cheap.
+
+Usage:
+    with metrics.run("news"):
+        with metrics.stage("fetch"):
+            ...
+        metrics.count("articles_fetched", 42)
+        with metrics.timer("external", service="ollama"):
+            ...
+"""
+
+import os
+import io
+import json
+import time
+import pstats
+import cProfile
+import tracemalloc
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from pathlib import Path
+
+METRICS_DIR = Path(os.getenv("METRICS_DIR", "/opt/indo_badnews/metrics"))
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+METRICS_PROFILE = os.getenv("METRICS_PROFILE") == "1"
+
+# Seconds; covers a feed round trip up to a slow Ollama batch
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+SLOWEST_KEEP = 10
+PROFILE_TOP = 30
+
+
+def label_key(labels):
+    return tuple(sorted(labels.items()))
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in seconds"""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.total = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        for idx, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[idx] += 1
+        self.total += 1
+        self.sum += seconds
+        self.max = max(self.max, seconds)
+
+    def merge(self, other):
+        self.counts = [a + b for a, b in zip(self.counts, other.counts)]
+        self.total += other.total
+        self.sum += other.sum
+        self.max = max(self.max, other.max)
+
+    def summary(self):
+        return {
+            "count": self.total,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "mean": round(self.sum / self.total, 6) if self.total else 0.0,
+            "buckets": {str(bound): count for bound, count in zip(BUCKETS, self.counts)}
+        }
+
+
+class Run:
+    """Metrics for one job run. All methods are thread-safe"""
+
+    def __init__(self, job):
+        self.job = job
+        self.started = time.time()
+        self.finished = None
+        self.error = None
+        self.skipped = False
+        self.stages = {}
+        self.counters = {}
+        self.histograms = {}
+        self.slowest = {}
+        self.lock = threading.Lock()
+
+    def add_stage(self, name, seconds):
+        with self.lock:
+            self.stages[name] = self.stages.get(name, 0.0) + seconds
+
+    def count(self, name, value=1, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, seconds, **labels):
+        key = (name, label_key(labels))
+        with self.lock:
+            self.histograms.setdefault(key, Histogram()).observe(seconds)
+
+    def note_slow(self, name, item, seconds):
+        """Keep the SLOWEST_KEEP slowest items (e.g. tickers) seen under name"""
+        with self.lock:
+            entries = self.slowest.setdefault(name, [])
+            entries.append((seconds, item))
+            entries.sort(reverse=True)
+            del entries[SLOWEST_KEEP:]
+
+    def export(self):
+        """Counters, histograms and slowest items as a picklable dict, for merge() in another process"""
+        with self.lock:
+            return {
+                "counters": dict(self.counters),
+                "histograms": dict(self.histograms),
+                "slowest": {name: list(entries) for name, entries in self.slowest.items()}
+            }
+
+    def merge(self, exported):
+        """
+        Add another run's export() to this one. Stage times are not merged:
+        the workers ran concurrently inside one of this run's stages.
+        """
+        with self.lock:
+            for key, value in exported["counters"].items():
+                self.counters[key] = self.counters.get(key, 0) + value
+            for key, hist in exported["histograms"].items():
+                self.histograms.setdefault(key, Histogram()).merge(hist)
+            for name, entries in exported["slowest"].items():
+                merged = self.slowest.setdefault(name, [])
+                merged.extend(entries)
+                merged.sort(reverse=True)
+                del merged[SLOWEST_KEEP:]
+
+    def summary(self):
+        with self.lock:
+            finished = self.finished or time.time()
+            return {
+                "job": self.job,
+                "started": datetime.fromtimestamp(self.started, timezone.utc).isoformat(),
+                "duration": round(finished - self.started, 6),
+                "error": self.error,
+                "stages": {name: round(seconds, 6) for name, seconds in self.stages.items()},
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self.counters.items())
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **hist.summary()}
+                    for (name, labels), hist in sorted(self.histograms.items(), key=lambda item: item[0])
+                ],
+                "slowest": {
+                    name: [{"item": item, "seconds": round(seconds, 6)} for seconds, item in entries]
+                    for name, entries in self.slowest.items()
+                }
+            }
+
+    def prometheus(self):
+        """Render the run in Prometheus text exposition format"""
+        summary = self.summary()
+        job = summary["job"]
+        lines = []
+
+        def series(name, labels, value):
+            labels = {"job": job, **labels}
+            rendered = ",".join(f'{key}="{escape(val)}"' for key, val in labels.items())
+            lines.append(f"indo_{name}{{{rendered}}} {value}")
+
+        lines.append("# TYPE indo_run_duration_seconds gauge")
+        series("run_duration_seconds", {}, summary["duration"])
+        lines.append("# TYPE indo_run_success gauge")
+        series("run_success", {}, 0 if summary["error"] else 1)
+        lines.append("# TYPE indo_run_finished_timestamp_seconds gauge")
+        series("run_finished_timestamp_seconds", {}, round(self.finished or time.time(), 3))
+
+        lines.append("# TYPE indo_stage_seconds gauge")
+        for name, seconds in summary["stages"].items():
+            series("stage_seconds", {"stage": name}, seconds)
+
+        typed = set()
+        for counter in summary["counters"]:
+            if counter["name"] not in typed:
+                lines.append(f"# TYPE indo_{counter['name']} gauge")
+                typed.add(counter["name"])
+            series(counter["name"], counter["labels"], counter["value"])
+
+        for hist in summary["histograms"]:
+            name = f"{hist['name']}_seconds"
+            if name not in typed:
+                lines.append(f"# TYPE indo_{name} histogram")
+                typed.add(name)
+            for bound, count in hist["buckets"].items():
+                series(f"{name}_bucket", {**hist["labels"], "le": bound}, count)
+            series(f"{name}_bucket", {**hist["labels"], "le": "+Inf"}, hist["count"])
+            series(f"{name}_sum", hist["labels"], hist["sum"])
+            series(f"{name}_count", hist["labels"], hist["count"])
+
+        return "\n".join(lines) + "\n"
+
+
+def escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+CURRENT = Run("adhoc")
+
+
+def current():
+    """The run metrics are being recorded into"""
+    return CURRENT
+
+
+def count(name, value=1, **labels):
+    CURRENT.count(name, value, **labels)
+
+
+def skip():
+    """Mark the current run as having done nothing, so it is not written over the last real one"""
+    CURRENT.skipped = True
+
+
+def observe(name, seconds, **labels):
+    CURRENT.observe(name, seconds, **labels)
+
+
+def note_slow(name, item, seconds):
+    CURRENT.note_slow(name, item, seconds)
+
+
+def merge(exported):
+    CURRENT.merge(exported)
+
+
+@contextmanager
+def capture():
+    """
+    Record the block into a fresh Run that is not written out, e.g. one
+    task in a pool worker whose export() goes back to the parent's run.
+    """
+    global CURRENT
+    previous = CURRENT
+    CURRENT = Run(previous.job)
+    try:
+        yield CURRENT
+    finally:
+        CURRENT = previous
+
+
+@contextmanager
+def stage(name):
+    """Add the wall time of the block to stage `name` (repeats accumulate)"""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        CURRENT.add_stage(name, time.perf_counter() - started)
+
+
+@contextmanager
+def timer(name, **labels):
+    """Observe the block's latency in histogram `name`, counting failures"""
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        CURRENT.count(f"{name}_errors", **labels)
+        raise
+    finally:
+        CURRENT.observe(name, time.perf_counter() - started, **labels)
+
+
+def write_atomic(path, text):
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(text)
+    os.replace(tmp, path)
+
+
+def write(run_metrics):
+    """Write <job>.json and <job>.prom under METRICS_DIR (skipped runs are not written)"""
+    if not METRICS_ENABLED or run_metrics.skipped:
+        return
+
+    try:
+        METRICS_DIR.mkdir(parents=True, exist_ok=True)
+        write_atomic(METRICS_DIR / f"{run_metrics.job}.json", json.dumps(run_metrics.summary(), indent=2))
+        write_atomic(METRICS_DIR / f"{run_metrics.job}.prom", run_metrics.prometheus())
+    except OSError as e:
+        print(f"⚠️  Could not write metrics for {run_metrics.job}: {e}")
+
+
+def write_profile(job, profiler, snapshot):
+    """Dump <job>.prof plus a readable report of top functions and allocations"""
+    out = io.StringIO()
+    out.write(f"=== cProfile: top {PROFILE_TOP} by cumulative time ===\n")
+    pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_TOP)
+
+    out.write(f"\n=== tracemalloc: top {PROFILE_TOP} allocation sites ===\n")
+    for stat in snapshot.statistics("lineno")[:PROFILE_TOP]:
+        out.write(f"{stat}\n")
+
+    try:
+        METRICS_DIR.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(str(METRICS_DIR / f"{job}.prof"))
+        write_atomic(METRICS_DIR / f"{job}.profile.txt", out.getvalue())
+    except OSError as e:
+        print(f"⚠️  Could not write profile for {job}: {e}")
+
+
+@contextmanager
+def run(job):
+    """
+    Record everything inside the block as one run of `job` and write it
+    out at the end, even if the block raises.
+    """
+    global CURRENT
+    previous = CURRENT
+    CURRENT = Run(job)
+
+    profiler = None
+    if METRICS_PROFILE:
+        profiler = cProfile.Profile()
+        tracemalloc.start()
+        profiler.enable()
+
+    try:
+        yield CURRENT
+    except BaseException as e:
+        CURRENT.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        CURRENT.finished = time.time()
+        if profiler is not None:
+            profiler.disable()
+            snapshot = tracemalloc.take_snapshot()
+            tracemalloc.stop()
+            if not CURRENT.skipped:
+                write_profile(job, profiler, snapshot)
+        write(CURRENT)
+        CURRENT = previous
+
+
+class Periodic:
+    """
+    Metrics for a long-running process (the bot): one Run that is written
+    at most every `interval` seconds, whenever flush() is called.
+    """
+
+    def __init__(self, job, interval=60):
+        self.run = Run(job)
+        self.interval = interval
+        self.written = 0.0
+        self.lock = threading.Lock()
+
+    def flush(self, force=False):
+        with self.lock:
+            if not force and time.time() - self.written < self.interval:
+                return
+            self.written = time.time()
+        write(self.run)
@@ -6,6 +6,16 @@ Runs every 10 minutes via systemd timer, but only executes during WIB trading sl
 
 import os
 import sys
+from slots import TRADING_SLOTS, get_current_slot
+
+# Fast path: most timer runs land outside a slot, so decide that before
+# paying for requests/feedparser/pytz/dotenv and the local modules
+if __name__ == "__main__" and os.getenv("FORCE_RUN") != "1" and not get_current_slot()[0]:
+    import slots
+    slots.log("=== Indonesian Bad News Scanner ===")
+    slots.log("⏸️  Outside trading slots, exiting")
+    sys.exit(0)
+
 import json
 import requests
 import feedparser
@@ -13,30 +23,53 @@ from datetime import datetime, timedelta
 from pathlib import Path
 from dotenv import load_dotenv
 import pytz
+import storage
+import seen_store
+import article_dedup
+import fanout
+import telegram_sender
+import metrics
+import verdict_model
 import hashlib
+import random
+import re
 import time
+import calendar
+import functools
+import threading
+from email.utils import parsedate_to_datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed, TimeoutError
 
 # Load environment
 load_dotenv()
 
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 MARKETAUX_API_KEY = os.getenv("MARKETAUX_API_KEY")
 OLLAMA_API_URL = os.getenv("OLLAMA_API_URL", "http://localhost:11434/api/generate")
 OLLAMA_MODEL = os.getenv("OLLAMA_MODEL", "qwen2.5:7b")
+OLLAMA_BATCH_SIZE = int(os.getenv("OLLAMA_BATCH_SIZE", "5"))
+OLLAMA_CONCURRENCY = int(os.getenv("OLLAMA_CONCURRENCY", "2"))
+OLLAMA_TIMEOUT = int(os.getenv("OLLAMA_TIMEOUT", "60"))
 MAX_NEWS_AGE_DAYS = int(os.getenv("MAX_NEWS_AGE_DAYS", "3"))
-
-STATE_FILE = Path("/opt/indo_badnews/state.json")
-WATCHLIST_FILE = Path("/opt/indo_badnews/watchlist.json")
+NEWS_FETCH_WORKERS = int(os.getenv("NEWS_FETCH_WORKERS", "8"))
+FEED_TIMEOUT = int(os.getenv("FEED_TIMEOUT", "10"))
+COLLECT_TIMEOUT = int(os.getenv("COLLECT_TIMEOUT", "30"))
+NEWS_STREAM = os.getenv("NEWS_STREAM") == "1"
+POLL_MIN_INTERVAL = int(os.getenv("POLL_MIN_INTERVAL", "30"))
+POLL_MAX_INTERVAL = int(os.getenv("POLL_MAX_INTERVAL", "300"))
+# A running slot scan keeps other runners out while its heartbeat is this fresh
+SLOT_LEASE = int(os.getenv("SLOT_LEASE", "900"))
+MAX_SEND = 5
+
+FEED_CACHE_FILE = Path("/opt/indo_badnews/feed_cache.json")
+FEED_CACHE_MAX_AGE = 7 * 86400
+VERDICT_CACHE_FILE = Path("/opt/indo_badnews/verdicts.jsonl")
+VERDICT_CACHE_MAX = int(os.getenv("VERDICT_CACHE_MAX", "20000"))
+VERDICT_MODEL = os.getenv("VERDICT_MODEL", "1") == "1"
+VERDICT_MODEL_AUDIT = float(os.getenv("VERDICT_MODEL_AUDIT", "0.05"))
 
 WIB = pytz.timezone("Asia/Jakarta")
 
-TRADING_SLOTS = [
-    {"start": (8, 45), "end": (9, 30), "name": "Pre-Market"},
-    {"start": (12, 0), "end": (13, 30), "name": "Midday"},
-    {"start": (15, 15), "end": (16, 0), "name": "Post-Market"}
-]
-
 NEGATIVE_KEYWORDS = [
     "kerugian", "merugi", "turun", "anjlok", "korupsi", "skandal",
     "penipuan", "bangkrut", "gagal", "ditangkap", "tersangka", "tuntutan",
@@ -44,6 +77,37 @@ NEGATIVE_KEYWORDS = [
     "bankruptcy", "scandal", "arrest", "corruption", "loss", "plunge", "drop"
 ]
 
+# Inflections still counted as a keyword hit ("drops", "merugikan",
+# "didenda", "kebangkrutan"), while unrelated words that merely contain
+# one ("dropship") are not
+KEYWORD_PREFIXES = ["di", "ke", "se", "ter", "ber", "per", "me", "mem", "men", "meng", "meny", "pe", "pem", "pen", "peng", "peny"]
+KEYWORD_SUFFIXES = "(?:s|es|d|ed|ped|ping|ing|kan|an|nya)?"
+# Derived words that are neutral even though a prefix/suffix turns a
+# keyword into them: keturunan (descendants), turunan (derivative)
+KEYWORD_EXCLUSIONS = ["keturunan", "turunan"]
+# meN-/peN- replace these initials with a nasal: turun -> menurun, penurunan
+NASAL_INITIALS = {"t": "n", "p": "m", "k": "ng", "s": "ny"}
+
+# "Fri, 28 Jun 2024 10:15:00 GMT" (weekday optional); anything looser goes to dateutil
+RFC822_RE = re.compile(r"(?:[A-Za-z]{3}, )?\d{1,2} [A-Za-z]{3} \d{4} \d{1,2}:\d{2}")
+
+
+HTTP_SESSION = requests.Session()
+HTTP_SESSION.mount("https://", requests.adapters.HTTPAdapter(pool_maxsize=NEWS_FETCH_WORKERS))
+
+OLLAMA_SESSION = requests.Session()
+OLLAMA_SESSION.mount("http://", requests.adapters.HTTPAdapter(pool_maxsize=OLLAMA_CONCURRENCY))
+
+# ETag / Last-Modified validators per feed URL, shared by fetch threads
+FEED_CACHE = {}
+FEED_CACHE_LOCK = threading.Lock()
+FEED_RUN_STATS = {}
+# Validators fetched on this thread, committed only once the articles are used
+FEED_LOCAL = threading.local()
+
+# AI verdicts by verdict_key(), loaded once per process
+VERDICT_CACHE = None
+
 
 def log(msg):
     """Print with WIB timestamp"""
@@ -51,67 +115,74 @@ def log(msg):
     print(f"[{now_wib}] {msg}")
 
 
-def get_current_slot():
-    """Check if current time is within a trading slot"""
-    now_wib = datetime.now(WIB)
-    current_time = (now_wib.hour, now_wib.minute)
+def load_feed_cache():
+    """Load per-feed HTTP validators into FEED_CACHE"""
+    if FEED_CACHE_FILE.exists():
+        with open(FEED_CACHE_FILE, "r") as f:
+            FEED_CACHE.update(json.load(f))
+
+
+def save_feed_cache():
+    """Save per-feed HTTP validators, dropping feeds not checked for a week"""
+    cutoff = time.time() - FEED_CACHE_MAX_AGE
+    with FEED_CACHE_LOCK:
+        cache = {url: entry for url, entry in FEED_CACHE.items() if entry.get("checked_at", 0) >= cutoff}
+
+    with open(FEED_CACHE_FILE, "w") as f:
+        json.dump(cache, f, indent=2)
 
-    for idx, slot in enumerate(TRADING_SLOTS):
-        start_h, start_m = slot["start"]
-        end_h, end_m = slot["end"]
 
-        if (start_h, start_m) <= current_time <= (end_h, end_m):
-            slot_id = f"{now_wib.strftime('%Y-%m-%d')}_slot_{idx}"
-            return slot_id, slot["name"]
+def record_feed_result(url, source_name, hit, response=None):
+    """
+    Update hit/miss counters for a feed. New validators are held for the
+    fetching source (see fetch_sources) rather than cached straight away,
+    so a feed whose articles are dropped is fetched in full next time.
+    """
+    with FEED_CACHE_LOCK:
+        entry = FEED_CACHE.setdefault(url, {"hits": 0, "misses": 0})
+        entry["checked_at"] = time.time()
+        entry["hits" if hit else "misses"] += 1
+        FEED_RUN_STATS[source_name] = "hit" if hit else "miss"
 
-    return None, None
+    if response is not None:
+        validators = {
+            "etag": response.headers.get("ETag"),
+            "last_modified": response.headers.get("Last-Modified")
+        }
+        pending = getattr(FEED_LOCAL, "validators", None)
+        if pending is not None:
+            pending[url] = validators
+        else:
+            commit_feed_validators({url: validators})
+
+    metrics.count("feed_requests", result="hit" if hit else "miss")
 
 
-def load_state():
-    """Load seen articles and last slot"""
-    if STATE_FILE.exists():
-        with open(STATE_FILE, "r") as f:
-            return json.load(f)
-    return {"seen": [], "last_slot": None}
+def commit_feed_validators(validators):
+    """Cache validators ({url: {etag, last_modified}}) of feeds whose articles were processed"""
+    with FEED_CACHE_LOCK:
+        for url, values in validators.items():
+            FEED_CACHE.setdefault(url, {"hits": 0, "misses": 0}).update(values)
 
 
-def save_state(state):
-    """Save state to disk"""
-    with open(STATE_FILE, "w") as f:
-        json.dump(state, f, indent=2)
+def log_feed_cache_stats():
+    """Log this run's feed cache hits and misses"""
+    hits = sorted(name for name, result in FEED_RUN_STATS.items() if result == "hit")
+    misses = sorted(name for name, result in FEED_RUN_STATS.items() if result == "miss")
 
+    log(f"📡 Feed cache: {len(hits)} hit(s), {len(misses)} miss(es)")
+    if hits:
+        log(f"   Not modified: {', '.join(hits)}")
 
-def load_watchlist():
+
+def load_watchlist(conn):
     """Load all tickers from all chats"""
-    if WATCHLIST_FILE.exists():
-        with open(WATCHLIST_FILE, "r") as f:
-            data = json.load(f)
-            tickers = set()
-            for chat_id, chat_tickers in data.items():
-                tickers.update(chat_tickers)
-            return list(tickers)
-    return []
-
-
-def send_telegram(text):
-    """Send message to Telegram"""
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-        log("⚠️  Telegram not configured, skipping send")
-        return
+    return storage.all_tickers(conn)
 
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": text,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": True
-    }
 
-    try:
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-    except Exception as e:
-        log(f"❌ Telegram send failed: {e}")
+def send_telegram(text, chat_id=None):
+    """Send message to Telegram (TELEGRAM_CHAT_ID unless chat_id is given)"""
+    return telegram_sender.get_sender().send(chat_id or TELEGRAM_CHAT_ID, text)
 
 
 def fetch_marketaux_news():
@@ -130,7 +201,8 @@ def fetch_marketaux_news():
     }
 
     try:
-        response = requests.get(url, params=params, timeout=15)
+        with metrics.timer("external_call", service="marketaux"):
+            response = HTTP_SESSION.get(url, params=params, timeout=15)
         response.raise_for_status()
         data = response.json()
 
@@ -142,6 +214,7 @@ def fetch_marketaux_news():
                 "description": item.get("description", ""),
                 "url": item.get("url", ""),
                 "published": item.get("published_at", ""),
+                "published_at": parse_published(item.get("published_at", "")),
                 "source": "Marketaux"
             })
 
@@ -153,26 +226,60 @@ def fetch_marketaux_news():
         return []
 
 
+def parse_rss_feed(content, source_name):
+    """Parse raw RSS/Atom bytes into articles"""
+    feed = feedparser.parse(content)
+    articles = []
+
+    for entry in feed.entries[:50]:
+        article_id = entry.get("id") or entry.get("link") or entry.get("title", "")
+        article_id = hashlib.md5(article_id.encode()).hexdigest()
+
+        published = entry.get("published", entry.get("updated", ""))
+        # feedparser has already parsed the date into a UTC struct_time
+        parsed = entry.get("published_parsed") or entry.get("updated_parsed")
+
+        articles.append({
+            "id": article_id,
+            "title": entry.get("title", ""),
+            "description": entry.get("summary", entry.get("description", "")),
+            "url": entry.get("link", ""),
+            "published": published,
+            "published_at": calendar.timegm(parsed) if parsed else parse_published(published),
+            "source": source_name
+        })
+
+    return articles
+
+
 def fetch_rss_feed(url, source_name):
-    """Fetch articles from RSS feed"""
-    try:
-        feed = feedparser.parse(url)
-        articles = []
+    """
+    Fetch articles from RSS feed.
+    Sends a conditional request; a 304 means nothing changed since the
+    last run, so parsing is skipped and no articles are returned.
+    """
+    with FEED_CACHE_LOCK:
+        cached = dict(FEED_CACHE.get(url, {}))
+
+    headers = {"User-Agent": feedparser.USER_AGENT}
+    if cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+    if cached.get("last_modified"):
+        headers["If-Modified-Since"] = cached["last_modified"]
 
-        for entry in feed.entries[:50]:
-            article_id = entry.get("id") or entry.get("link") or entry.get("title", "")
-            article_id = hashlib.md5(article_id.encode()).hexdigest()
+    try:
+        with metrics.timer("external_call", service="rss"):
+            response = HTTP_SESSION.get(url, headers=headers, timeout=FEED_TIMEOUT)
 
-            published = entry.get("published", entry.get("updated", ""))
+        if response.status_code == 304:
+            record_feed_result(url, source_name, hit=True)
+            log(f"✓ {source_name}: not modified (cache hit)")
+            return []
 
-            articles.append({
-                "id": article_id,
-                "title": entry.get("title", ""),
-                "description": entry.get("summary", entry.get("description", "")),
-                "url": entry.get("link", ""),
-                "published": published,
-                "source": source_name
-            })
+        response.raise_for_status()
+        record_feed_result(url, source_name, hit=False, response=response)
+        with metrics.stage("parse"):
+            articles = parse_rss_feed(response.content, source_name)
 
         log(f"✓ Fetched {len(articles)} articles from {source_name}")
         return articles
@@ -182,183 +289,729 @@ def fetch_rss_feed(url, source_name):
         return []
 
 
-def fetch_google_news_rss(query):
-    """Fetch Google News RSS for a specific query"""
+def fetch_google_news_rss(query, ticker=None):
+    """Fetch Google News RSS for a specific query, attributing results to ticker"""
     url = f"https://news.google.com/rss/search?q={query}&hl=id&gl=ID&ceid=ID:id"
-    return fetch_rss_feed(url, f"Google News ({query})")
+    articles = fetch_rss_feed(url, f"Google News ({query})")
 
+    if ticker:
+        for article in articles:
+            article["query_ticker"] = ticker
+
+    return articles
 
-def is_article_recent(published_str):
-    """Check if article is within MAX_NEWS_AGE_DAYS"""
-    if not published_str:
-        return True
 
+def news_sources(watchlist_tickers):
+    """Every news source as (fetch function, args), general feeds first"""
+    sources = [
+        (fetch_marketaux_news, ()),
+        (fetch_rss_feed, (
+            "https://news.google.com/rss/search?q=saham+indonesia&hl=id&gl=ID&ceid=ID:id",
+            "Google News"
+        )),
+        (fetch_rss_feed, ("https://www.cnbcindonesia.com/market/rss", "CNBC Indonesia"))
+    ]
+
+    for ticker in watchlist_tickers:
+        ticker_clean = ticker.replace(".JK", "")
+        sources.append((fetch_google_news_rss, (f"{ticker_clean} saham", ticker)))
+
+    return sources
+
+
+def fetch_source(func, args):
+    """Run one source, returning its articles and the feed validators it saw"""
+    FEED_LOCAL.validators = {}
     try:
-        from dateutil import parser
-        published_dt = parser.parse(published_str)
-        cutoff = datetime.now(pytz.UTC) - timedelta(days=MAX_NEWS_AGE_DAYS)
-        return published_dt > cutoff
-    except:
+        return func(*args), FEED_LOCAL.validators
+    finally:
+        FEED_LOCAL.validators = None
+
+
+def fetch_sources(sources):
+    """
+    Fetch the given sources concurrently.
+    Sources still running at COLLECT_TIMEOUT are dropped along with their
+    validators, so whatever they write afterwards never reaches the cache.
+    Returns: (list of article lists aligned with sources, validators of
+    the sources that finished, to pass to commit_feed_validators)
+    """
+    results = [[] for _ in sources]
+    validators = {}
+    pool = ThreadPoolExecutor(max_workers=NEWS_FETCH_WORKERS)
+    futures = {pool.submit(fetch_source, func, args): idx for idx, (func, args) in enumerate(sources)}
+
+    try:
+        for future in as_completed(futures, timeout=COLLECT_TIMEOUT):
+            results[futures[future]], source_validators = future.result()
+            validators.update(source_validators)
+    except TimeoutError:
+        pending = sum(1 for future in futures if not future.done())
+        log(f"⚠️  {pending} source(s) still running after {COLLECT_TIMEOUT}s, skipping them")
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    return results, validators
+
+
+@functools.lru_cache(maxsize=8192)
+def parse_published(raw):
+    """
+    Epoch seconds for a raw published string, or None if it can't be parsed.
+    ISO 8601 (Marketaux, Atom) and RFC 822 (RSS) use fast stdlib parsers;
+    anything else falls back to dateutil. Naive times are taken as WIB.
+    """
+    raw = (raw or "").strip()
+    if not raw:
+        return None
+
+    dt = None
+    try:
+        if raw[:4].isdigit():
+            dt = datetime.fromisoformat(raw.replace("Z", "+00:00"))
+        elif RFC822_RE.match(raw):
+            dt = parsedate_to_datetime(raw)
+    except (ValueError, TypeError, IndexError):
+        pass
+
+    if dt is None:
+        try:
+            from dateutil import parser
+            dt = parser.parse(raw)
+        except (ValueError, OverflowError):
+            return None
+
+    if dt.tzinfo is None:
+        dt = WIB.localize(dt)
+    return dt.timestamp()
+
+
+def is_article_recent(published_at, now=None):
+    """Check if an article's publish epoch is within MAX_NEWS_AGE_DAYS (unknown counts as recent)"""
+    if published_at is None:
         return True
 
+    now = now or time.time()
+    return published_at > now - MAX_NEWS_AGE_DAYS * 86400
+
+
+def trie_pattern(words):
+    """
+    Build a regex alternation shaped like a prefix trie.
+    Shared prefixes are matched once, so cost per text position depends on
+    word length rather than on how many words there are.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[""] = {}
+
+    def build(node):
+        ends = "" in node
+        branches = [re.escape(char) + build(child) for char, child in sorted(node.items()) if char]
+
+        if not branches:
+            return ""
+        if len(branches) == 1 and not ends:
+            return branches[0]
+
+        pattern = "(?:" + "|".join(branches) + ")"
+        return pattern + "?" if ends else pattern
+
+    return build(trie)
+
+
+def keyword_forms(keyword):
+    """The keyword plus its nasalised meN-/peN- forms (turun -> menurun, penurun)"""
+    forms = [keyword]
+    nasal = NASAL_INITIALS.get(keyword[0])
+    if nasal:
+        forms += [f"me{nasal}{keyword[1:]}", f"pe{nasal}{keyword[1:]}"]
+    return forms
+
+
+def compile_matcher(keywords, tickers=()):
+    """
+    Compile negative keywords and ticker symbols into one word-boundary regex.
+    Keywords are case-insensitive and may carry a common Indonesian prefix
+    and an English/Indonesian suffix ("drops", "didenda", "kebangkrutan",
+    "penurunan"), except the neutral KEYWORD_EXCLUSIONS; tickers are matched
+    as upper-case codes.
+    """
+    forms = [form for k in keywords for form in keyword_forms(k.lower())]
+    keyword_part = (
+        "(?i:(?!" + trie_pattern(KEYWORD_EXCLUSIONS) + r"\b)"
+        "(?:" + trie_pattern(KEYWORD_PREFIXES) + ")?" + trie_pattern(forms) + KEYWORD_SUFFIXES + ")"
+    )
+    codes = [t.replace(".JK", "") for t in tickers]
+
+    if codes:
+        pattern = rf"\b(?:(?P<keyword>{keyword_part})|(?P<ticker>{trie_pattern(codes)}))\b"
+    else:
+        pattern = rf"\b(?P<keyword>{keyword_part})\b"
+
+    return re.compile(pattern)
+
+
+def find_matches(text, matcher=None):
+    """
+    Scan text once for keywords and tickers.
+    Returns: list of {"kind", "term", "start", "end"} in text order
+    """
+    matcher = matcher or NEGATIVE_MATCHER
+    matches = []
+
+    for m in matcher.finditer(text or ""):
+        kind = m.lastgroup
+        matches.append({
+            "kind": kind,
+            "term": m.group(kind).lower() if kind == "keyword" else m.group(kind) + ".JK",
+            "start": m.start(),
+            "end": m.end()
+        })
+
+    return matches
+
+
+def tag_article(article, matcher):
+    """Attach matched keywords and tickers (plus the ticker it was searched for) to an article"""
+    matches = find_matches(f"{article['title']} {article['description']}", matcher)
+    tickers = {m["term"] for m in matches if m["kind"] == "ticker"}
+    if article.get("query_ticker"):
+        tickers.add(article["query_ticker"])
+
+    article["keywords"] = sorted({m["term"] for m in matches if m["kind"] == "keyword"})
+    article["tickers"] = sorted(tickers)
+    return article
+
+
+NEGATIVE_MATCHER = compile_matcher(NEGATIVE_KEYWORDS)
+
 
 def has_negative_keywords(text):
     """Check if text contains negative keywords"""
-    text_lower = text.lower()
-    for keyword in NEGATIVE_KEYWORDS:
-        if keyword in text_lower:
-            return True
-    return False
+    return NEGATIVE_MATCHER.search(text or "") is not None
 
 
-def classify_with_ai(title, description):
-    """Use local Ollama AI to classify article as BAD or OK"""
-    prompt = f"""Classify this Indonesian stock news article as BAD or OK.
-BAD = negative impact on stock (fraud, loss, bankruptcy, corruption, lawsuit, collapse, scandal, arrest)
-OK = neutral or positive
+def normalize_text(text):
+    """Lowercase, strip HTML and punctuation, collapse whitespace"""
+    text = re.sub(r"<[^>]+>", " ", text or "")
+    text = re.sub(r"[^\w\s]", " ", text.lower())
+    return " ".join(text.split())
 
-Article: {title}
-{description}
 
-Respond with ONLY "BAD" or "OK":"""
+def verdict_key(article):
+    """Cache key shared by syndicated copies of the same story"""
+    text = normalize_text(article["title"]) + "\n" + normalize_text(article["description"])
+    return hashlib.sha1(text.encode()).hexdigest()
+
 
+def load_verdict_cache():
+    """Load AI verdicts keyed by verdict_key(), compacting the log if it grew too large"""
+    if not VERDICT_CACHE_FILE.exists():
+        return {}
+
+    records = []
+    with open(VERDICT_CACHE_FILE, "r") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except ValueError:
+                continue
+
+    cache = {record["key"]: record["verdict"] for record in records}
+
+    if len(records) > 2 * VERDICT_CACHE_MAX:
+        latest = {record["key"]: record for record in records}
+        kept = list(latest.values())[-VERDICT_CACHE_MAX:]
+        tmp_file = VERDICT_CACHE_FILE.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            for record in kept:
+                f.write(json.dumps(record) + "\n")
+        tmp_file.replace(VERDICT_CACHE_FILE)
+        cache = {record["key"]: record["verdict"] for record in kept}
+
+    return cache
+
+
+def get_verdict_cache():
+    """Verdict cache, read from disk on first use and kept current by append_verdicts()"""
+    global VERDICT_CACHE
+    if VERDICT_CACHE is None:
+        VERDICT_CACHE = load_verdict_cache()
+    return VERDICT_CACHE
+
+
+def append_verdicts(records):
+    """Append new AI verdicts to the cache log"""
+    global VERDICT_CACHE
+    if not records:
+        return
+
+    with open(VERDICT_CACHE_FILE, "a") as f:
+        for record in records:
+            f.write(json.dumps(record) + "\n")
+
+    if VERDICT_CACHE is not None:
+        VERDICT_CACHE.update((record["key"], record["verdict"]) for record in records)
+        # Reload (and compact) on next use once a long-lived process has grown it
+        if len(VERDICT_CACHE) > 2 * VERDICT_CACHE_MAX:
+            VERDICT_CACHE = None
+
+
+def query_ollama(prompt, num_predict):
+    """Send a prompt to Ollama, returning the upper-cased answer or None on failure"""
     payload = {
         "model": OLLAMA_MODEL,
         "prompt": prompt,
         "stream": False,
         "options": {
             "temperature": 0.1,
-            "num_predict": 10
+            "num_predict": num_predict
         }
     }
 
     try:
-        response = requests.post(OLLAMA_API_URL, json=payload, timeout=30)
+        with metrics.timer("external_call", service="ollama"):
+            response = OLLAMA_SESSION.post(OLLAMA_API_URL, json=payload, timeout=OLLAMA_TIMEOUT)
         response.raise_for_status()
         result = response.json()
-        answer = result.get("response", "").strip().upper()
-
-        if "BAD" in answer:
-            return "BAD"
-        elif "OK" in answer:
-            return "OK"
-        else:
-            log(f"⚠️  AI returned unclear response: {answer}")
-            return "OK"
+        return result.get("response", "").strip().upper()
 
     except Exception as e:
         log(f"❌ AI classification failed: {e}")
-        return "OK"
+        return None
 
 
-def classify_article(article):
-    """Classify article as BAD or OK"""
-    text = f"{article['title']} {article['description']}"
+def ai_verdict(title, description):
+    """Ask Ollama about one article. Returns BAD, OK, or None if unanswered"""
+    prompt = f"""Classify this Indonesian stock news article as BAD or OK.
+BAD = negative impact on stock (fraud, loss, bankruptcy, corruption, lawsuit, collapse, scandal, arrest)
+OK = neutral or positive
 
-    if has_negative_keywords(text):
+Article: {title}
+{description}
+
+Respond with ONLY "BAD" or "OK":"""
+
+    answer = query_ollama(prompt, 10)
+    if answer is None:
+        return None
+
+    if "BAD" in answer:
         return "BAD"
+    elif "OK" in answer:
+        return "OK"
+    else:
+        log(f"⚠️  AI returned unclear response: {answer}")
+        return None
 
-    return classify_with_ai(article['title'], article['description'])
 
+def classify_with_ai(title, description):
+    """Use local Ollama AI to classify article as BAD or OK"""
+    return ai_verdict(title, description) or "OK"
+
+
+def classify_batch_with_ai(articles):
+    """
+    Classify several articles in one Ollama prompt.
+    Returns: list of BAD/OK/None aligned with articles; articles an
+    answer left out are retried one by one, but if Ollama failed outright
+    the whole batch is None rather than waiting out a timeout per article.
+    """
+    if len(articles) == 1:
+        return [ai_verdict(articles[0]["title"], articles[0]["description"])]
+
+    listing = "\n\n".join(
+        f"{idx}. {article['title']}\n{article['description'][:500]}"
+        for idx, article in enumerate(articles, 1)
+    )
+    prompt = f"""Classify each Indonesian stock news article below as BAD or OK.
+BAD = negative impact on stock (fraud, loss, bankruptcy, corruption, lawsuit, collapse, scandal, arrest)
+OK = neutral or positive
 
-def main():
-    log("=== Indonesian Bad News Scanner ===")
+{listing}
 
-    force_run = os.getenv("FORCE_RUN") == "1"
+Respond with one line per article, formatted as "<number>: BAD" or "<number>: OK", and nothing else:"""
 
-    if not force_run:
-        slot_id, slot_name = get_current_slot()
+    answer = query_ollama(prompt, 8 * len(articles))
+    verdicts = [None] * len(articles)
+    if answer is None:
+        return verdicts
 
-        if not slot_id:
-            log("⏸️  Outside trading slots, exiting")
-            sys.exit(0)
+    for number, verdict in re.findall(r"(\d+)\s*[:.)-]\s*(BAD|OK)", answer):
+        idx = int(number) - 1
+        if 0 <= idx < len(articles):
+            verdicts[idx] = verdict
 
-        state = load_state()
+    for idx, verdict in enumerate(verdicts):
+        if verdict is None:
+            verdicts[idx] = ai_verdict(articles[idx]["title"], articles[idx]["description"])
 
-        if state.get("last_slot") == slot_id:
-            log(f"✓ Already ran for {slot_name} slot today, exiting")
-            sys.exit(0)
+    return verdicts
 
-        log(f"✓ Running for {slot_name} slot (ID: {slot_id})")
-    else:
-        log("⚡ FORCE_RUN mode enabled")
-        slot_id = f"force_{int(time.time())}"
-        slot_name = "Manual"
-        state = load_state()
 
-    watchlist_tickers = load_watchlist()
-    log(f"✓ Watchlist: {len(watchlist_tickers)} tickers")
+def classify_article(article):
+    """Classify article as BAD or OK"""
+    text = f"{article['title']} {article['description']}"
 
-    all_articles = []
+    if has_negative_keywords(text):
+        return "BAD"
 
-    all_articles.extend(fetch_marketaux_news())
-    all_articles.extend(fetch_rss_feed(
-        "https://news.google.com/rss/search?q=saham+indonesia&hl=id&gl=ID&ceid=ID:id",
-        "Google News"
-    ))
-    all_articles.extend(fetch_rss_feed(
-        "https://www.cnbcindonesia.com/market/rss",
-        "CNBC Indonesia"
-    ))
+    return classify_with_ai(article['title'], article['description'])
 
-    for ticker in watchlist_tickers[:10]:
-        ticker_clean = ticker.replace(".JK", "")
-        all_articles.extend(fetch_google_news_rss(f"{ticker_clean} saham"))
 
+def classify_articles(articles, heartbeat=None):
+    """
+    Classify many articles as BAD or OK.
+    Keyword hits are BAD outright; the rest are looked up in the verdict
+    cache, then scored by the local verdict model, and only stories it is
+    unsure about go to Ollama, batched and concurrent. Model verdicts are
+    not written back to the log, so it never trains on its own output;
+    instead a random VERDICT_MODEL_AUDIT share of confident articles goes
+    to Ollama too and is logged with weight 1 / share (see verdict_model).
+    heartbeat, if given, is called after each Ollama batch.
+    Returns: list of BAD/OK aligned with articles
+    """
+    verdicts = [None] * len(articles)
+    cache = get_verdict_cache()
+    model = verdict_model.get_model() if VERDICT_MODEL else None
+    pending = {}
+    audited = set()
+    keyword_hits = 0
+    cache_hits = 0
+    model_hits = 0
+
+    for idx, article in enumerate(articles):
+        if "keywords" in article:
+            keyword_hit = bool(article["keywords"])
+        else:
+            keyword_hit = has_negative_keywords(f"{article['title']} {article['description']}")
+
+        if keyword_hit:
+            verdicts[idx] = "BAD"
+            keyword_hits += 1
+            continue
+
+        key = verdict_key(article)
+        if key in cache:
+            verdicts[idx] = cache[key]
+            cache_hits += 1
+            continue
+
+        verdict = model.decide(article["title"], article["description"]) if model else None
+        if verdict and random.random() >= VERDICT_MODEL_AUDIT:
+            verdicts[idx] = verdict
+            model_hits += 1
+        else:
+            pending.setdefault(key, []).append(idx)
+            if verdict:
+                audited.add(key)
+
+    keys = list(pending)
+    batches = [keys[i:i + OLLAMA_BATCH_SIZE] for i in range(0, len(keys), OLLAMA_BATCH_SIZE)]
+    metrics.count("classified", keyword_hits, path="keyword")
+    metrics.count("classified", cache_hits, path="cache")
+    metrics.count("classified", model_hits, path="model")
+    metrics.count("classified", len(keys), path="ai")
+    metrics.count("verdict_model_audits", len(audited))
+    log(
+        f"🧠 Classifying: {keyword_hits} keyword hit(s), {cache_hits} cached, {model_hits} by model, "
+        f"{len(keys)} for AI in {len(batches)} batch(es)"
+    )
+
+    if batches:
+        with ThreadPoolExecutor(max_workers=OLLAMA_CONCURRENCY) as pool:
+            results = pool.map(
+                classify_batch_with_ai,
+                [[articles[pending[key][0]] for key in batch] for batch in batches]
+            )
+
+            new_records = []
+            for batch, batch_verdicts in zip(batches, results):
+                if heartbeat:
+                    heartbeat()
+                for key, verdict in zip(batch, batch_verdicts):
+                    if verdict is not None:
+                        article = articles[pending[key][0]]
+                        record = {
+                            "key": key,
+                            "verdict": verdict,
+                            "title": article["title"],
+                            "description": article["description"],
+                            "at": int(time.time())
+                        }
+                        if key in audited:
+                            record["weight"] = round(1 / VERDICT_MODEL_AUDIT, 3)
+                        new_records.append(record)
+
+                    for idx in pending[key]:
+                        verdicts[idx] = verdict or "OK"
+
+        append_verdicts(new_records)
+
+    return verdicts
+
+
+def format_article(article):
+    """Render one bad news article for an alert (numbered by build_alert)"""
+    msg = f"<b>{article['title']}</b>\n"
+    if article['description']:
+        desc = article['description'][:200]
+        msg += f"{desc}...\n"
+    msg += f"🔗 {article['url']}\n"
+    msg += f"📰 {article['source']}\n"
+    return msg
+
+
+def build_alert(slot_name, now_wib, fragments, total):
+    """Assemble a bad news alert from rendered articles"""
+    header = f"🚨 <b>Bad News Alert - {slot_name}</b>\n⏰ {now_wib}\n\n"
+    full_message = header + "\n".join(f"{idx}. {fragment}" for idx, fragment in enumerate(fragments, 1))
+
+    if total > len(fragments):
+        full_message += f"\n\n... and {total - len(fragments)} more bad news articles"
+
+    return full_message
+
+
+def slot_end_time(slot_id):
+    """Epoch just after the last minute of the slot identified by slot_id"""
+    date_str, idx = slot_id.rsplit("_slot_", 1)
+    end_h, end_m = TRADING_SLOTS[int(idx)]["end"]
+    day = WIB.localize(datetime.strptime(date_str, "%Y-%m-%d"))
+    return (day.replace(hour=end_h, minute=end_m) + timedelta(minutes=1)).timestamp()
+
+
+def send_alerts(conn, bad_articles, slot_name):
+    """Send bad news to TELEGRAM_CHAT_ID and to each chat watching a mentioned ticker"""
+    now_wib = datetime.now(WIB).strftime("%H:%M WIB")
+    articles_to_send = bad_articles[:MAX_SEND]
+
+    send_telegram(build_alert(
+        slot_name, now_wib, [format_article(article) for article in articles_to_send], len(bad_articles)
+    ))
+    log(f"✓ Sent {len(articles_to_send)} bad news alerts")
+
+    index = fanout.build_ticker_index(storage.load_watchlists(conn))
+    per_chat = fanout.fan_out(bad_articles, index, format_article, MAX_SEND, skip_chats={TELEGRAM_CHAT_ID})
+
+    if per_chat:
+        sent = telegram_sender.get_sender().send_many(
+            (chat_id, build_alert(slot_name, now_wib, fragments, total))
+            for chat_id, (fragments, total) in per_chat.items()
+        )
+        log(f"✓ Sent bad news to {sent}/{len(per_chat)} watchlist chat(s)")
+
+
+def scan_once(conn, sources, watchlist_tickers, slot_name, bloom=None, slot_id=None):
+    """
+    Fetch sources, then classify and alert on articles not seen before.
+    New IDs are marked seen and feed validators cached at the end, once the
+    articles were processed. With slot_id the slot's lease is renewed
+    between stages and Ollama batches, so a slow scan keeps its slot.
+    Returns: (per-source article lists, new articles, bad articles)
+    """
+    def heartbeat():
+        if slot_id:
+            storage.touch_slot_run(conn, slot_id)
+
+    with metrics.stage("fetch"):
+        results, validators = fetch_sources(sources)
+    heartbeat()
+    all_articles = [article for articles in results for article in articles]
+    fetched_at = time.time()
+    metrics.count("sources_polled", len(sources))
+    metrics.count("articles_fetched", len(all_articles))
     log(f"✓ Total articles fetched: {len(all_articles)}")
+    log_feed_cache_stats()
 
-    seen_ids = set(state.get("seen", []))
+    # Age filter first: it is a float comparison, the seen lookup hits SQLite
+    with metrics.stage("date_filter"):
+        recent = [a for a in all_articles if is_article_recent(a.get("published_at"), fetched_at)]
+    undated = sum(1 for a in recent if a.get("published_at") is None)
+    log(f"🕒 Recent articles: {len(recent)}/{len(all_articles)} ({undated} without a parseable date)")
+
+    with metrics.stage("seen_lookup"):
+        seen_ids = seen_store.seen_ids(conn, [a["id"] for a in recent], bloom)
     new_articles = []
 
-    for article in all_articles:
-        if article["id"] not in seen_ids and is_article_recent(article["published"]):
+    for article in recent:
+        if article["id"] not in seen_ids:
             new_articles.append(article)
             seen_ids.add(article["id"])
 
+    metrics.count("articles_new", len(new_articles))
     log(f"✓ New unseen articles: {len(new_articles)}")
+    if not new_articles:
+        commit_feed_validators(validators)
+        return results, [], []
+
+    with metrics.stage("keyword_prefilter"):
+        matcher = compile_matcher(NEGATIVE_KEYWORDS, watchlist_tickers)
+        for article in new_articles:
+            tag_article(article, matcher)
+
+    with metrics.stage("dedup"):
+        stories = article_dedup.dedupe_articles(new_articles)
+    log(f"🧩 Deduplicated {len(new_articles)} articles into {len(stories)} stories")
+
+    with metrics.stage("classify"):
+        classifications = classify_articles(stories, heartbeat)
+    heartbeat()
 
     bad_articles = []
-    for article in new_articles:
-        classification = classify_article(article)
+    for article, classification in zip(stories, classifications):
         if classification == "BAD":
             bad_articles.append(article)
             log(f"🚨 BAD: {article['title'][:60]}...")
 
+    metrics.count("articles_bad", len(bad_articles))
     log(f"✓ Bad news articles: {len(bad_articles)}")
 
-    max_send = 5
-    articles_to_send = bad_articles[:max_send]
+    storage.record_signals(conn, "bad_news", [
+        {"ticker": ticker, "title": article["title"], "url": article["url"], "source": article["source"]}
+        for article in bad_articles
+        for ticker in (article.get("tickers") or [None])
+    ])
+
+    if bad_articles:
+        with metrics.stage("telegram"):
+            send_alerts(conn, bad_articles, slot_name)
+        heartbeat()
+        metrics.observe("fetch_to_alert", time.time() - fetched_at)
+        log(f"⚡ Fetch → Telegram in {time.time() - fetched_at:.1f}s")
+    else:
+        log("✓ No bad news to report")
+
+    seen_store.mark_seen(
+        conn, [a["id"] for a in new_articles], bloom,
+        published={a["id"]: a.get("published_at") for a in new_articles}
+    )
+    commit_feed_validators(validators)
+    return results, new_articles, bad_articles
+
+
+def stream_slot(conn, slot_id, slot_name, bloom=None):
+    """
+    Poll every source until the slot ends, each on its own interval.
+    A source that yields something new is polled again after
+    POLL_MIN_INTERVAL; each empty poll doubles its interval up to
+    POLL_MAX_INTERVAL.
+    Returns: (new article count, bad article count)
+    """
+    slot_end = slot_end_time(slot_id)
+    intervals = {}
+    due = {}
+    total_new = 0
+    total_bad = 0
+
+    while time.time() < slot_end:
+        watchlist_tickers = load_watchlist(conn)
+        sources = news_sources(watchlist_tickers)
+        ready = [source for source in sources if due.get(source, 0) <= time.time()]
+
+        if ready:
+            log(f"🔄 Polling {len(ready)}/{len(sources)} source(s)")
+            FEED_RUN_STATS.clear()
+            results, new_articles, bad_articles = scan_once(conn, ready, watchlist_tickers, slot_name, bloom, slot_id)
+            total_new += len(new_articles)
+            total_bad += len(bad_articles)
+
+            new_ids = {article["id"] for article in new_articles}
+            for source, articles in zip(ready, results):
+                if any(article["id"] in new_ids for article in articles):
+                    intervals[source] = POLL_MIN_INTERVAL
+                else:
+                    intervals[source] = min(intervals.get(source, POLL_MIN_INTERVAL / 2) * 2, POLL_MAX_INTERVAL)
+                due[source] = time.time() + intervals[source]
+
+            save_feed_cache()
+
+        storage.touch_slot_run(conn, slot_id)
+        next_poll = min(due.get(source, 0) for source in sources)
+        wake = min(next_poll, slot_end, time.time() + SLOT_LEASE / 2)
+        time.sleep(max(1, wake - time.time()))
+
+    return total_new, total_bad
+
+
+def run_slot(force_run=False):
+    """
+    Scan for the current trading slot unless it already ran, recording
+    the run's metrics (see metrics.py). Runs that skip the slot leave
+    the last scan's metrics in place.
+    With NEWS_STREAM=1 sources are polled until the slot ends.
+    Returns: True if a scan ran, False if there was nothing to do
+    """
+    with metrics.run("news"):
+        return scan_slot(force_run)
+
+
+def scan_slot(force_run=False):
+    """Body of run_slot()"""
+    if not force_run:
+        slot_id, slot_name = get_current_slot()
 
-    if articles_to_send:
-        now_wib = datetime.now(WIB).strftime("%H:%M WIB")
-        header = f"🚨 <b>Bad News Alert - {slot_name}</b>\n⏰ {now_wib}\n\n"
+        if not slot_id:
+            log("⏸️  Outside trading slots, exiting")
+            metrics.skip()
+            return False
 
-        messages = []
-        for idx, article in enumerate(articles_to_send, 1):
-            msg = f"{idx}. <b>{article['title']}</b>\n"
-            if article['description']:
-                desc = article['description'][:200]
-                msg += f"{desc}...\n"
-            msg += f"🔗 {article['url']}\n"
-            msg += f"📰 {article['source']}\n"
-            messages.append(msg)
+        conn = storage.connect()
+        held = storage.claim_slot_run(conn, slot_id, slot_name, SLOT_LEASE)
 
-        full_message = header + "\n".join(messages)
+        if held == "finished":
+            log(f"✓ Already ran for {slot_name} slot today, exiting")
+            conn.close()
+            metrics.skip()
+            return False
+        if held == "running":
+            log(f"✓ {slot_name} slot is being scanned by another runner, exiting")
+            conn.close()
+            metrics.skip()
+            return False
 
-        if len(bad_articles) > max_send:
-            full_message += f"\n\n... and {len(bad_articles) - max_send} more bad news articles"
+        log(f"✓ Running for {slot_name} slot (ID: {slot_id})")
+    else:
+        log("⚡ FORCE_RUN mode enabled")
+        slot_id = f"force_{int(time.time())}"
+        slot_name = "Manual"
+        conn = storage.connect()
+        storage.start_slot_run(conn, slot_id, slot_name)
+
+    load_feed_cache()
+    bloom = seen_store.load_bloom(conn) if seen_store.SEEN_BLOOM else None
 
-        send_telegram(full_message)
-        log(f"✓ Sent {len(articles_to_send)} bad news alerts")
+    if NEWS_STREAM and not force_run:
+        log(f"📡 Streaming until slot end ({POLL_MIN_INTERVAL}-{POLL_MAX_INTERVAL}s per source)")
+        new_count, bad_count = stream_slot(conn, slot_id, slot_name, bloom)
     else:
-        log("✓ No bad news to report")
+        watchlist_tickers = load_watchlist(conn)
+        log(f"✓ Watchlist: {len(watchlist_tickers)} tickers")
 
-    state["seen"] = list(seen_ids)[-1000:]
-    state["last_slot"] = slot_id
-    save_state(state)
+        FEED_RUN_STATS.clear()
+        _, new_articles, bad_articles = scan_once(
+            conn, news_sources(watchlist_tickers), watchlist_tickers, slot_name, bloom, slot_id
+        )
+        new_count, bad_count = len(new_articles), len(bad_articles)
+
+    seen_store.evict(conn)
+    storage.finish_slot_run(conn, slot_id, new_count, bad_count)
+    conn.close()
+    save_feed_cache()
 
     log("✓ State saved")
-    log("=== Scanner Complete ===")
+    return True
+
+
+def main():
+    log("=== Indonesian Bad News Scanner ===")
+
+    if run_slot(force_run=os.getenv("FORCE_RUN") == "1"):
+        log("=== Scanner Complete ===")
 
 
 if __name__ == "__main__":
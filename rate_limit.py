@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Rate Limiting
+Token bucket shared by the concurrent Yahoo fetcher and the Telegram sender.
+"""
+
+import time
+import threading
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` tokens per second, up to `burst` at once"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available"""
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+
+                if now < self.paused_until:
+                    wait = self.paused_until - now
+                elif self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                else:
+                    wait = (1 - self.tokens) / self.rate
+
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Hand out no tokens for the next `seconds` (e.g. a server's retry_after)"""
+        with self.lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+            self.tokens = 0.0
@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Resident Scheduler
+Keeps the news scanner and volume screener loaded in one long-running
+process, so HTTP sessions and caches stay warm between runs. News scans
+start exactly at each TRADING_SLOTS boundary and the screener runs
+Mon-Fri at SCREENER_TIME (WIB). A small HTTP health endpoint reports the
+last and next runs.
+
+Usage:
+    python scheduler.py
+    curl http://127.0.0.1:8787/health
+"""
+
+import os
+import json
+import time
+import threading
+import traceback
+from datetime import datetime, timedelta
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from dotenv import load_dotenv
+import pytz
+import news_watcher
+import volume_screener
+
+load_dotenv()
+
+SCREENER_TIME = tuple(int(part) for part in os.getenv("SCREENER_TIME", "16:20").split(":"))
+HEALTH_HOST = os.getenv("SCHEDULER_HEALTH_HOST", "127.0.0.1")
+HEALTH_PORT = int(os.getenv("SCHEDULER_HEALTH_PORT", "8787"))
+
+WIB = pytz.timezone("Asia/Jakarta")
+
+STARTED_AT = time.time()
+JOB_STATUS = {}
+NEXT_RUN = {}
+STATUS_LOCK = threading.Lock()
+
+
+def log(msg):
+    """Print with WIB timestamp"""
+    now_wib = datetime.now(WIB).strftime("%Y-%m-%d %H:%M:%S %Z")
+    print(f"[{now_wib}] {msg}", flush=True)
+
+
+def run_news():
+    news_watcher.log("=== Indonesian Bad News Scanner ===")
+    if news_watcher.run_slot():
+        news_watcher.log("=== Scanner Complete ===")
+
+
+JOBS = {
+    "news": run_news,
+    # Explicit args: main() would otherwise parse the scheduler's own argv
+    "screener": lambda: volume_screener.main([])
+}
+
+
+def upcoming_runs(now):
+    """Candidate (when, job) pairs for today and tomorrow, in WIB"""
+    runs = []
+
+    for day_offset in (0, 1):
+        day = now + timedelta(days=day_offset)
+
+        for slot in news_watcher.TRADING_SLOTS:
+            hour, minute = slot["start"]
+            runs.append((day.replace(hour=hour, minute=minute, second=0, microsecond=0), "news"))
+
+        if day.weekday() < 5:
+            hour, minute = SCREENER_TIME
+            runs.append((day.replace(hour=hour, minute=minute, second=0, microsecond=0), "screener"))
+
+    return runs
+
+
+def next_run(now=None):
+    """Earliest scheduled (when, job) strictly after now"""
+    now = now or datetime.now(WIB)
+    return min((run for run in upcoming_runs(now) if run[0] > now), key=lambda run: run[0])
+
+
+def run_job(name):
+    """Run one job, recording its outcome for the health endpoint"""
+    started = time.time()
+    with STATUS_LOCK:
+        status = JOB_STATUS.setdefault(name, {"runs": 0, "failures": 0})
+        status.update(running=True, last_start=started)
+
+    log(f"▶️  Running {name}")
+    error = None
+    try:
+        JOBS[name]()
+    except SystemExit as e:
+        # A job's CLI exit must not take the resident scheduler down with it
+        if e.code not in (None, 0):
+            error = f"exited with status {e.code}"
+            log(f"❌ {name} failed: {error}")
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+        log(f"❌ {name} failed: {error}")
+        traceback.print_exc()
+
+    with STATUS_LOCK:
+        status["running"] = False
+        status["runs"] += 1
+        status["last_end"] = time.time()
+        status["last_duration"] = round(status["last_end"] - started, 3)
+        status["last_error"] = error
+        if error:
+            status["failures"] += 1
+
+    if not error:
+        log(f"✓ {name} finished in {time.time() - started:.1f}s")
+
+
+def health():
+    """Health payload: ok unless the latest run of some job failed"""
+    with STATUS_LOCK:
+        jobs = json.loads(json.dumps(JOB_STATUS))
+        upcoming = dict(NEXT_RUN)
+
+    return {
+        "status": "error" if any(job.get("last_error") for job in jobs.values()) else "ok",
+        "uptime": round(time.time() - STARTED_AT),
+        "jobs": jobs,
+        "next_run": upcoming
+    }
+
+
+class HealthHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.rstrip("/") not in ("", "/health"):
+            self.send_error(404)
+            return
+
+        payload = health()
+        body = json.dumps(payload, indent=2).encode()
+        self.send_response(200 if payload["status"] == "ok" else 503)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_health_server():
+    """Serve /health on a daemon thread"""
+    server = ThreadingHTTPServer((HEALTH_HOST, HEALTH_PORT), HealthHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    log(f"🩺 Health endpoint on http://{HEALTH_HOST}:{HEALTH_PORT}/health")
+    return server
+
+
+def main():
+    log("=== Indonesian Stock Scheduler ===")
+    start_health_server()
+
+    # Catch up on a slot already in progress (run_slot skips it if done)
+    if news_watcher.get_current_slot()[0]:
+        run_job("news")
+
+    while True:
+        when, name = next_run()
+        with STATUS_LOCK:
+            NEXT_RUN.update(job=name, at=when.isoformat())
+        log(f"⏰ Next: {name} at {when.strftime('%a %H:%M WIB')}")
+
+        # Sleep in short steps so clock changes and suspends don't skew the wake-up
+        while True:
+            remaining = (when - datetime.now(WIB)).total_seconds()
+            if remaining <= 0:
+                break
+            time.sleep(min(remaining, 60))
+
+        run_job(name)
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except KeyboardInterrupt:
+        log("👋 Scheduler stopped")
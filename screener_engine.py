@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Vectorized Screener Engine
+Runs the volume spike and watchlist pattern checks for the whole universe
+at once on stacked (ticker × date) arrays. Results match
+detect_volume_spike() / detect_watchlist_patterns() in volume_screener.py.
+
+Usage:
+    python screener_engine.py [N]    Parity check on N synthetic tickers (default 500)
+"""
+
+import sys
+import numpy as np
+
+# Screener thresholds, shared by volume_screener, intraday and backtest
+SPIKE_WINDOW = 21
+SPIKE_MIN_PAST = 5
+SPIKE_RATIO = 3
+SPIKE_PRICE = 1.02
+FOLLOW_BARS = 5
+FOLLOW_MIN_BARS = 3
+FOLLOW_VOLUME = 0.6
+PATTERN_PRICE = 1
+PATTERN_VOLUME = 30
+PATTERN_WINDOW = 10
+MAX_PATTERNS = 3
+
+
+def stack_bars(frames, tickers, window):
+    """
+    Right-align the last `window` bars of each ticker into 2-D arrays.
+    Shorter histories are left-padded with NaN.
+    Returns: (close, volume, lengths) with shape (len(tickers), window)
+    """
+    close = np.full((len(tickers), window), np.nan)
+    volume = np.full((len(tickers), window), np.nan)
+    lengths = np.zeros(len(tickers), dtype=int)
+
+    for row, ticker in enumerate(tickers):
+        df = frames[ticker].tail(window)
+        n = len(df)
+        if n == 0:
+            continue
+        close[row, window - n:] = df["Close"].to_numpy(dtype=float)
+        volume[row, window - n:] = df["Volume"].to_numpy(dtype=float)
+        lengths[row] = n
+
+    return close, volume, lengths
+
+
+def bar_date(df, window, col):
+    """Date string of column `col` in the right-aligned window of df"""
+    return df["Date"].iloc[len(df) - window + col].strftime("%Y-%m-%d")
+
+
+def rolling_avg_volume(volume):
+    """
+    Average volume of all earlier bars in the window, per column.
+    Column i averages columns 0..i-1 (NaNs skipped, like Series.mean()).
+    """
+    avg = np.full(volume.shape, np.nan)
+    missing = np.isnan(volume)
+    filled = np.where(missing, 0.0, volume)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        for i in range(SPIKE_MIN_PAST, volume.shape[1]):
+            count = i - missing[:, :i].sum(axis=1)
+            avg[:, i] = filled[:, :i].sum(axis=1) / count
+
+    return avg
+
+
+def detect_volume_spikes(frames, tickers=None):
+    """
+    Vectorized detect_volume_spike() for every ticker in frames.
+    Returns: {ticker: spike dict} for tickers with a spike
+    """
+    tickers = [t for t in (frames if tickers is None else tickers) if len(frames[t]) >= SPIKE_WINDOW]
+    if not tickers:
+        return {}
+
+    close, volume, _ = stack_bars(frames, tickers, SPIKE_WINDOW)
+    avg = rolling_avg_volume(volume)
+
+    prev_close = np.full(close.shape, np.nan)
+    prev_close[:, 1:] = close[:, :-1]
+
+    with np.errstate(invalid="ignore"):
+        hits = (volume >= SPIKE_RATIO * avg) & (close >= prev_close * SPIKE_PRICE)
+    hits[:, :SPIKE_MIN_PAST] = False
+
+    # The reference scans backwards, so the latest spike wins
+    has_spike = hits.any(axis=1)
+    last = SPIKE_WINDOW - 1 - np.argmax(hits[:, ::-1], axis=1)
+
+    rows = np.nonzero(has_spike)[0]
+    cols = last[rows]
+    spike_volume = volume[rows, cols]
+
+    # SETUP needs ≥3 follow-through bars in the next 5, none above 60% of the spike
+    n_future = SPIKE_WINDOW - 1 - cols
+    high_volume = np.zeros(len(rows), dtype=bool)
+    with np.errstate(invalid="ignore"):
+        for k in range(1, FOLLOW_BARS + 1):
+            in_range = k <= n_future
+            future = volume[rows, np.minimum(cols + k, SPIKE_WINDOW - 1)]
+            high_volume |= in_range & (future > spike_volume * FOLLOW_VOLUME)
+    setup = (n_future >= FOLLOW_MIN_BARS) & ~high_volume
+
+    spikes = {}
+    for j, row in enumerate(rows):
+        ticker = tickers[row]
+        col = cols[j]
+        spikes[ticker] = {
+            "date": bar_date(frames[ticker], SPIKE_WINDOW, col),
+            "spike_volume": spike_volume[j],
+            "avg_volume": avg[row, col],
+            "close": close[row, col],
+            "prev_close": prev_close[row, col],
+            "classification": "SETUP" if setup[j] else "WAIT"
+        }
+
+    return spikes
+
+
+def detect_patterns(frames, tickers=None):
+    """
+    Vectorized detect_watchlist_patterns() for every ticker in frames.
+    Returns: {ticker: [pattern dicts]} for tickers with at least one pattern
+    """
+    tickers = [t for t in (frames if tickers is None else tickers) if len(frames[t]) >= 2]
+    if not tickers:
+        return {}
+
+    close, volume, lengths = stack_bars(frames, tickers, PATTERN_WINDOW)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        price_change = ((close[:, 1:] - close[:, :-1]) / close[:, :-1]) * 100
+        volume_change = ((volume[:, 1:] - volume[:, :-1]) / volume[:, :-1]) * 100
+
+        price_up = (price_change >= PATTERN_PRICE) & (volume_change <= -PATTERN_VOLUME)
+        price_down = ~price_up & (price_change <= -PATTERN_PRICE) & (volume_change >= PATTERN_VOLUME)
+
+    # Ignore pairs that straddle the NaN padding of short histories
+    first_valid = PATTERN_WINDOW - lengths
+    valid = np.arange(1, PATTERN_WINDOW)[None, :] > first_valid[:, None]
+    price_up &= valid
+    price_down &= valid
+
+    patterns = {}
+    for row, pair in zip(*np.nonzero(price_up | price_down)):
+        ticker = tickers[row]
+        col = pair + 1
+        patterns.setdefault(ticker, []).append({
+            "date": bar_date(frames[ticker], PATTERN_WINDOW, col),
+            "type": "Price↑ Volume↓" if price_up[row, pair] else "Price↓ Volume↑",
+            "price_change": price_change[row, pair],
+            "volume_change": volume_change[row, pair],
+            "close": close[row, col]
+        })
+
+    return {ticker: found[-MAX_PATTERNS:] for ticker, found in patterns.items()}
+
+
+def synthetic_frames(n, bars=30, seed=7):
+    """Random daily bars with injected spikes, for parity checks and benchmarks"""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end="2024-06-28", periods=bars, name="Date")
+    frames = {}
+
+    for idx in range(n):
+        length = int(rng.integers(1, bars + 1)) if idx % 10 == 0 else bars
+        close = 1000 * np.cumprod(1 + rng.normal(0, 0.02, length))
+        volume = rng.integers(100_000, 1_000_000, length).astype("int64")
+
+        spikes = rng.integers(0, length, int(rng.integers(0, 3)))
+        volume[spikes] *= 5
+        close[spikes] *= 1.05
+
+        frames[f"T{idx:05d}.JK"] = pd.DataFrame({
+            "Date": dates[-length:],
+            "Open": close,
+            "High": close,
+            "Low": close,
+            "Close": close,
+            "Volume": volume
+        })
+
+    return frames
+
+
+def prefix_reports(df):
+    """
+    What the daily detectors report at each bar of one ticker, run on the
+    prefix ending there.
+    Yields: (bar index, detect_volume_spike() result, pattern types completed on that bar)
+    """
+    from volume_screener import detect_volume_spike, detect_watchlist_patterns
+
+    for end in range(1, len(df) + 1):
+        prefix = df.iloc[:end]
+        day = prefix["Date"].iloc[-1].strftime("%Y-%m-%d")
+        patterns = [p["type"] for p in detect_watchlist_patterns(prefix) if p["date"] == day]
+        yield end - 1, detect_volume_spike(prefix), patterns
+
+
+def report_parity(check, n, what, bars=30):
+    """Run check(frames) on n synthetic tickers, print the mismatches and exit 1 if there are any"""
+    mismatches = check(synthetic_frames(n, bars=bars))
+    for mismatch in mismatches[:20]:
+        print(f"❌ {mismatch}")
+
+    if mismatches:
+        print(f"❌ {len(mismatches)} mismatches across {n} tickers")
+        sys.exit(1)
+    print(f"✓ {what} on {n} tickers")
+
+
+def check_parity(frames):
+    """
+    Compare the vectorized engine with the per-ticker reference functions.
+    Returns: list of mismatch descriptions (empty when identical)
+    """
+    from volume_screener import detect_volume_spike, detect_watchlist_patterns
+
+    spikes = detect_volume_spikes(frames)
+    patterns = detect_patterns(frames)
+    mismatches = []
+
+    for ticker, df in frames.items():
+        expected = detect_volume_spike(df)
+        if expected != spikes.get(ticker):
+            mismatches.append(f"{ticker} spike: {expected} != {spikes.get(ticker)}")
+
+        expected = detect_watchlist_patterns(df)
+        if expected != patterns.get(ticker, []):
+            mismatches.append(f"{ticker} patterns: {expected} != {patterns.get(ticker, [])}")
+
+    return mismatches
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    report_parity(check_parity, n, "Vectorized engine matches reference")
+
+
+if __name__ == "__main__":
+    main()
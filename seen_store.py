@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Seen Article Store
+Remembers which article IDs the news scanner has already processed, in
+the shared database. Lookups are indexed, eviction is oldest-first, and
+only new IDs are written. With SEEN_BLOOM=1 a Bloom filter saved next to
+the table screens out new IDs before they reach SQLite.
+
+Usage:
+    python seen_store.py stats    Show store size and age range
+    python seen_store.py evict    Apply retention limits now
+"""
+
+import os
+import sys
+import hashlib
+import math
+import time
+from dotenv import load_dotenv
+import storage
+
+load_dotenv()
+
+SEEN_RETENTION_DAYS = int(os.getenv("SEEN_RETENTION_DAYS", "14"))
+SEEN_MAX = int(os.getenv("SEEN_MAX", "50000"))
+SEEN_BLOOM = os.getenv("SEEN_BLOOM") == "1"
+
+
+class BloomFilter:
+    """Fixed-size probabilistic set: no false negatives, ~error_rate false positives"""
+
+    def __init__(self, capacity, error_rate=0.01):
+        capacity = max(1, capacity)
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.built_at = time.time()
+
+    def _positions(self, key):
+        digest = hashlib.sha256(key.encode()).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:16], "little") | 1
+        return ((h1 + i * h2) % self.size for i in range(self.hashes))
+
+    def add(self, key):
+        for pos in self._positions(key):
+            self.bits[pos >> 3] |= 1 << (pos & 7)
+
+    def __contains__(self, key):
+        return all(self.bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(key))
+
+
+def open_store():
+    """Open the shared database holding the seen store"""
+    return storage.connect()
+
+
+def build_bloom(conn):
+    """Bloom filter over every stored ID, sized for the retention cap"""
+    bloom = BloomFilter(max(SEEN_MAX, 1000))
+    for (article_id,) in conn.execute("SELECT id FROM seen"):
+        bloom.add(article_id)
+    return bloom
+
+
+def save_bloom(conn, bloom, watermark):
+    """Store the filter; watermark is the newest seen_at it covers (call inside a transaction)"""
+    conn.execute(
+        "INSERT OR REPLACE INTO seen_bloom (id, bits, size, hashes, watermark, built_at) VALUES (0, ?, ?, ?, ?, ?)",
+        (bytes(bloom.bits), bloom.size, bloom.hashes, watermark, bloom.built_at)
+    )
+
+
+def load_bloom(conn):
+    """
+    The saved Bloom filter, kept current by mark_seen(). It is rebuilt
+    from the table only when missing, when rows newer than it exist
+    (written while SEEN_BLOOM was off), or once per retention window so
+    evicted IDs stop costing false positives.
+    """
+    row = conn.execute("SELECT bits, size, hashes, watermark, built_at FROM seen_bloom WHERE id = 0").fetchone()
+    newest = conn.execute("SELECT MAX(seen_at) FROM seen").fetchone()[0] or 0.0
+    bloom = BloomFilter(max(SEEN_MAX, 1000))
+
+    if row and (row[1], row[2]) == (bloom.size, bloom.hashes) and newest <= row[3] \
+            and time.time() - row[4] < SEEN_RETENTION_DAYS * 86400:
+        bloom.bits = bytearray(row[0])
+        bloom.built_at = row[4]
+        return bloom
+
+    bloom = build_bloom(conn)
+    with conn:
+        save_bloom(conn, bloom, newest)
+    return bloom
+
+
+def seen_ids(conn, ids, bloom=None):
+    """
+    Return the subset of ids already in the store.
+    With a bloom filter, IDs it rules out skip the database entirely.
+    """
+    ids = list(dict.fromkeys(ids))
+    if bloom is not None:
+        ids = [article_id for article_id in ids if article_id in bloom]
+
+    found = set()
+    # Stay under SQLite's host parameter limit
+    for offset in range(0, len(ids), 500):
+        chunk = ids[offset:offset + 500]
+        placeholders = ", ".join("?" * len(chunk))
+        found.update(row[0] for row in conn.execute(
+            f"SELECT id FROM seen WHERE id IN ({placeholders})", chunk
+        ))
+
+    return found
+
+
+def mark_seen(conn, ids, bloom=None, published=None):
+    """
+    Record ids as seen now; published maps id -> publish epoch when known.
+    A bloom filter is updated and saved in the same transaction.
+    """
+    now = time.time()
+    published = published or {}
+
+    if bloom is not None:
+        for article_id in ids:
+            bloom.add(article_id)
+
+    with conn:
+        conn.executemany(
+            "INSERT OR IGNORE INTO seen (id, seen_at, published_at) VALUES (?, ?, ?)",
+            [(article_id, now, published.get(article_id)) for article_id in ids]
+        )
+        if bloom is not None:
+            save_bloom(conn, bloom, now)
+
+
+def evict(conn, retention_days=SEEN_RETENTION_DAYS, max_entries=SEEN_MAX):
+    """Drop IDs older than the retention window, then the oldest beyond max_entries"""
+    cutoff = time.time() - retention_days * 86400
+
+    with conn:
+        deleted = conn.execute("DELETE FROM seen WHERE seen_at < ?", (cutoff,)).rowcount
+        deleted += conn.execute(
+            "DELETE FROM seen WHERE id IN "
+            "(SELECT id FROM seen ORDER BY seen_at DESC LIMIT -1 OFFSET ?)",
+            (max_entries,)
+        ).rowcount
+
+    return deleted
+
+
+def stats(conn):
+    """Summarize store contents"""
+    count, oldest, newest = conn.execute(
+        "SELECT COUNT(*), MIN(seen_at), MAX(seen_at) FROM seen"
+    ).fetchone()
+    return {"count": count, "oldest": oldest, "newest": newest}
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    conn = open_store()
+
+    if command == "evict":
+        deleted = evict(conn)
+        print(f"✓ Evicted {deleted} seen IDs")
+    elif command == "stats":
+        info = stats(conn)
+        print(f"👁️  {storage.DB_FILE}")
+        print(f"   Seen IDs: {info['count']} (max {SEEN_MAX}, {SEEN_RETENTION_DAYS} days)")
+        if info["count"]:
+            age_days = (time.time() - info["oldest"]) / 86400
+            print(f"   Oldest: {age_days:.1f} days ago")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
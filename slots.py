@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""
+Trading Slots
+WIB trading slot windows and the current-slot check. Standard library
+only, so the news scanner can decide to exit before importing anything
+heavy.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+# Fixed UTC+7 (no DST), equivalent to pytz's Asia/Jakarta
+WIB = timezone(timedelta(hours=7), "WIB")
+
+TRADING_SLOTS = [
+    {"start": (8, 45), "end": (9, 30), "name": "Pre-Market"},
+    {"start": (12, 0), "end": (13, 30), "name": "Midday"},
+    {"start": (15, 15), "end": (16, 0), "name": "Post-Market"}
+]
+
+
+def get_current_slot(now=None):
+    """Check if current time is within a trading slot"""
+    now_wib = now or datetime.now(WIB)
+    current_time = (now_wib.hour, now_wib.minute)
+
+    for idx, slot in enumerate(TRADING_SLOTS):
+        start_h, start_m = slot["start"]
+        end_h, end_m = slot["end"]
+
+        if (start_h, start_m) <= current_time <= (end_h, end_m):
+            slot_id = f"{now_wib.strftime('%Y-%m-%d')}_slot_{idx}"
+            return slot_id, slot["name"]
+
+    return None, None
+
+
+def log(msg):
+    """Print with WIB timestamp"""
+    now_wib = datetime.now(WIB).strftime("%Y-%m-%d %H:%M:%S %Z")
+    print(f"[{now_wib}] {msg}")
@@ -0,0 +1,347 @@
+#!/usr/bin/env python3
+"""
+Shared Storage
+One WAL-mode SQLite database used by the bot, the news scanner and the
+volume screener: watchlists, seen articles, slot runs, fetched bars and
+emitted signals. WAL lets the bot write while the timers read.
+
+Usage:
+    python storage.py migrate    Import the legacy JSON files (runs automatically once)
+    python storage.py stats      Row counts per table
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import time
+from pathlib import Path
+from dotenv import load_dotenv
+
+load_dotenv()
+
+DB_FILE = Path(os.getenv("DB_FILE", "/opt/indo_badnews/indo_badnews.db"))
+
+LEGACY_WATCHLIST_FILE = Path("/opt/indo_badnews/watchlist.json")
+LEGACY_STATE_FILE = Path("/opt/indo_badnews/state.json")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+
+CREATE TABLE IF NOT EXISTS watchlist (
+    chat_id TEXT NOT NULL,
+    ticker TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    PRIMARY KEY (chat_id, ticker)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS watchlist_by_ticker ON watchlist (ticker, chat_id);
+
+CREATE TABLE IF NOT EXISTS seen (
+    id TEXT PRIMARY KEY,
+    seen_at REAL NOT NULL,
+    published_at REAL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS seen_by_time ON seen (seen_at);
+
+CREATE TABLE IF NOT EXISTS seen_bloom (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    bits BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    hashes INTEGER NOT NULL,
+    watermark REAL NOT NULL,
+    built_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS slot_runs (
+    slot_id TEXT PRIMARY KEY,
+    slot_name TEXT,
+    started_at REAL NOT NULL,
+    finished_at REAL,
+    heartbeat_at REAL,
+    articles INTEGER,
+    bad_articles INTEGER
+);
+
+CREATE INDEX IF NOT EXISTS slot_runs_by_time ON slot_runs (started_at);
+
+CREATE TABLE IF NOT EXISTS bars (
+    ticker TEXT NOT NULL,
+    date TEXT NOT NULL,
+    open REAL,
+    high REAL,
+    low REAL,
+    close REAL,
+    volume REAL,
+    PRIMARY KEY (ticker, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS fetches (
+    ticker TEXT PRIMARY KEY,
+    fetched_at REAL NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS signals (
+    id INTEGER PRIMARY KEY,
+    kind TEXT NOT NULL,
+    ticker TEXT,
+    date TEXT,
+    created_at REAL NOT NULL,
+    payload TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS signals_by_ticker ON signals (ticker, created_at);
+CREATE INDEX IF NOT EXISTS signals_by_kind ON signals (kind, created_at);
+"""
+
+
+def connect(path=None, check_same_thread=True):
+    """Open the shared database in WAL mode, creating and migrating it on first use"""
+    path = Path(path or DB_FILE)
+    conn = sqlite3.connect(str(path), timeout=30, check_same_thread=check_same_thread)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.executescript(SCHEMA)
+    upgrade_schema(conn)
+
+    if path == DB_FILE:
+        ensure_migrated(conn)
+
+    return conn
+
+
+def upgrade_schema(conn):
+    """Add columns introduced after a database was created"""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(slot_runs)")}
+    if "heartbeat_at" not in columns:
+        try:
+            conn.execute("ALTER TABLE slot_runs ADD COLUMN heartbeat_at REAL")
+        except sqlite3.OperationalError:
+            pass  # another process added it first
+
+
+def load_watchlists(conn):
+    """All watchlists as {chat_id: [tickers]} in insertion order"""
+    watchlists = {}
+    for chat_id, ticker in conn.execute(
+        "SELECT chat_id, ticker FROM watchlist ORDER BY chat_id, position"
+    ):
+        watchlists.setdefault(chat_id, []).append(ticker)
+    return watchlists
+
+
+def all_tickers(conn):
+    """Every ticker on at least one watchlist"""
+    return [row[0] for row in conn.execute("SELECT DISTINCT ticker FROM watchlist ORDER BY ticker")]
+
+
+def chat_tickers(conn, chat_id):
+    """One chat's watchlist in insertion order"""
+    return [row[0] for row in conn.execute(
+        "SELECT ticker FROM watchlist WHERE chat_id = ? ORDER BY position", (chat_id,)
+    )]
+
+
+def chats_watching(conn, ticker):
+    """Chats that have ticker on their watchlist"""
+    return [row[0] for row in conn.execute(
+        "SELECT chat_id FROM watchlist WHERE ticker = ?", (ticker,)
+    )]
+
+
+def replace_chat_watchlist(conn, chat_id, tickers):
+    """Overwrite one chat's watchlist (caller manages the transaction)"""
+    conn.execute("DELETE FROM watchlist WHERE chat_id = ?", (chat_id,))
+    conn.executemany(
+        "INSERT INTO watchlist (chat_id, ticker, position) VALUES (?, ?, ?)",
+        [(chat_id, ticker, position) for position, ticker in enumerate(tickers)]
+    )
+    bump_watchlist_version(conn)
+
+
+def bump_watchlist_version(conn):
+    """Record a watchlist change (caller manages the transaction)"""
+    conn.execute(
+        "INSERT INTO meta (key, value) VALUES ('watchlist_version', 1) "
+        "ON CONFLICT(key) DO UPDATE SET value = CAST(value AS INTEGER) + 1"
+    )
+
+
+def watchlist_version(conn):
+    """Changes only when some connection commits a watchlist change"""
+    row = conn.execute("SELECT value FROM meta WHERE key = 'watchlist_version'").fetchone()
+    return int(row[0]) if row else 0
+
+
+def start_slot_run(conn, slot_id, slot_name):
+    """Record the start of a news slot run"""
+    now = time.time()
+    with conn:
+        conn.execute(
+            "INSERT OR REPLACE INTO slot_runs (slot_id, slot_name, started_at, heartbeat_at) VALUES (?, ?, ?, ?)",
+            (slot_id, slot_name, now, now)
+        )
+
+
+def claim_slot_run(conn, slot_id, slot_name, lease):
+    """
+    Start a news slot run unless the slot already finished or another
+    runner holds it. A runner holds the slot while its heartbeat (see
+    touch_slot_run) is younger than `lease` seconds, so a crashed run
+    can be taken over once the lease lapses.
+    Returns: None if claimed, else "finished" or "running"
+    """
+    now = time.time()
+    with conn:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT finished_at, COALESCE(heartbeat_at, started_at) FROM slot_runs WHERE slot_id = ?",
+            (slot_id,)
+        ).fetchone()
+
+        if row and row[0] is not None:
+            return "finished"
+        if row and now - row[1] < lease:
+            return "running"
+
+        conn.execute(
+            "INSERT OR REPLACE INTO slot_runs (slot_id, slot_name, started_at, heartbeat_at) VALUES (?, ?, ?, ?)",
+            (slot_id, slot_name, now, now)
+        )
+    return None
+
+
+def touch_slot_run(conn, slot_id):
+    """Renew the lease of a running news slot run"""
+    with conn:
+        conn.execute("UPDATE slot_runs SET heartbeat_at = ? WHERE slot_id = ?", (time.time(), slot_id))
+
+
+def finish_slot_run(conn, slot_id, articles, bad_articles):
+    """Record the outcome of a news slot run"""
+    with conn:
+        conn.execute(
+            "UPDATE slot_runs SET finished_at = ?, articles = ?, bad_articles = ? WHERE slot_id = ?",
+            (time.time(), articles, bad_articles, slot_id)
+        )
+
+
+def record_signals(conn, kind, signals):
+    """Store emitted signals (dicts with optional ticker/date keys)"""
+    now = time.time()
+    with conn:
+        conn.executemany(
+            "INSERT INTO signals (kind, ticker, date, created_at, payload) VALUES (?, ?, ?, ?, ?)",
+            [
+                (kind, signal.get("ticker"), signal.get("date"), now, json.dumps(signal, default=str))
+                for signal in signals
+            ]
+        )
+
+
+def recent_signals(conn, ticker, since):
+    """Signals for a ticker emitted after the given epoch"""
+    return [
+        {"kind": kind, "created_at": created_at, **json.loads(payload)}
+        for kind, created_at, payload in conn.execute(
+            "SELECT kind, created_at, payload FROM signals WHERE ticker = ? AND created_at >= ? "
+            "ORDER BY created_at",
+            (ticker, since)
+        )
+    ]
+
+
+def ensure_migrated(conn):
+    """Run the one-shot legacy import if it has not happened yet"""
+    done = conn.execute("SELECT value FROM meta WHERE key = 'legacy_migrated'").fetchone()
+    if not done:
+        migrate(conn)
+
+
+def migrate(conn):
+    """
+    Import watchlist.json and state.json. Existing rows win, so running it
+    twice is harmless. A file that cannot be read is logged and skipped,
+    and the import is only marked done once both imported cleanly, so a
+    failed one is retried on the next connect.
+    Returns: {source: rows imported}
+    """
+    imported = {}
+    failed = []
+
+    if LEGACY_WATCHLIST_FILE.exists():
+        try:
+            with open(LEGACY_WATCHLIST_FILE, "r") as f:
+                data = json.load(f)
+            rows = [
+                (str(chat_id), ticker, position)
+                for chat_id, tickers in data.items()
+                for position, ticker in enumerate(tickers)
+            ]
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO watchlist (chat_id, ticker, position) VALUES (?, ?, ?)", rows
+                )
+                bump_watchlist_version(conn)
+            imported["watchlist.json"] = len(rows)
+        except (OSError, ValueError, AttributeError, TypeError, sqlite3.Error) as e:
+            print(f"⚠️  Could not import {LEGACY_WATCHLIST_FILE}: {e} (will retry)")
+            failed.append("watchlist.json")
+
+    if LEGACY_STATE_FILE.exists():
+        try:
+            with open(LEGACY_STATE_FILE, "r") as f:
+                state = json.load(f)
+            now = time.time()
+            seen = state.get("seen", [])
+            with conn:
+                conn.executemany(
+                    "INSERT OR IGNORE INTO seen (id, seen_at) VALUES (?, ?)", [(i, now) for i in seen]
+                )
+                if state.get("last_slot"):
+                    conn.execute(
+                        "INSERT OR IGNORE INTO slot_runs (slot_id, started_at, finished_at) VALUES (?, ?, ?)",
+                        (state["last_slot"], now, now)
+                    )
+            imported["state.json"] = len(seen)
+        except (OSError, ValueError, AttributeError, TypeError, sqlite3.Error) as e:
+            print(f"⚠️  Could not import {LEGACY_STATE_FILE}: {e} (will retry)")
+            failed.append("state.json")
+
+    if not failed:
+        with conn:
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_migrated', ?)", (str(time.time()),))
+
+    return imported
+
+
+def stats(conn):
+    """Row counts per table"""
+    tables = ["watchlist", "seen", "slot_runs", "bars", "fetches", "signals"]
+    return {table: conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0] for table in tables}
+
+
+def main():
+    command = sys.argv[1] if len(sys.argv) > 1 else "stats"
+    conn = connect()
+
+    if command == "migrate":
+        for source, count in migrate(conn).items():
+            print(f"✓ {source}: {count} rows")
+    elif command == "stats":
+        print(f"🗄️  {DB_FILE}")
+        for table, count in stats(conn).items():
+            print(f"   {table}: {count}")
+    else:
+        print(__doc__)
+        sys.exit(1)
+
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
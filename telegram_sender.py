@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Telegram Sender
+Pooled, rate-limited sendMessage client shared by the news scanner and the
+volume screener. Keeps one HTTP session, respects global and per-chat
+limits, honours 429 retry_after, and splits long HTML messages.
+"""
+
+import os
+import re
+import time
+import random
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from dotenv import load_dotenv
+import pytz
+import requests
+from rate_limit import RateLimiter
+import metrics
+
+load_dotenv()
+
+TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+TELEGRAM_RATE = float(os.getenv("TELEGRAM_RATE", "25"))  # messages per second, all chats
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))  # messages per second, per chat
+TELEGRAM_SEND_WORKERS = int(os.getenv("TELEGRAM_SEND_WORKERS", "8"))
+TELEGRAM_RETRIES = int(os.getenv("TELEGRAM_RETRIES", "3"))
+TELEGRAM_TIMEOUT = int(os.getenv("TELEGRAM_TIMEOUT", "10"))
+
+MAX_MESSAGE_LENGTH = 4096
+
+WIB = pytz.timezone("Asia/Jakarta")
+
+# Tags and entities must never be cut in half
+MARKUP_RE = re.compile(r"<(/?)([a-zA-Z]+)[^>]*>|&#?\w+;")
+
+
+def log(msg):
+    """Print with WIB timestamp"""
+    now_wib = datetime.now(WIB).strftime("%Y-%m-%d %H:%M:%S %Z")
+    print(f"[{now_wib}] {msg}")
+
+
+def open_tags(html):
+    """Tags opened in html and not yet closed, outermost first, as (name, tag)"""
+    stack = []
+    for m in MARKUP_RE.finditer(html):
+        closing, name = m.group(1), m.group(2)
+        if not name:
+            continue
+        if not closing:
+            stack.append((name.lower(), m.group(0)))
+        elif stack and stack[-1][0] == name.lower():
+            stack.pop()
+    return stack
+
+
+def safe_cut(text, budget):
+    """
+    Best split position at or before budget: a blank line, then a line
+    break, then a space, never inside a tag or entity.
+    """
+    spans = [m.span() for m in MARKUP_RE.finditer(text, 0, budget + 64) if m.start() < budget]
+
+    def inside_markup(pos):
+        return any(start < pos < end for start, end in spans)
+
+    for separator in ("\n\n", "\n", " "):
+        pos = text.rfind(separator, budget // 2, budget)
+        while pos > 0 and inside_markup(pos):
+            pos = text.rfind(separator, budget // 2, pos)
+        if pos > 0:
+            return pos + len(separator)
+
+    for start, end in spans:
+        if start < budget < end:
+            return start
+    return budget
+
+
+def split_message(text, limit=MAX_MESSAGE_LENGTH):
+    """
+    Split an HTML message into parts of at most limit characters.
+    Tags still open at a split are closed and reopened in the next part.
+    """
+    parts = []
+    prefix = ""
+
+    while len(prefix) + len(text) > limit:
+        budget = limit - len(prefix)
+        while True:
+            cut = safe_cut(text, budget)
+            if cut <= 0:
+                cut = budget
+            head = prefix + text[:cut]
+            tags = open_tags(head)
+            closing = "".join(f"</{name}>" for name, _ in reversed(tags))
+            if len(head.rstrip()) + len(closing) <= limit or budget <= 1:
+                break
+            budget -= len(closing)
+
+        parts.append(head.rstrip() + closing)
+        prefix = "".join(tag for _, tag in tags)
+        text = text[cut:].lstrip("\n")
+
+    parts.append(prefix + text)
+    return parts
+
+
+class TelegramSender:
+    """
+    Thread-safe sendMessage client.
+    One session is reused for every request; each send waits for both the
+    global and the chat's own token bucket.
+    """
+
+    def __init__(self, token=TELEGRAM_BOT_TOKEN, api_url=TELEGRAM_API_URL,
+                 rate=TELEGRAM_RATE, chat_rate=TELEGRAM_CHAT_RATE, workers=TELEGRAM_SEND_WORKERS):
+        self.token = token
+        self.url = f"{api_url.rstrip('/')}/bot{token}/sendMessage"
+        self.workers = workers
+        self.chat_rate = chat_rate
+        self.limiter = RateLimiter(rate, burst=int(rate))
+        self.chat_limiters = {}
+        self.lock = threading.Lock()
+
+        self.session = requests.Session()
+        adapter = requests.adapters.HTTPAdapter(pool_maxsize=workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def chat_limiter(self, chat_id):
+        with self.lock:
+            if chat_id not in self.chat_limiters:
+                self.chat_limiters[chat_id] = RateLimiter(self.chat_rate)
+            return self.chat_limiters[chat_id]
+
+    def post(self, chat_id, text):
+        """POST one part; retries 429s after retry_after and 5xx/network errors with backoff"""
+        payload = {
+            "chat_id": chat_id,
+            "text": text,
+            "parse_mode": "HTML",
+            "disable_web_page_preview": True
+        }
+
+        for attempt in range(TELEGRAM_RETRIES + 1):
+            self.limiter.acquire()
+            self.chat_limiter(chat_id).acquire()
+
+            try:
+                with metrics.timer("external_call", service="telegram"):
+                    response = self.session.post(self.url, json=payload, timeout=TELEGRAM_TIMEOUT)
+            except Exception as e:
+                if attempt == TELEGRAM_RETRIES:
+                    log(f"❌ Telegram send to {chat_id} failed: {e}")
+                    return False
+                time.sleep(random.uniform(0, 2 ** attempt))
+                continue
+
+            if response.status_code == 429:
+                try:
+                    retry_after = response.json().get("parameters", {}).get("retry_after", 1)
+                except ValueError:
+                    retry_after = 1
+                metrics.count("telegram_rate_limited")
+                log(f"⏳ Telegram rate limited, retrying in {retry_after}s")
+                self.limiter.pause(retry_after)
+                continue
+
+            if response.status_code >= 500 and attempt < TELEGRAM_RETRIES:
+                time.sleep(random.uniform(0, 2 ** attempt))
+                continue
+
+            if not response.ok:
+                log(f"❌ Telegram send to {chat_id} failed: {response.status_code} {response.text[:200]}")
+                return False
+
+            return True
+
+        log(f"❌ Telegram send to {chat_id} gave up after {TELEGRAM_RETRIES + 1} attempts")
+        return False
+
+    def send(self, chat_id, text):
+        """Send a message to one chat, split into parts when too long"""
+        if not self.token or not chat_id:
+            log("⚠️  Telegram not configured, skipping send")
+            return False
+
+        return all([self.post(chat_id, part) for part in split_message(text)])
+
+    def send_many(self, messages):
+        """
+        Send (chat_id, text) pairs, chats in parallel.
+        Each chat's messages go out in order on one worker.
+        Returns: number of messages delivered
+        """
+        by_chat = {}
+        for chat_id, text in messages:
+            by_chat.setdefault(chat_id, []).append(text)
+
+        def send_chat(chat_id):
+            return sum(self.send(chat_id, text) for text in by_chat[chat_id])
+
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            return sum(pool.map(send_chat, by_chat))
+
+    def close(self):
+        self.session.close()
+
+
+_sender = None
+
+
+def get_sender():
+    """Process-wide sender, so connections and rate limits are shared"""
+    global _sender
+    if _sender is None:
+        _sender = TelegramSender()
+    return _sender
@@ -0,0 +1,9 @@
+import os
+import sys
+from pathlib import Path
+
+# The scripts are flat top-level modules; make them importable from tests/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+# Runs started by tests must not write metrics into the deployment directory
+os.environ.setdefault("METRICS_ENABLED", "0")
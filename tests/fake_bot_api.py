@@ -0,0 +1,108 @@
+"""
+Fake Telegram Bot API
+A local HTTP server answering /bot<token>/sendMessage like the real API:
+messages over 4096 characters and unbalanced HTML are rejected with 400,
+and scripted responses (429 with retry_after, 5xx) can be queued ahead of
+the normal 200.
+"""
+
+import json
+import threading
+from html.parser import HTMLParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+MAX_MESSAGE_LENGTH = 4096
+
+
+class TagBalance(HTMLParser):
+    """Records whether every tag is closed in order, like Telegram's entity parser"""
+
+    def __init__(self):
+        super().__init__()
+        self.stack = []
+        self.balanced = True
+
+    def handle_starttag(self, tag, attrs):
+        self.stack.append(tag)
+
+    def handle_endtag(self, tag):
+        if not self.stack or self.stack.pop() != tag:
+            self.balanced = False
+
+
+def html_error(text):
+    """Why Telegram would refuse this HTML text, or None"""
+    parser = TagBalance()
+    parser.feed(text)
+    parser.close()
+    if not parser.balanced or parser.stack:
+        return "Bad Request: can't parse entities: unbalanced tags"
+    return None
+
+
+class FakeBotAPI:
+    """
+    Usage:
+        with FakeBotAPI() as api:
+            api.queue(429, {"ok": False, "parameters": {"retry_after": 1}})
+            TelegramSender(token="T", api_url=api.url).send("1", "hi")
+            api.messages  # accepted sendMessage payloads
+    """
+
+    def __init__(self):
+        self.requests = []
+        self.messages = []
+        self.scripted = []
+        self.lock = threading.Lock()
+
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                payload = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                status, body = api.respond(self.path, payload)
+                data = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def queue(self, status, body):
+        """Answer the next request with this instead of processing it"""
+        with self.lock:
+            self.scripted.append((status, body))
+
+    def respond(self, path, payload):
+        with self.lock:
+            self.requests.append(payload)
+            if self.scripted:
+                return self.scripted.pop(0)
+
+        if not path.endswith("/sendMessage"):
+            return 404, {"ok": False, "description": "Not Found"}
+
+        text = payload.get("text", "")
+        if len(text) > MAX_MESSAGE_LENGTH:
+            return 400, {"ok": False, "description": "Bad Request: message is too long"}
+        if payload.get("parse_mode") == "HTML" and html_error(text):
+            return 400, {"ok": False, "description": html_error(text)}
+
+        with self.lock:
+            self.messages.append(payload)
+        return 200, {"ok": True, "result": {"message_id": len(self.messages), "text": text}}
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
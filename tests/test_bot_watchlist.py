@@ -0,0 +1,88 @@
+"""WatchlistIndex change tracking against a throwaway database"""
+
+import pytest
+
+import storage
+import bot_watchlist
+
+
+@pytest.fixture
+def index(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "DB_FILE", tmp_path / "test.db")
+    watchlist = bot_watchlist.WatchlistIndex(save_delay=60)
+    yield watchlist
+    if watchlist.timer is not None:
+        watchlist.timer.cancel()
+
+
+def test_add_and_remove_are_saved(index):
+    assert index.add("1", ["BBCA.JK", "TLKM.JK", "BBCA.JK"]) == ["BBCA.JK", "TLKM.JK"]
+    assert index.remove("1", ["BBCA.JK"]) == ["BBCA.JK"]
+    index.flush()
+
+    assert storage.load_watchlists(index.conn) == {"1": ["TLKM.JK"]}
+    assert index.chats_watching("TLKM.JK") == {"1"}
+    assert index.chats_watching("BBCA.JK") == set()
+
+
+def test_remove_from_unknown_chat_changes_nothing(index):
+    assert index.remove("1", ["BBCA.JK"]) == []
+    assert index.chats == {}
+    assert index.dirty == set()
+    assert index.timer is None
+
+
+def test_adding_known_tickers_schedules_no_save(index):
+    index.add("1", ["BBCA.JK"])
+    index.flush()
+
+    assert index.add("1", ["BBCA.JK"]) == []
+    assert index.dirty == set()
+    assert index.timer is None
+
+
+def test_other_writes_to_the_database_keep_the_index(index, monkeypatch):
+    index.add("1", ["BBCA.JK"])
+    index.flush()
+    reloads = []
+    monkeypatch.setattr(index, "reload", lambda: reloads.append(True))
+
+    other = storage.connect(storage.DB_FILE)
+    storage.start_slot_run(other, "morning", "Morning")
+    storage.record_signals(other, "pattern", [{"ticker": "BBCA.JK"}])
+    other.close()
+
+    index.refresh_if_changed()
+    assert reloads == []
+
+
+def test_watchlist_changes_from_another_process_are_picked_up(index):
+    index.add("1", ["BBCA.JK"])
+    index.flush()
+
+    other = storage.connect(storage.DB_FILE)
+    with other:
+        storage.replace_chat_watchlist(other, "2", ["TLKM.JK"])
+    other.close()
+
+    index.refresh_if_changed()
+    assert index.tickers("2") == ["TLKM.JK"]
+    assert index.tickers("1") == ["BBCA.JK"]
+
+
+def test_wl_reports_only_new_tickers(index, monkeypatch):
+    import asyncio
+    from types import SimpleNamespace
+
+    monkeypatch.setattr(bot_watchlist, "get_watchlist_index", lambda: index)
+    monkeypatch.setattr(bot_watchlist, "log", lambda msg: None)
+    replies = []
+
+    async def reply_text(text):
+        replies.append(text)
+
+    update = SimpleNamespace(effective_chat=SimpleNamespace(id=1), message=SimpleNamespace(reply_text=reply_text))
+    index.add("1", ["BBCA.JK"])
+
+    asyncio.run(bot_watchlist.cmd_wl(update, SimpleNamespace(args=["bbca", "tlkm"])))
+    assert replies[-1].startswith("✅ Added 1 ticker(s)")
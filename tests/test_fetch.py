@@ -0,0 +1,57 @@
+"""fetch_ticker retries errors but not empty results"""
+
+import pandas as pd
+import pytest
+
+import volume_screener
+
+
+class FlakyProvider:
+    remote = False
+
+    def __init__(self, results):
+        self.results = list(results)
+        self.calls = 0
+
+    def fetch_one(self, ticker, period="1mo", start=None, timeout=None):
+        self.calls += 1
+        result = self.results.pop(0)
+        if isinstance(result, Exception):
+            raise result
+        return result
+
+
+@pytest.fixture
+def logs(monkeypatch):
+    messages = []
+    monkeypatch.setattr(volume_screener, "log", messages.append)
+    monkeypatch.setattr(volume_screener.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(volume_screener, "FETCH_RETRIES", 3)
+    return messages
+
+
+def fetch(monkeypatch, provider):
+    monkeypatch.setattr(volume_screener.market_data, "get_provider", lambda: provider)
+    return volume_screener.fetch_ticker("DEAD.JK", limiter=None)
+
+
+def test_empty_result_is_final(monkeypatch, logs):
+    provider = FlakyProvider([None])
+    assert fetch(monkeypatch, provider) is None
+    assert provider.calls == 1
+    assert logs == ["⚠️  No data for DEAD.JK"]
+
+
+def test_errors_are_retried(monkeypatch, logs):
+    df = pd.DataFrame({"Close": [1.0]})
+    provider = FlakyProvider([TimeoutError("slow"), TimeoutError("slow"), df])
+    assert fetch(monkeypatch, provider) is df
+    assert provider.calls == 3
+    assert logs == []
+
+
+def test_persistent_error_is_logged_once(monkeypatch, logs):
+    provider = FlakyProvider([TimeoutError("slow")] * 4)
+    assert fetch(monkeypatch, provider) is None
+    assert provider.calls == 4
+    assert logs == ["❌ Failed to fetch DEAD.JK: slow"]
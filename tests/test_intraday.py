@@ -0,0 +1,77 @@
+"""IntradayDetector replayed over recorded 5m bars"""
+
+from pathlib import Path
+
+import pytest
+
+import market_data
+import intraday
+
+FIXTURE = Path(__file__).parent / "fixtures" / "intraday_bars.csv"
+
+# Two sessions of 5m bars for three tickers, in the `intraday.py record` format
+EXPECTED_ALERTS = [
+    ("BBCA.JK", "2026-03-02 09:50", "WAIT"),
+    ("TLKM.JK", "2026-03-02 10:00", "WAIT"),
+    ("BBCA.JK", "2026-03-02 09:50", "SETUP"),
+    ("TLKM.JK", "2026-03-03 09:40", "Price↑ Volume↓"),
+    ("TLKM.JK", "2026-03-03 10:40", "Price↓ Volume↑"),
+    ("ANTM.JK", "2026-03-03 11:10", "WAIT"),
+    ("ANTM.JK", "2026-03-03 11:10", "SETUP"),
+]
+
+
+@pytest.fixture
+def frames():
+    return market_data.load_frames(FIXTURE)
+
+
+def replay(frames, **options):
+    detector = intraday.IntradayDetector(frames, **options)
+    events = [event for bar in intraday.stream_bars(frames) for event in detector.update(*bar)]
+    events += detector.finish()
+    return [(e["ticker"], e["date"], e.get("classification") or e["type"]) for e in events]
+
+
+def test_replay_alerts(frames):
+    assert replay(frames) == EXPECTED_ALERTS
+
+
+def test_loud_follow_through_never_becomes_setup(frames):
+    alerts = replay(frames)
+    assert ("TLKM.JK", "2026-03-02 10:00", "SETUP") not in alerts
+
+
+def test_unwatched_tickers_get_no_patterns(frames):
+    detector = intraday.IntradayDetector(watchlist=["BBCA.JK"])
+    events = [event for bar in intraday.stream_bars(frames) for event in detector.update(*bar)]
+    assert not any("type" in event for event in events)
+
+
+
+class RecordingSender:
+    def __init__(self):
+        self.sent = []
+
+    def send(self, chat_id, text):
+        self.sent.append((chat_id, text))
+        return True
+
+    def send_many(self, messages):
+        return sum(self.send(chat_id, text) for chat_id, text in messages)
+
+
+def test_main_chat_gets_spikes_and_patterns(frames, tmp_path, monkeypatch):
+    sender = RecordingSender()
+    monkeypatch.setattr(intraday.telegram_sender, "get_sender", lambda: sender)
+    monkeypatch.setattr(intraday, "TELEGRAM_CHAT_ID", "main")
+
+    detector = intraday.IntradayDetector(frames)
+    events = [event for bar in intraday.stream_bars(frames) for event in detector.update(*bar)]
+    conn = intraday.storage.connect(tmp_path / "test.db")
+    intraday.send_alerts(conn, events)
+
+    [(chat_id, text)] = sender.sent
+    assert chat_id == "main"
+    assert "Intraday Volume Spikes" in text
+    assert "Intraday Watchlist Patterns" in text
@@ -0,0 +1,41 @@
+"""Negative keyword matching, including Indonesian prefixed and circumfixed forms"""
+
+import pytest
+
+import news_watcher
+
+# Each of these matched the original substring check and must keep matching
+INFLECTED = [
+    "kebangkrutan", "didenda", "menurun", "penurunan", "kegagalan", "dikorupsi",
+    "diturunkan", "kerugian", "merugikan", "tuntutannya", "drops", "plunged"
+]
+
+UNRELATED = ["dropship", "dendam", "Saham BBCA naik 5%", "laba bersih meningkat"]
+
+# Derived from a keyword by prefix/suffix, but neutral (KEYWORD_EXCLUSIONS)
+EXCLUDED = ["Keturunan pendiri perusahaan", "Produk turunan CPO diekspor"]
+
+
+@pytest.mark.parametrize("word", INFLECTED)
+def test_inflected_keywords_match(word):
+    assert news_watcher.has_negative_keywords(f"Emiten {word} tahun ini")
+
+
+@pytest.mark.parametrize("text", UNRELATED)
+def test_unrelated_words_do_not_match(text):
+    assert not news_watcher.has_negative_keywords(text)
+
+
+@pytest.mark.parametrize("text", EXCLUDED)
+def test_excluded_derived_words_do_not_match(text):
+    assert not news_watcher.has_negative_keywords(text)
+
+
+def test_excluded_word_does_not_hide_a_real_keyword():
+    assert news_watcher.has_negative_keywords("Saham keturunan pendiri turun tajam")
+
+
+def test_tickers_and_keywords_in_one_pass():
+    matcher = news_watcher.compile_matcher(news_watcher.NEGATIVE_KEYWORDS, ["BBCA.JK"])
+    matches = news_watcher.find_matches("BBCA didenda OJK", matcher)
+    assert [(m["kind"], m["term"]) for m in matches] == [("ticker", "BBCA.JK"), ("keyword", "didenda")]
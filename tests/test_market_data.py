@@ -0,0 +1,40 @@
+"""CachingProvider keys and pass-through"""
+
+import pandas as pd
+
+import market_data
+
+
+class CountingProvider:
+    remote = False
+
+    def __init__(self):
+        self.calls = []
+
+    def fetch(self, tickers, period="1mo", start=None, interval="1d"):
+        self.calls.append((tuple(tickers), period, interval))
+        return {t: pd.DataFrame({"Date": [pd.Timestamp("2026-03-02")], "Close": [1.0], "Interval": [interval]})
+                for t in tickers}
+
+
+def test_cache_keys_include_interval():
+    backend = CountingProvider()
+    provider = market_data.CachingProvider(backend)
+
+    daily = provider.fetch(["BBCA.JK"])
+    weekly = provider.fetch(["BBCA.JK"], interval="1wk")
+    provider.fetch(["BBCA.JK"])
+
+    assert daily["BBCA.JK"]["Interval"].iloc[0] == "1d"
+    assert weekly["BBCA.JK"]["Interval"].iloc[0] == "1wk"
+    assert [call[2] for call in backend.calls] == ["1d", "1wk"]
+
+
+def test_intraday_intervals_bypass_the_cache():
+    backend = CountingProvider()
+    provider = market_data.CachingProvider(backend)
+
+    provider.fetch(["BBCA.JK"], period="1d", interval="5m")
+    provider.fetch(["BBCA.JK"], period="1d", interval="5m")
+
+    assert backend.calls == [(("BBCA.JK",), "1d", "5m")] * 2
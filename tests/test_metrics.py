@@ -0,0 +1,39 @@
+"""Merging metrics recorded in pool workers into the parent run"""
+
+import pickle
+
+import metrics
+import volume_screener
+
+
+def test_merge_adds_counters_histograms_and_slowest():
+    parent = metrics.Run("screener")
+    parent.count("tickers_fetched", 5)
+    parent.note_slow("fetch_ticker", "A.JK", 1.0)
+
+    child = metrics.Run("screener")
+    child.count("tickers_fetched", 3)
+    child.count("fetch_failures")
+    child.observe("external_call", 0.2, service="yahoo")
+    child.note_slow("fetch_ticker", "B.JK", 2.0)
+    parent.merge(pickle.loads(pickle.dumps(child.export())))
+
+    summary = parent.summary()
+    assert {c["name"]: c["value"] for c in summary["counters"]} == {"tickers_fetched": 8, "fetch_failures": 1}
+    assert summary["histograms"][0]["count"] == 1
+    assert [entry["item"] for entry in summary["slowest"]["fetch_ticker"]] == ["B.JK", "A.JK"]
+
+
+def test_shard_metrics_come_back_with_the_result(monkeypatch):
+    def screen_tickers(tickers, watchlist_set, limit=None):
+        metrics.count("tickers_screened", len(tickers))
+        return [], [], []
+
+    monkeypatch.setattr(volume_screener, "screen_tickers", screen_tickers)
+    with metrics.run("screener") as run:
+        result, exported = volume_screener.screen_shard(["A.JK", "B.JK"], set())
+        assert run.counters == {}
+        metrics.merge(exported)
+
+    assert result == ([], [], [])
+    assert run.counters == {("tickers_screened", ()): 2}
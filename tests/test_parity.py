@@ -0,0 +1,15 @@
+"""Backtest and streaming detector against the daily detectors"""
+
+import pytest
+
+import backtest
+import intraday
+import screener_engine
+
+
+@pytest.mark.parametrize("check, bars", [
+    (backtest.check_parity, 40),
+    (intraday.check_parity, 30),
+])
+def test_matches_daily_detectors(check, bars):
+    assert check(screener_engine.synthetic_frames(40, bars=bars)) == []
@@ -0,0 +1,39 @@
+"""Scheduler job wrapper"""
+
+import sys
+
+import pytest
+
+import scheduler
+
+
+@pytest.fixture(autouse=True)
+def quiet(monkeypatch):
+    monkeypatch.setattr(scheduler, "log", lambda msg: None)
+    monkeypatch.setattr(scheduler, "JOB_STATUS", {})
+
+
+def test_job_exit_is_recorded_not_raised(monkeypatch):
+    monkeypatch.setitem(scheduler.JOBS, "broken", lambda: sys.exit(1))
+
+    scheduler.run_job("broken")
+    status = scheduler.JOB_STATUS["broken"]
+    assert status["failures"] == 1
+    assert status["last_error"] == "exited with status 1"
+
+
+def test_clean_exit_counts_as_success(monkeypatch):
+    monkeypatch.setitem(scheduler.JOBS, "done", lambda: sys.exit(0))
+
+    scheduler.run_job("done")
+    assert scheduler.JOB_STATUS["done"]["last_error"] is None
+
+
+def test_screener_ignores_the_schedulers_argv(monkeypatch):
+    called = []
+    monkeypatch.setattr(sys, "argv", ["scheduler.py", "--unexpected"])
+    monkeypatch.setattr(scheduler.volume_screener, "run_screener", lambda: called.append(True) or True)
+
+    scheduler.run_job("screener")
+    assert called == [True]
+    assert scheduler.JOB_STATUS["screener"]["last_error"] is None
@@ -0,0 +1,19 @@
+"""Vectorized engine against the per-ticker daily detectors"""
+
+import pytest
+
+import screener_engine
+
+
+@pytest.mark.parametrize("seed", [7, 11, 23])
+@pytest.mark.parametrize("bars", [15, 21, 30])
+def test_matches_daily_detectors(seed, bars):
+    frames = screener_engine.synthetic_frames(40, bars=bars, seed=seed)
+    assert screener_engine.check_parity(frames) == []
+
+
+def test_subset_of_tickers():
+    frames = screener_engine.synthetic_frames(20)
+    tickers = sorted(frames)[::2]
+    spikes = screener_engine.detect_volume_spikes(frames, tickers)
+    assert set(spikes) <= set(tickers)
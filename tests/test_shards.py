@@ -0,0 +1,80 @@
+"""Sharded screener runs: plan, shard and merge through a shared directory"""
+
+import pytest
+
+import volume_screener
+
+TICKERS = [f"T{i:03d}.JK" for i in range(40)]
+WATCHLIST = {"T001.JK", "T002.JK"}
+
+
+@pytest.fixture
+def screened(tmp_path, monkeypatch):
+    monkeypatch.setattr(volume_screener, "SHARD_RESULTS_DIR", tmp_path)
+    monkeypatch.setattr(volume_screener, "SHARD_WAIT", 0)
+    monkeypatch.setattr(volume_screener, "log", lambda msg: None)
+    monkeypatch.setattr(volume_screener, "get_ticker_universe", lambda: (list(TICKERS), set(WATCHLIST)))
+    calls = []
+
+    def screen_tickers(tickers, watchlist_set, limit=None):
+        calls.append((list(tickers), set(watchlist_set), limit))
+        return [{"ticker": t} for t in tickers], [], [{"ticker": t} for t in tickers if t in watchlist_set]
+
+    monkeypatch.setattr(volume_screener, "screen_tickers", screen_tickers)
+    return calls
+
+
+def tickers_of(result):
+    return [signal["ticker"] for signal in result[0]]
+
+
+def test_merge_takes_shards_finished_before_it_started(screened):
+    volume_screener.plan_run(3, "run")
+    for shard in range(3):
+        assert volume_screener.run_shard(shard, 3, "run")
+
+    result = volume_screener.collect_shards(3, "run")
+    assert tickers_of(result) == sorted(TICKERS)
+    assert [p["ticker"] for p in result[2]] == sorted(WATCHLIST)
+
+
+def test_results_of_an_earlier_plan_are_ignored(screened):
+    volume_screener.plan_run(2, "run")
+    for shard in range(2):
+        volume_screener.run_shard(shard, 2, "run")
+
+    volume_screener.plan_run(2, "run")
+    volume_screener.run_shard(0, 2, "run")
+
+    result = volume_screener.collect_shards(2, "run")
+    assert tickers_of(result) == sorted(volume_screener.partition(TICKERS, 2)[0])
+
+
+def test_shards_read_the_universe_from_the_plan(screened, monkeypatch):
+    volume_screener.plan_run(2, "run")
+
+    def no_database():
+        raise AssertionError("shards must not build the universe themselves")
+
+    monkeypatch.setattr(volume_screener, "get_ticker_universe", no_database)
+    assert volume_screener.run_shard(1, 2, "run")
+    # Uncapped: sharding is how the whole universe gets screened
+    assert screened[-1] == (volume_screener.partition(TICKERS, 2)[1], WATCHLIST, None)
+
+
+def test_nothing_to_merge_without_a_plan(screened):
+    assert not volume_screener.run_shard(0, 2, "run")
+    assert volume_screener.collect_shards(2, "run") is None
+
+
+
+
+def test_limit_caps_a_single_process_run(monkeypatch):
+    monkeypatch.setattr(volume_screener, "log", lambda msg: None)
+    monkeypatch.setattr(volume_screener, "FETCH_MODE", "batch")
+    fetched = []
+    monkeypatch.setattr(volume_screener, "get_ohlcv_batch", lambda tickers: fetched.append(len(tickers)) or {})
+
+    volume_screener.screen_tickers(TICKERS, set(), limit=5)
+    volume_screener.screen_tickers(TICKERS, set(), limit=None)
+    assert fetched == [5, len(TICKERS)]
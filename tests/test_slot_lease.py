@@ -0,0 +1,46 @@
+"""News slot lease: a long scan renews its heartbeat between stages"""
+
+import pytest
+
+import storage
+import news_watcher
+
+
+@pytest.fixture
+def conn(tmp_path):
+    connection = storage.connect(tmp_path / "test.db")
+    yield connection
+    connection.close()
+
+
+def heartbeat_of(conn, slot_id):
+    return conn.execute("SELECT heartbeat_at FROM slot_runs WHERE slot_id = ?", (slot_id,)).fetchone()[0]
+
+
+def test_scan_once_renews_the_lease(conn, monkeypatch):
+    article = {
+        "id": "a1", "title": "BBCA didenda OJK", "description": "", "url": "https://example.com/a1",
+        "source": "Test", "published_at": None
+    }
+    monkeypatch.setattr(news_watcher, "log", lambda msg: None)
+    monkeypatch.setattr(news_watcher, "fetch_sources", lambda sources: ([[article]], {}))
+    monkeypatch.setattr(news_watcher, "send_alerts", lambda conn, articles, slot_name: None)
+    monkeypatch.setattr(news_watcher, "commit_feed_validators", lambda validators: None)
+
+    storage.start_slot_run(conn, "morning", "Morning")
+    conn.execute("UPDATE slot_runs SET heartbeat_at = 0")
+    conn.commit()
+    beats = []
+
+    def classify(stories, heartbeat=None):
+        beats.append(heartbeat_of(conn, "morning"))
+        return ["BAD" for _ in stories]
+
+    monkeypatch.setattr(news_watcher, "classify_articles", classify)
+    _, new, bad = news_watcher.scan_once(conn, ["feed"], [], "Morning", slot_id="morning")
+
+    assert (len(new), len(bad)) == (1, 1)
+    # Renewed after the fetch, before classifying, and again by the end
+    assert beats[0] > 0
+    assert heartbeat_of(conn, "morning") >= beats[0]
+    assert storage.claim_slot_run(conn, "morning", "Morning", news_watcher.SLOT_LEASE) == "running"
@@ -0,0 +1,48 @@
+"""Legacy JSON import against a throwaway database"""
+
+import json
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def legacy(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "LEGACY_WATCHLIST_FILE", tmp_path / "watchlist.json")
+    monkeypatch.setattr(storage, "LEGACY_STATE_FILE", tmp_path / "state.json")
+    monkeypatch.setattr(storage, "DB_FILE", tmp_path / "test.db")
+    return tmp_path
+
+
+def migrated(conn):
+    return conn.execute("SELECT value FROM meta WHERE key = 'legacy_migrated'").fetchone() is not None
+
+
+def test_imports_watchlist_and_state(legacy):
+    (legacy / "watchlist.json").write_text(json.dumps({"1": ["BBCA.JK", "TLKM.JK"]}))
+    (legacy / "state.json").write_text(json.dumps({"seen": ["a", "b"], "last_slot": "2026-01-05_07"}))
+
+    conn = storage.connect()
+
+    assert storage.load_watchlists(conn) == {"1": ["BBCA.JK", "TLKM.JK"]}
+    assert conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0] == 2
+    assert migrated(conn)
+
+
+def test_corrupt_file_is_skipped_and_retried(legacy):
+    (legacy / "watchlist.json").write_text("{")
+    (legacy / "state.json").write_text(json.dumps({"seen": ["a"]}))
+
+    conn = storage.connect()
+
+    assert storage.load_watchlists(conn) == {}
+    assert conn.execute("SELECT COUNT(*) FROM seen").fetchone()[0] == 1
+    assert not migrated(conn)
+
+    (legacy / "watchlist.json").write_text(json.dumps({"1": ["BBCA.JK"]}))
+    conn.close()
+    conn = storage.connect()
+
+    assert storage.load_watchlists(conn) == {"1": ["BBCA.JK"]}
+    assert migrated(conn)
@@ -0,0 +1,103 @@
+"""TelegramSender against a local fake Bot API server"""
+
+import time
+
+import pytest
+
+import telegram_sender
+from telegram_sender import TelegramSender, split_message, MAX_MESSAGE_LENGTH
+from fake_bot_api import FakeBotAPI, html_error
+
+
+@pytest.fixture
+def api():
+    with FakeBotAPI() as server:
+        yield server
+
+
+@pytest.fixture
+def sender(api, monkeypatch):
+    # No real backoff between retries
+    monkeypatch.setattr(telegram_sender.random, "uniform", lambda low, high: 0)
+    client = TelegramSender(token="TEST", api_url=api.url, rate=1000, chat_rate=1000, workers=4)
+    yield client
+    client.close()
+
+
+def test_send_delivers_html(api, sender):
+    assert sender.send("42", "<b>BBCA</b> didenda")
+    assert [(m["chat_id"], m["text"], m["parse_mode"]) for m in api.messages] == [("42", "<b>BBCA</b> didenda", "HTML")]
+
+
+def test_429_waits_retry_after_then_succeeds(api, sender):
+    api.queue(429, {"ok": False, "error_code": 429, "parameters": {"retry_after": 1}})
+
+    started = time.monotonic()
+    assert sender.send("42", "hello")
+    assert time.monotonic() - started >= 1
+    assert len(api.requests) == 2
+    assert len(api.messages) == 1
+
+
+def test_5xx_is_retried(api, sender):
+    api.queue(502, {"ok": False})
+    api.queue(500, {"ok": False})
+
+    assert sender.send("42", "hello")
+    assert len(api.requests) == 3
+    assert len(api.messages) == 1
+
+
+def test_5xx_gives_up_after_retries(api, sender):
+    for _ in range(telegram_sender.TELEGRAM_RETRIES + 1):
+        api.queue(503, {"ok": False})
+
+    assert not sender.send("42", "hello")
+    assert len(api.requests) == telegram_sender.TELEGRAM_RETRIES + 1
+    assert api.messages == []
+
+
+def test_4xx_is_not_retried(api, sender):
+    api.queue(403, {"ok": False, "description": "Forbidden: bot was blocked by the user"})
+
+    assert not sender.send("42", "hello")
+    assert len(api.requests) == 1
+
+
+def test_oversize_message_is_split_and_accepted(api, sender):
+    lines = [f"<b>T{i:04d}.JK</b> volume <i>{i}x</i> &amp; naik" for i in range(400)]
+    text = "\n".join(lines)
+    assert len(text) > 2 * MAX_MESSAGE_LENGTH
+
+    assert sender.send("42", text)
+    assert len(api.messages) >= 3
+    assert all(len(m["text"]) <= MAX_MESSAGE_LENGTH for m in api.messages)
+    # Nothing lost or duplicated across the parts
+    assert "\n".join(m["text"] for m in api.messages) == text
+
+
+def test_split_rebalances_open_tags():
+    body = "<b>Laporan <i>" + " ".join(f"kata{i}" for i in range(2000)) + "</i> selesai</b>"
+    parts = split_message(body, limit=1000)
+
+    assert len(parts) > 1
+    for part in parts:
+        assert len(part) <= 1000
+        assert html_error(part) is None
+    assert parts[0].startswith("<b>Laporan <i>") and parts[0].endswith("</i></b>")
+    assert parts[1].startswith("<b><i>")
+
+
+def test_split_never_cuts_tags_or_entities():
+    body = "x" * 990 + '<a href="https://example.com/berita">link</a> &amp; ' + "y" * 50
+    for part in split_message(body, limit=1000):
+        assert html_error(part) is None
+        assert part.count("&amp;") == part.count("&")
+
+
+def test_send_many_keeps_each_chats_order(api, sender):
+    messages = [(chat, f"{chat}-{i}") for i in range(5) for chat in ("1", "2", "3")]
+
+    assert sender.send_many(messages) == len(messages)
+    for chat in ("1", "2", "3"):
+        assert [m["text"] for m in api.messages if m["chat_id"] == chat] == [f"{chat}-{i}" for i in range(5)]
@@ -0,0 +1,412 @@
+#!/usr/bin/env python3
+"""
+Local Verdict Model
+A small logistic regression over hashed word n-grams, trained on the
+BAD/OK verdicts Ollama has already written to verdicts.jsonl. The news
+scanner asks it first and only sends articles it is unsure about to
+Ollama. Thresholds are chosen on held-out verdicts so that confident
+decisions agree with Ollama at least VERDICT_MODEL_TARGET of the time
+and almost no BAD article is waved through as OK.
+
+Once the model is live only uncertain articles reach Ollama, so the
+scanner also sends a random VERDICT_MODEL_AUDIT share of confident ones
+and logs them with weight 1 / share. Training and calibration weight
+records by it, so later retrains still see the full article mix.
+
+Usage:
+    python verdict_model.py train [--log FILE] [--model FILE]    Fit on the verdict log and save
+    python verdict_model.py evaluate [--log FILE]                Agreement and LLM calls avoided on a time split
+    python verdict_model.py predict "title" ["description"]      Score one article with the saved model
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import zlib
+import argparse
+from pathlib import Path
+import numpy as np
+
+VERDICT_LOG = Path("/opt/indo_badnews/verdicts.jsonl")
+VERDICT_MODEL_FILE = Path(os.getenv("VERDICT_MODEL_FILE", "/opt/indo_badnews/verdict_model.npz"))
+VERDICT_MODEL_TARGET = float(os.getenv("VERDICT_MODEL_TARGET", "0.97"))
+VERDICT_MODEL_MIN_RECORDS = int(os.getenv("VERDICT_MODEL_MIN_RECORDS", "200"))
+
+DIM = 2 ** 18
+ITERATIONS = 300
+LEARNING_RATE = 0.5
+L2 = 1e-6
+# Fewer confident held-out articles than this on a side and that side stays off
+MIN_CONFIDENT = 10
+
+TOKEN_RE = re.compile(r"\w+")
+TAG_RE = re.compile(r"<[^>]+>")
+
+
+def feature_ids(title, description):
+    """Hashed unigram and bigram ids; title words get their own features"""
+    ids = set()
+    for prefix, text in (("t", title), ("d", description)):
+        words = TOKEN_RE.findall(TAG_RE.sub(" ", text or "").lower())
+        for idx, word in enumerate(words):
+            ids.add(zlib.crc32(f"{prefix}:{word}".encode()) & (DIM - 1))
+            if idx:
+                ids.add(zlib.crc32(f"{prefix}:{words[idx - 1]} {word}".encode()) & (DIM - 1))
+    return ids
+
+
+def featurize(records):
+    """
+    Sparse L2-normalised binary features for records with title/description.
+    Returns: (rows, indices, values) in coordinate form
+    """
+    rows = []
+    indices = []
+    values = []
+
+    for row, record in enumerate(records):
+        ids = feature_ids(record.get("title", ""), record.get("description", ""))
+        if not ids:
+            continue
+        weight = 1 / len(ids) ** 0.5
+        rows.extend([row] * len(ids))
+        indices.extend(ids)
+        values.extend([weight] * len(ids))
+
+    return np.array(rows, dtype=np.int64), np.array(indices, dtype=np.int64), np.array(values)
+
+
+def fit(records, iterations=ITERATIONS):
+    """
+    Full-batch AdaGrad on class-balanced logistic loss.
+    Returns: (weights, bias)
+    """
+    n = len(records)
+    rows, indices, values = featurize(records)
+    y = np.array([record["verdict"] == "BAD" for record in records], dtype=float)
+
+    record_weight = weights_of(records)
+    positives = (record_weight * y).sum()
+    negatives = record_weight.sum() - positives
+    sample_weight = record_weight * np.where(y == 1, n / (2 * max(positives, 1)), n / (2 * max(negatives, 1)))
+
+    weights = np.zeros(DIM)
+    bias = 0.0
+    grad_sq = np.zeros(DIM)
+    bias_sq = 0.0
+
+    for _ in range(iterations):
+        scores = np.bincount(rows, weights=weights[indices] * values, minlength=n) + bias
+        error = (1 / (1 + np.exp(-scores)) - y) * sample_weight / n
+
+        grad = np.bincount(indices, weights=values * error[rows], minlength=DIM) + L2 * weights
+        grad_sq += grad ** 2
+        weights -= LEARNING_RATE * grad / (np.sqrt(grad_sq) + 1e-8)
+
+        bias_grad = error.sum()
+        bias_sq += bias_grad ** 2
+        bias -= LEARNING_RATE * bias_grad / (bias_sq ** 0.5 + 1e-8)
+
+    return weights, bias
+
+
+def predict_many(weights, bias, records):
+    """Probability of BAD for each record"""
+    rows, indices, values = featurize(records)
+    scores = np.bincount(rows, weights=weights[indices] * values, minlength=len(records)) + bias
+    return 1 / (1 + np.exp(-scores))
+
+
+def ok_side(probs, is_bad, weights, target, limit):
+    """
+    Loosest OK threshold among scores below `limit` (probs sorted
+    ascending): confident OK must agree `target` of the time and let
+    through at most 1 - target of the BAD weight.
+    """
+    ok_weight = np.cumsum(weights * ~is_bad)
+    missed_bad = np.cumsum(weights * is_bad)
+    total = np.cumsum(weights)
+    allowed_missed = (1 - target) * missed_bad[-1]
+
+    for count in range(np.searchsorted(probs, limit), MIN_CONFIDENT - 1, -1):
+        if ok_weight[count - 1] >= target * total[count - 1] and missed_bad[count - 1] <= allowed_missed:
+            return float(probs[count - 1])
+    return -1.0
+
+
+def bad_side(probs, is_bad, weights, target, limit):
+    """Loosest BAD threshold among scores above `limit` agreeing `target` of the time"""
+    bad_weight = np.cumsum((weights * is_bad)[::-1])
+    total = np.cumsum(weights[::-1])
+
+    for count in range(len(probs) - np.searchsorted(probs, limit, side="right"), MIN_CONFIDENT - 1, -1):
+        if bad_weight[count - 1] >= target * total[count - 1]:
+            return float(probs[len(probs) - count])
+    return 2.0
+
+
+def choose_thresholds(probs, labels, target=VERDICT_MODEL_TARGET, weights=None):
+    """
+    (ok, bad) thresholds for held-out data: p <= ok is OK, p >= bad is
+    BAD. Each side is the loosest one whose decisions agree with the
+    labels at least `target` of the time; calling bad news OK is the
+    costly mistake, so the OK side may also let through at most
+    1 - target of the BAD articles. The sides are chosen together so they
+    never cross: one is picked first and the other is confined to the
+    scores left over, keeping whichever order decides more articles.
+    A side without enough evidence is disabled (ok = -1, bad = 2).
+    """
+    order = np.argsort(probs)
+    probs = np.asarray(probs)[order]
+    is_bad = np.asarray(labels)[order]
+    weights = np.ones(len(probs)) if weights is None else np.asarray(weights, dtype=float)[order]
+
+    def decided(ok, bad):
+        return weights[probs <= ok].sum() + weights[probs >= bad].sum()
+
+    bad_first = bad_side(probs, is_bad, weights, target, -1.0)
+    bad_first = (ok_side(probs, is_bad, weights, target, bad_first), bad_first)
+    ok_first = ok_side(probs, is_bad, weights, target, 2.0)
+    ok_first = (ok_first, bad_side(probs, is_bad, weights, target, ok_first))
+
+    return max(bad_first, ok_first, key=lambda pair: decided(*pair))
+
+
+class VerdictModel:
+    """Saved weights plus the thresholds for confident decisions"""
+
+    def __init__(self, weights, bias, ok_threshold, bad_threshold, meta=None):
+        self.weights = weights
+        self.bias = bias
+        self.ok_threshold = ok_threshold
+        self.bad_threshold = bad_threshold
+        self.meta = meta or {}
+
+    def probability(self, title, description):
+        ids = list(feature_ids(title, description))
+        if not ids:
+            return 1 / (1 + np.exp(-self.bias))
+        score = self.weights[ids].sum() / len(ids) ** 0.5 + self.bias
+        return 1 / (1 + np.exp(-score))
+
+    def decide(self, title, description):
+        """BAD or OK when confident, else None (ask Ollama)"""
+        p = self.probability(title, description)
+        if p >= self.bad_threshold:
+            return "BAD"
+        if p <= self.ok_threshold:
+            return "OK"
+        return None
+
+    def save(self, path=VERDICT_MODEL_FILE):
+        path = Path(path)
+        tmp = path.with_name(path.name + ".tmp.npz")
+        np.savez_compressed(
+            tmp,
+            weights=self.weights.astype(np.float32),
+            bias=self.bias,
+            thresholds=np.array([self.ok_threshold, self.bad_threshold]),
+            meta=json.dumps(self.meta)
+        )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path=VERDICT_MODEL_FILE):
+        with np.load(path) as data:
+            ok, bad = data["thresholds"]
+            return cls(
+                data["weights"].astype(float), float(data["bias"]), float(ok), float(bad),
+                json.loads(str(data["meta"]))
+            )
+
+
+_loaded = {"mtime": None, "model": None}
+
+
+def get_model(path=VERDICT_MODEL_FILE):
+    """Saved model, reloaded when the file changes; None if there is none"""
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+
+    if mtime != _loaded["mtime"]:
+        try:
+            _loaded["model"] = VerdictModel.load(path)
+        except Exception as e:
+            print(f"⚠️  Could not load verdict model {path}: {e}")
+            _loaded["model"] = None
+        _loaded["mtime"] = mtime
+    return _loaded["model"]
+
+
+def load_records(path=VERDICT_LOG):
+    """Latest verdict per key from the log, oldest first (none before the first scan)"""
+    latest = {}
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            if record.get("verdict") in ("BAD", "OK"):
+                latest.pop(record["key"], None)
+                latest[record["key"]] = record
+    return sorted(latest.values(), key=lambda record: record.get("at", 0))
+
+
+def labels_of(records):
+    return np.array([record["verdict"] == "BAD" for record in records])
+
+
+def weights_of(records):
+    """How many articles each record stands for (audited ones stand for 1 / share)"""
+    return np.array([float(record.get("weight", 1.0)) for record in records])
+
+
+def decisions(model, records):
+    """(verdicts the model is confident about or None, per record)"""
+    return [model.decide(record.get("title", ""), record.get("description", "")) for record in records]
+
+
+def build(fit_records, calibrate_records, target=VERDICT_MODEL_TARGET):
+    """
+    Fit on fit_records and choose thresholds on calibrate_records. The
+    model returned is the one the thresholds were validated on.
+    """
+    weights, bias = fit(fit_records)
+    probs = predict_many(weights, bias, calibrate_records)
+    ok, bad = choose_thresholds(probs, labels_of(calibrate_records), target, weights_of(calibrate_records))
+    return VerdictModel(weights, bias, ok, bad)
+
+
+def score(model, records):
+    """
+    Weighted share of records decided and agreement on those, plus the
+    decisions themselves.
+    Returns: report dict
+    """
+    started = time.perf_counter()
+    verdicts = decisions(model, records)
+    per_article = (time.perf_counter() - started) / max(len(records), 1)
+
+    labels = ["BAD" if is_bad else "OK" for is_bad in labels_of(records)]
+    weights = weights_of(records)
+    decided = [(verdict, label, w) for verdict, label, w in zip(verdicts, labels, weights) if verdict]
+    decided_weight = sum(w for _, _, w in decided)
+    agree = sum(w for verdict, label, w in decided if verdict == label)
+
+    return {
+        "decided": len(decided),
+        "llm_calls_avoided": round(decided_weight / max(weights.sum(), 1e-9), 4),
+        "agreement": round(agree / decided_weight, 4) if decided else None,
+        "missed_bad": sum(verdict == "OK" and label == "BAD" for verdict, label, _ in decided),
+        "false_bad": sum(verdict == "BAD" and label == "OK" for verdict, label, _ in decided),
+        "us_per_article": round(per_article * 1e6, 1)
+    }
+
+
+def train(records, target=VERDICT_MODEL_TARGET):
+    """
+    Fit on the oldest 80% and choose thresholds on the newest 20%; that
+    exact model is what ships, with its calibration scores in meta.
+    """
+    split = int(len(records) * 0.8)
+    model = build(records[:split], records[split:], target)
+    calibration = score(model, records[split:])
+
+    model.meta = {
+        "records": len(records),
+        "bad_share": round(float(labels_of(records).mean()), 4),
+        "target": target,
+        "calibration_agreement": calibration["agreement"],
+        "calibration_decided": calibration["llm_calls_avoided"],
+        "trained_at": int(time.time())
+    }
+    return model
+
+
+def evaluate(records, target=VERDICT_MODEL_TARGET):
+    """
+    Run train()'s procedure on older data and measure it on newer: fit
+    on the oldest 60%, choose thresholds on the next 20%, score the
+    newest 20%.
+    Returns: report dict
+    """
+    fit_end = int(len(records) * 0.6)
+    calibrate_end = int(len(records) * 0.8)
+    test = records[calibrate_end:]
+
+    model = build(records[:fit_end], records[fit_end:calibrate_end], target)
+    probs = predict_many(model.weights, model.bias, test)
+
+    return {
+        "records": len(records),
+        "test": len(test),
+        "thresholds": {"ok": round(model.ok_threshold, 4), "bad": round(model.bad_threshold, 4)},
+        **score(model, test),
+        "accuracy_at_0_5": round(float(((probs >= 0.5) == labels_of(test)).mean()), 4) if len(test) else None
+    }
+
+
+def check_size(records):
+    """Exit with status 2 while the log is too small to train on (the weekly timer treats that as success)"""
+    bad = int(labels_of(records).sum()) if records else 0
+    if len(records) < VERDICT_MODEL_MIN_RECORDS or bad == 0 or bad == len(records):
+        print(f"⚠️  Need at least {VERDICT_MODEL_MIN_RECORDS} verdicts with both BAD and OK "
+              f"(have {len(records)}, {bad} BAD)")
+        sys.exit(2)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local BAD/OK model distilled from Ollama verdicts")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    for name in ("train", "evaluate"):
+        command = sub.add_parser(name)
+        command.add_argument("--log", default=str(VERDICT_LOG), help="Verdict log (verdicts.jsonl)")
+        command.add_argument("--target", type=float, default=VERDICT_MODEL_TARGET,
+                             help="Required agreement with Ollama on confident decisions")
+        if name == "train":
+            command.add_argument("--model", default=str(VERDICT_MODEL_FILE), help="Where to save the model")
+
+    predict = sub.add_parser("predict")
+    predict.add_argument("title")
+    predict.add_argument("description", nargs="?", default="")
+
+    args = parser.parse_args()
+
+    if args.command == "predict":
+        model = get_model()
+        if model is None:
+            print(f"❌ No model at {VERDICT_MODEL_FILE}, run: python verdict_model.py train")
+            sys.exit(1)
+        p = model.probability(args.title, args.description)
+        print(f"P(BAD) = {p:.3f} → {model.decide(args.title, args.description) or 'ask Ollama'}")
+        return
+
+    records = load_records(args.log)
+    check_size(records)
+
+    if args.command == "evaluate":
+        report = evaluate(records, args.target)
+        print(json.dumps(report, indent=2))
+        print(f"✓ {report['llm_calls_avoided'] * 100:.1f}% of LLM calls avoided, "
+              f"{(report['agreement'] or 0) * 100:.1f}% agreement with Ollama on those")
+        return
+
+    model = train(records, args.target)
+    model.save(args.model)
+    ok = f"≤ {model.ok_threshold:.3f}" if model.ok_threshold >= 0 else "off"
+    bad = f"≥ {model.bad_threshold:.3f}" if model.bad_threshold <= 1 else "off"
+    print(f"✓ Trained on {len(records)} verdicts; OK if P(BAD) {ok}, BAD if {bad}; saved to {args.model}")
+    print(f"   Held-out: {(model.meta['calibration_decided'] or 0) * 100:.1f}% decided, "
+          f"{(model.meta['calibration_agreement'] or 0) * 100:.1f}% agreement")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,24 +6,49 @@ Runs Mon-Fri at 16:20 WIB (09:20 UTC).
 """
 
 import os
+import sys
 import json
-import yfinance as yf
+import time
+import random
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 from dotenv import load_dotenv
 import pytz
+import storage
+import bar_store
+import market_data
+import screener_engine
+from screener_engine import (
+    SPIKE_WINDOW, SPIKE_MIN_PAST, SPIKE_RATIO, SPIKE_PRICE, FOLLOW_BARS, FOLLOW_MIN_BARS, FOLLOW_VOLUME,
+    PATTERN_PRICE, PATTERN_VOLUME, PATTERN_WINDOW, MAX_PATTERNS
+)
+import fanout
+import telegram_sender
+import metrics
+from rate_limit import RateLimiter
 
 load_dotenv()
 
-TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
-MAX_TICKERS_PER_RUN = int(os.getenv("MAX_TICKERS_PER_RUN", "120"))
+MAX_TICKERS_PER_RUN = int(os.getenv("MAX_TICKERS_PER_RUN", "1000"))
+USE_BAR_STORE = os.getenv("USE_BAR_STORE", "1") == "1"
+FETCH_MODE = os.getenv("FETCH_MODE", "batch")  # batch | concurrent
+FETCH_WORKERS = int(os.getenv("FETCH_WORKERS", "8"))
+FETCH_RATE = float(os.getenv("FETCH_RATE", "4"))  # requests per second
+FETCH_TIMEOUT = int(os.getenv("FETCH_TIMEOUT", "15"))
+FETCH_RETRIES = int(os.getenv("FETCH_RETRIES", "3"))
+SCREENER_SHARDS = os.getenv("SCREENER_SHARDS", "1")  # number of processes, or "auto" for one per core
+SCREENER_SHARDS = (os.cpu_count() or 1) if SCREENER_SHARDS == "auto" else int(SCREENER_SHARDS)
+SHARD_RESULTS_DIR = Path(os.getenv("SHARD_RESULTS_DIR", "/opt/indo_badnews/shards"))
+SHARD_WAIT = int(os.getenv("SHARD_WAIT", "600"))
 
-WATCHLIST_FILE = Path("/opt/indo_badnews/watchlist.json")
 IHSG_FILE = Path("/opt/indo_badnews/ihsg_tickers.txt")
 SCREENER_FILE = Path("/opt/indo_badnews/screener_tickers.txt")
 
 WIB = pytz.timezone("Asia/Jakarta")
+REPORT_LIMIT = 10
 
 
 def log(msg):
@@ -32,39 +57,18 @@ def log(msg):
     print(f"[{now_wib}] {msg}")
 
 
-def send_telegram(text):
-    """Send message to Telegram"""
-    import requests
-
-    if not TELEGRAM_BOT_TOKEN or not TELEGRAM_CHAT_ID:
-        log("⚠️  Telegram not configured, skipping send")
-        return
-
-    url = f"https://api.telegram.org/bot{TELEGRAM_BOT_TOKEN}/sendMessage"
-    payload = {
-        "chat_id": TELEGRAM_CHAT_ID,
-        "text": text,
-        "parse_mode": "HTML",
-        "disable_web_page_preview": True
-    }
-
-    try:
-        response = requests.post(url, json=payload, timeout=10)
-        response.raise_for_status()
-    except Exception as e:
-        log(f"❌ Telegram send failed: {e}")
+def send_telegram(text, chat_id=None):
+    """Send message to Telegram (TELEGRAM_CHAT_ID unless chat_id is given)"""
+    return telegram_sender.get_sender().send(chat_id or TELEGRAM_CHAT_ID, text)
 
 
 def load_watchlist():
     """Load all tickers from all chats"""
-    if WATCHLIST_FILE.exists():
-        with open(WATCHLIST_FILE, "r") as f:
-            data = json.load(f)
-            tickers = set()
-            for chat_id, chat_tickers in data.items():
-                tickers.update(chat_tickers)
-            return list(tickers)
-    return []
+    conn = storage.connect()
+    try:
+        return storage.all_tickers(conn)
+    finally:
+        conn.close()
 
 
 def load_ticker_file(filepath):
@@ -97,24 +101,159 @@ def get_ticker_universe():
     tickers.update(screener)
     log(f"✓ Screener file: {len(screener)} tickers")
 
-    return list(tickers), set(watchlist)
+    # Sorted so the MAX_TICKERS_PER_RUN cut and the shards are the same every run
+    return sorted(tickers), set(watchlist)
 
 
 def get_ohlcv_data(ticker, period="1mo"):
-    """Fetch OHLCV data from Yahoo Finance"""
+    """Fetch OHLCV data, served from the local bar store when enabled"""
+    if use_bar_store():
+        return get_ohlcv_batch([ticker], period=period).get(ticker)
+
     try:
-        stock = yf.Ticker(ticker)
-        df = stock.history(period=period)
+        return market_data.get_provider().fetch_one(ticker, period=period)
+    except Exception as e:
+        log(f"❌ Failed to fetch {ticker}: {e}")
+        return None
 
-        if df.empty:
-            return None
 
-        df = df.reset_index()
+def use_bar_store():
+    """The bar store only caches remote providers; local replay is read directly"""
+    return USE_BAR_STORE and market_data.get_provider().remote
+
+
+def get_ohlcv_batch(tickers, period="1mo"):
+    """
+    Fetch OHLCV data for many tickers.
+    With the bar store enabled only the missing tail of each ticker is
+    downloaded; everything else is read from disk.
+    Returns: {ticker: DataFrame}
+    """
+    provider = market_data.get_provider()
+    if not use_bar_store():
+        return provider.fetch(tickers, period=period)
+
+    conn = bar_store.open_store()
+    try:
+        plan = bar_store.plan_fetch(conn, tickers, period=period)
+        stale = sum(len(group) for group in plan.values())
+        log(f"📦 Bar store: {len(tickers) - stale} fresh, {stale} to update")
+
+        for start, group in plan.items():
+            fetched = provider.fetch(group, period=period, start=start)
+            changed = bar_store.rebased(conn, fetched) if start else []
+            if changed:
+                log(f"♻️  {len(changed)} ticker(s) re-adjusted by Yahoo, refetching full history")
+                bar_store.drop_tickers(conn, changed)
+                fetched.update(provider.fetch(changed, period=period))
+            saved = bar_store.save_bars(conn, fetched)
+            log(f"📦 Stored {saved} bars for {len(fetched)} ticker(s) (from {start or period})")
+
+        bar_store.prune(conn)
+        return bar_store.load_bars(conn, tickers, period=period)
+    finally:
+        conn.close()
+
+
+def fetch_ticker(ticker, limiter, period="1mo", start=None):
+    """
+    Fetch one ticker with rate limiting, a request timeout and jittered
+    backoff. Only errors are retried: an empty result (e.g. a delisted
+    ticker) is final.
+    """
+    provider = market_data.get_provider()
+    started = time.perf_counter()
+
+    for attempt in range(FETCH_RETRIES + 1):
+        if attempt > 0:
+            metrics.count("fetch_retries")
+            time.sleep(random.uniform(0, 2 ** attempt))
+
+        if provider.remote:
+            limiter.acquire()
+        try:
+            df = provider.fetch_one(ticker, period=period, start=start, timeout=FETCH_TIMEOUT)
+        except Exception as e:
+            if attempt == FETCH_RETRIES:
+                log(f"❌ Failed to fetch {ticker}: {e}")
+            continue
+
+        if df is None:
+            log(f"⚠️  No data for {ticker}")
+            metrics.count("fetch_empty")
+        metrics.note_slow("fetch_ticker", ticker, time.perf_counter() - started)
         return df
 
-    except Exception as e:
-        log(f"❌ Failed to fetch {ticker}: {e}")
-        return None
+    metrics.count("fetch_failures")
+    metrics.note_slow("fetch_ticker", ticker, time.perf_counter() - started)
+    return None
+
+
+def fetch_concurrent(requests, period="1mo"):
+    """
+    Fetch (ticker, start) requests on a bounded worker pool.
+    Yields (ticker, DataFrame or None) in completion order.
+    """
+    limiter = RateLimiter(FETCH_RATE, burst=FETCH_WORKERS)
+
+    with ThreadPoolExecutor(max_workers=FETCH_WORKERS) as pool:
+        futures = {
+            pool.submit(fetch_ticker, ticker, limiter, period, start): ticker
+            for ticker, start in requests
+        }
+        for future in as_completed(futures):
+            yield futures[future], future.result()
+
+
+def iter_ohlcv(tickers, period="1mo"):
+    """
+    Yield (ticker, DataFrame) as soon as each ticker's data is ready.
+    Fresh tickers come straight from the bar store; the rest are fetched
+    concurrently and stored as they arrive. Tickers Yahoo re-adjusted
+    since the last fetch are refetched in full afterwards.
+    """
+    if not use_bar_store():
+        for ticker, df in fetch_concurrent([(t, None) for t in tickers], period=period):
+            if df is not None:
+                yield ticker, df
+        return
+
+    conn = bar_store.open_store()
+    try:
+        plan = bar_store.plan_fetch(conn, tickers, period=period)
+        stale = {ticker: start for start, group in plan.items() for ticker in group}
+        log(f"📦 Bar store: {len(tickers) - len(stale)} fresh, {len(stale)} to update")
+
+        fresh = [t for t in tickers if t not in stale]
+        yield from bar_store.load_bars(conn, fresh, period=period).items()
+
+        changed = []
+        for ticker, df in fetch_concurrent(list(stale.items()), period=period):
+            if df is None:
+                continue
+            if stale[ticker] and bar_store.rebased(conn, {ticker: df}):
+                changed.append(ticker)
+                continue
+
+            bar_store.save_bars(conn, {ticker: df})
+            frame = bar_store.load_bars(conn, [ticker], period=period).get(ticker)
+            if frame is not None:
+                yield ticker, frame
+
+        if changed:
+            log(f"♻️  {len(changed)} ticker(s) re-adjusted by Yahoo, refetching full history")
+            bar_store.drop_tickers(conn, changed)
+            for ticker, df in fetch_concurrent([(t, None) for t in changed], period=period):
+                if df is None:
+                    continue
+                bar_store.save_bars(conn, {ticker: df})
+                frame = bar_store.load_bars(conn, [ticker], period=period).get(ticker)
+                if frame is not None:
+                    yield ticker, frame
+
+        bar_store.prune(conn)
+    finally:
+        conn.close()
 
 
 def detect_volume_spike(df):
@@ -122,10 +261,10 @@ def detect_volume_spike(df):
     Detect 3x volume spike with classification.
     Returns: (spike_date, spike_volume, avg_volume, close_price, prev_close, classification)
     """
-    if len(df) < 21:
+    if len(df) < SPIKE_WINDOW:
         return None
 
-    recent = df.tail(21).copy()
+    recent = df.tail(SPIKE_WINDOW).copy()
     recent = recent.reset_index(drop=True)
 
     for i in range(len(recent) - 1, 0, -1):
@@ -136,24 +275,24 @@ def detect_volume_spike(df):
         prev_close = prev_row["Close"]
         current_close = current_row["Close"]
 
-        past_20 = recent.iloc[max(0, i - 20):i]
-        if len(past_20) < 5:
+        past_20 = recent.iloc[max(0, i - (SPIKE_WINDOW - 1)):i]
+        if len(past_20) < SPIKE_MIN_PAST:
             continue
 
         avg_volume = past_20["Volume"].mean()
 
-        if current_volume >= 3 * avg_volume and current_close >= prev_close * 1.02:
+        if current_volume >= SPIKE_RATIO * avg_volume and current_close >= prev_close * SPIKE_PRICE:
             future_candles = recent.iloc[i + 1:]
 
             if len(future_candles) == 0:
                 classification = "WAIT"
             else:
-                future_5 = future_candles.head(5)
+                future_5 = future_candles.head(FOLLOW_BARS)
 
-                if len(future_5) < 3:
+                if len(future_5) < FOLLOW_MIN_BARS:
                     classification = "WAIT"
                 else:
-                    high_volume_count = (future_5["Volume"] > current_volume * 0.6).sum()
+                    high_volume_count = (future_5["Volume"] > current_volume * FOLLOW_VOLUME).sum()
 
                     if high_volume_count > 0:
                         classification = "WAIT"
@@ -182,7 +321,7 @@ def detect_watchlist_patterns(df):
         return []
 
     patterns = []
-    recent = df.tail(10)
+    recent = df.tail(PATTERN_WINDOW)
 
     for i in range(1, len(recent)):
         current = recent.iloc[i]
@@ -191,7 +330,7 @@ def detect_watchlist_patterns(df):
         price_change = ((current["Close"] - prev["Close"]) / prev["Close"]) * 100
         volume_change = ((current["Volume"] - prev["Volume"]) / prev["Volume"]) * 100
 
-        if price_change >= 1 and volume_change <= -30:
+        if price_change >= PATTERN_PRICE and volume_change <= -PATTERN_VOLUME:
             patterns.append({
                 "date": current["Date"].strftime("%Y-%m-%d"),
                 "type": "Price↑ Volume↓",
@@ -200,7 +339,7 @@ def detect_watchlist_patterns(df):
                 "close": current["Close"]
             })
 
-        elif price_change <= -1 and volume_change >= 30:
+        elif price_change <= -PATTERN_PRICE and volume_change >= PATTERN_VOLUME:
             patterns.append({
                 "date": current["Date"].strftime("%Y-%m-%d"),
                 "type": "Price↓ Volume↑",
@@ -209,33 +348,25 @@ def detect_watchlist_patterns(df):
                 "close": current["Close"]
             })
 
-    return patterns[-3:]
-
-
-def main():
-    log("=== Indonesian Volume Screener ===")
-
-    tickers, watchlist_set = get_ticker_universe()
-
-    if len(tickers) > MAX_TICKERS_PER_RUN:
-        log(f"⚠️  Limiting to {MAX_TICKERS_PER_RUN} tickers (from {len(tickers)})")
-        tickers = tickers[:MAX_TICKERS_PER_RUN]
+    return patterns[-MAX_PATTERNS:]
 
-    log(f"✓ Total tickers to screen: {len(tickers)}")
 
+def screen_frames(frames, tickers, watchlist_set):
+    """
+    Run the detectors on frames for the given tickers.
+    Returns: (setup_spikes, wait_spikes, watchlist_patterns)
+    """
     spikes_setup = []
     spikes_wait = []
     watchlist_patterns = []
 
-    for idx, ticker in enumerate(tickers, 1):
-        if idx % 20 == 0:
-            log(f"⏳ Processing {idx}/{len(tickers)}...")
+    spikes = screener_engine.detect_volume_spikes(frames, tickers)
+    patterns_by_ticker = screener_engine.detect_patterns(
+        frames, [t for t in tickers if t in watchlist_set]
+    )
 
-        df = get_ohlcv_data(ticker)
-        if df is None:
-            continue
-
-        spike = detect_volume_spike(df)
+    for ticker in tickers:
+        spike = spikes.get(ticker)
         if spike:
             spike["ticker"] = ticker
 
@@ -245,66 +376,419 @@ def main():
             else:
                 spikes_wait.append(spike)
 
-        if ticker in watchlist_set:
-            patterns = detect_watchlist_patterns(df)
-            for pattern in patterns:
-                pattern["ticker"] = ticker
-                watchlist_patterns.append(pattern)
-                log(f"⚠️  Pattern: {ticker} - {pattern['type']}")
+        for pattern in patterns_by_ticker.get(ticker, []):
+            pattern["ticker"] = ticker
+            watchlist_patterns.append(pattern)
+            log(f"⚠️  Pattern: {ticker} - {pattern['type']}")
 
-    log("✓ Screening complete")
+    return spikes_setup, spikes_wait, watchlist_patterns
 
-    log(f"📊 SETUP spikes: {len(spikes_setup)}")
-    log(f"⏳ WAIT spikes: {len(spikes_wait)}")
-    log(f"⚠️  Watchlist patterns: {len(watchlist_patterns)}")
 
+def format_spike(spike):
+    """Render one SETUP spike for a report"""
+    ticker_clean = spike["ticker"].replace(".JK", "")
+    price_change = ((spike["close"] - spike["prev_close"]) / spike["prev_close"]) * 100
+    volume_ratio = spike["spike_volume"] / spike["avg_volume"]
+
+    msg = f"<b>{ticker_clean}</b>\n"
+    msg += f"📅 {spike['date']}\n"
+    msg += f"💰 Rp {spike['close']:,.0f} (+{price_change:.1f}%)\n"
+    msg += f"📊 Volume: {volume_ratio:.1f}x avg\n\n"
+    return msg
+
+
+def format_pattern(pattern):
+    """Render one watchlist pattern for a report"""
+    ticker_clean = pattern["ticker"].replace(".JK", "")
+
+    msg = f"<b>{ticker_clean}</b> - {pattern['type']}\n"
+    msg += f"📅 {pattern['date']}\n"
+    msg += f"💰 Rp {pattern['close']:,.0f}\n"
+    msg += f"📈 Price: {pattern['price_change']:+.1f}%\n"
+    msg += f"📊 Volume: {pattern['volume_change']:+.1f}%\n\n"
+    return msg
+
+
+def build_report(now_wib, sections):
+    """
+    Assemble report messages from (fragments, total) sections, ordered
+    SETUP spikes then watchlist patterns; empty sections are skipped.
+    """
+    titles = ["🚀 <b>Volume SETUP Signals</b>\n\n", "⚠️ <b>Watchlist Pattern Alerts</b>\n\n"]
+    header = f"📊 <b>Volume Screener Report</b>\n⏰ {now_wib}\n\n"
     messages = []
 
-    if spikes_setup:
-        msg = "🚀 <b>Volume SETUP Signals</b>\n\n"
-        for spike in spikes_setup[:10]:
-            ticker_clean = spike["ticker"].replace(".JK", "")
-            price_change = ((spike["close"] - spike["prev_close"]) / spike["prev_close"]) * 100
-            volume_ratio = spike["spike_volume"] / spike["avg_volume"]
+    for title, section in zip(titles, sections):
+        if not section or not section[1]:
+            continue
+        fragments, total = section
+
+        msg = title + "".join(fragments)
+        if total > len(fragments):
+            msg += f"... and {total - len(fragments)} more\n"
+
+        messages.append(header + msg)
 
-            msg += f"<b>{ticker_clean}</b>\n"
-            msg += f"📅 {spike['date']}\n"
-            msg += f"💰 Rp {spike['close']:,.0f} (+{price_change:.1f}%)\n"
-            msg += f"📊 Volume: {volume_ratio:.1f}x avg\n\n"
+    return messages
 
-        if len(spikes_setup) > 10:
-            msg += f"... and {len(spikes_setup) - 10} more\n"
 
-        messages.append(msg)
+def main(args=None):
+    """
+    Run the screener, recording the run's metrics (see metrics.py).
+        python volume_screener.py                   Whole universe (SCREENER_SHARDS processes)
+        python volume_screener.py plan N [RUN]      Write the universe for N shards to SHARD_RESULTS_DIR/RUN
+        python volume_screener.py shard I N [RUN]   Screen shard I of the plan, results next to it
+        python volume_screener.py merge N [RUN]     Report the merged results of the plan's N shards
+    RUN names the run directory (default: the trading day). Plan first;
+    shards and merge wait up to SHARD_WAIT for it and only use results of
+    the latest plan.
+    """
+    args = sys.argv[1:] if args is None else args
+
+    if len(args) in (2, 3) and args[0] == "plan":
+        plan_run(int(args[1]), args[2] if len(args) == 3 else None)
+    elif len(args) in (3, 4) and args[0] == "shard":
+        with metrics.run(f"screener_shard_{args[1]}"):
+            ok = run_shard(int(args[1]), int(args[2]), args[3] if len(args) == 4 else None)
+        if not ok:
+            sys.exit(1)
+    elif len(args) in (2, 3) and args[0] == "merge":
+        with metrics.run("screener"):
+            ok = run_screener(merge_shards=int(args[1]), run_id=args[2] if len(args) == 3 else None)
+        if not ok:
+            sys.exit(1)
+    elif not args:
+        with metrics.run("screener"):
+            run_screener()
+    else:
+        print(main.__doc__)
+        sys.exit(1)
 
-    if watchlist_patterns:
-        msg = "⚠️ <b>Watchlist Pattern Alerts</b>\n\n"
-        for pattern in watchlist_patterns[:10]:
-            ticker_clean = pattern["ticker"].replace(".JK", "")
 
-            msg += f"<b>{ticker_clean}</b> - {pattern['type']}\n"
-            msg += f"📅 {pattern['date']}\n"
-            msg += f"💰 Rp {pattern['close']:,.0f}\n"
-            msg += f"📈 Price: {pattern['price_change']:+.1f}%\n"
-            msg += f"📊 Volume: {pattern['volume_change']:+.1f}%\n\n"
+def shard_of(ticker, shards):
+    """Stable shard number for a ticker (same on every host and run)"""
+    digest = hashlib.md5(ticker.encode()).digest()
+    return int.from_bytes(digest[:8], "big") % shards
 
-        if len(watchlist_patterns) > 10:
-            msg += f"... and {len(watchlist_patterns) - 10} more\n"
 
-        messages.append(msg)
+def partition(tickers, shards):
+    """Split tickers into `shards` lists, keeping their order within each"""
+    parts = [[] for _ in range(shards)]
+    for ticker in tickers:
+        parts[shard_of(ticker, shards)].append(ticker)
+    return parts
 
-    if messages:
-        now_wib = datetime.now(WIB).strftime("%H:%M WIB")
-        header = f"📊 <b>Volume Screener Report</b>\n⏰ {now_wib}\n\n"
 
-        for message in messages:
-            full_message = header + message
-            send_telegram(full_message)
+def screen_tickers(tickers, watchlist_set, limit=MAX_TICKERS_PER_RUN):
+    """
+    Fetch and screen tickers (at most `limit` of them; shards pass None).
+    Returns: (setup_spikes, wait_spikes, watchlist_patterns)
+    """
+    if limit and len(tickers) > limit:
+        log(f"⚠️  Limiting to {limit} tickers (from {len(tickers)})")
+        tickers = tickers[:limit]
+
+    metrics.count("tickers_screened", len(tickers))
+    log(f"✓ Total tickers to screen: {len(tickers)}")
+
+    spikes_setup = []
+    spikes_wait = []
+    watchlist_patterns = []
+
+    if FETCH_MODE == "concurrent":
+        log(f"⚡ Concurrent fetch: {FETCH_WORKERS} workers, {FETCH_RATE:g} req/s")
+        count = 0
+
+        for ticker, df in iter_ohlcv(tickers):
+            with metrics.stage("screen"):
+                setup, wait, patterns = screen_frames({ticker: df}, [ticker], watchlist_set)
+            spikes_setup.extend(setup)
+            spikes_wait.extend(wait)
+            watchlist_patterns.extend(patterns)
+
+            count += 1
+            if count % 20 == 0:
+                log(f"⏳ Processed {count}/{len(tickers)}...")
+
+        metrics.count("tickers_fetched", count)
+        log(f"✓ Fetched data for {count}/{len(tickers)} tickers")
+    else:
+        with metrics.stage("fetch"):
+            frames = get_ohlcv_batch(tickers)
+        metrics.count("tickers_fetched", len(frames))
+        log(f"✓ Fetched data for {len(frames)}/{len(tickers)} tickers")
+
+        fetched = [t for t in tickers if t in frames]
+        with metrics.stage("screen"):
+            spikes_setup, spikes_wait, watchlist_patterns = screen_frames(frames, fetched, watchlist_set)
+
+    log("✓ Screening complete")
+    return spikes_setup, spikes_wait, watchlist_patterns
+
+
+def merge_results(results):
+    """
+    Combine per-shard (setup, wait, patterns) into one result, ordered by
+    ticker so the report doesn't depend on which shard finished first.
+    """
+    merged = ([], [], [])
+    for result in results:
+        for combined, part in zip(merged, result):
+            combined.extend(part)
+
+    for combined in merged:
+        combined.sort(key=lambda signal: signal["ticker"])
+    return merged
+
+
+def share_fetch_budget(processes):
+    """
+    Pool initializer: give each of `processes` shard processes its share
+    of FETCH_RATE and FETCH_WORKERS, so together they stay within the
+    single-process throttle.
+    """
+    global FETCH_RATE, FETCH_WORKERS
+    FETCH_RATE = FETCH_RATE / processes
+    FETCH_WORKERS = max(1, FETCH_WORKERS // processes)
+
+
+def screen_shard(tickers, watchlist_set):
+    """
+    Pool task: screen one shard uncapped.
+    Returns: (result, metrics export), so the parent run keeps the shard's counters
+    """
+    with metrics.capture() as shard_metrics:
+        # Sharding is how the whole universe gets screened, so no per-shard cap
+        result = screen_tickers(tickers, watchlist_set, limit=None)
+    return result, shard_metrics.export()
+
+
+def screen_sharded(tickers, watchlist_set, shards):
+    """Screen each shard in its own process, then merge the results and metrics"""
+    parts = partition(tickers, shards)
+    processes = min(shards, os.cpu_count() or 1)
+    log(f"🧩 {shards} shards of {min(map(len, parts))}-{max(map(len, parts))} tickers, "
+        f"{FETCH_RATE / processes:g} req/s per process")
+
+    with ProcessPoolExecutor(max_workers=processes, initializer=share_fetch_budget, initargs=(processes,)) as pool:
+        results = []
+        for result, shard_metrics in pool.map(screen_shard, parts, [watchlist_set] * shards):
+            metrics.merge(shard_metrics)
+            results.append(result)
+
+    return merge_results(results)
+
+
+def run_dir(run_id=None):
+    """Shared directory of one sharded run (default: the current trading day)"""
+    run_id = run_id or bar_store.last_market_close().strftime("%Y-%m-%d")
+    return SHARD_RESULTS_DIR / run_id
+
+
+def shard_results_path(shard, shards, run_id=None):
+    return run_dir(run_id) / f"shard-{shard}-of-{shards}.json"
+
+
+def plan_path(run_id=None):
+    return run_dir(run_id) / "plan.json"
+
+
+def write_json(path, data):
+    """Write JSON atomically, creating the run directory"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "w") as f:
+        # numpy scalars from the engine become plain numbers
+        json.dump(data, f, default=lambda value: value.item())
+    os.replace(tmp, path)
+
+
+def read_json(path):
+    try:
+        with open(path, "r") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def plan_run(shards, run_id=None):
+    """
+    Coordinator: write this run's universe and watchlist for the shards, so
+    hosts without the shared database screen the same tickers. Results of
+    any earlier plan for the run are ignored from now on.
+    """
+    tickers, watchlist_set = get_ticker_universe()
+    plan = {"planned_at": time.time(), "shards": shards, "tickers": tickers, "watchlist": sorted(watchlist_set)}
+    write_json(plan_path(run_id), plan)
+    log(f"✓ Planned {len(tickers)} tickers in {shards} shard(s) at {plan_path(run_id)}")
+    return plan
+
+
+def wait_for_plan(shards, run_id=None, deadline=None):
+    """The run's plan for `shards` shards, waiting until deadline (default SHARD_WAIT from now); None if none came"""
+    deadline = deadline or time.time() + SHARD_WAIT
+    while True:
+        plan = read_json(plan_path(run_id))
+        if isinstance(plan, dict) and plan.get("shards") == shards:
+            return plan
+        if time.time() >= deadline:
+            log(f"❌ No plan for {shards} shard(s) at {plan_path(run_id)}, run: volume_screener.py plan {shards}")
+            return None
+        time.sleep(5)
+
+
+def run_shard(shard, shards, run_id=None):
+    """Screen one shard of the run's plan and write its results next to it (multi-host mode)"""
+    log(f"=== Volume Screener shard {shard + 1}/{shards} ===")
+    plan = wait_for_plan(shards, run_id)
+    if plan is None:
+        return False
+
+    started_at = time.time()
+    tickers = partition(plan["tickers"], shards)[shard]
+    result = screen_tickers(tickers, set(plan["watchlist"]), limit=None)
+
+    path = shard_results_path(shard, shards, run_id)
+    write_json(path, {
+        "planned_at": plan["planned_at"],
+        "started_at": started_at,
+        "finished_at": time.time(),
+        "result": result
+    })
+    log(f"✓ Shard results written to {path}")
+    return True
+
+
+def read_shard(path, planned_at):
+    """A shard's result, or None if the file is missing or belongs to another plan"""
+    data = read_json(path)
+    if not isinstance(data, dict) or data.get("planned_at") != planned_at:
+        return None
+    return data["result"]
+
+
+def collect_shards(shards, run_id=None):
+    """
+    Wait up to SHARD_WAIT seconds for every shard of the run's current plan.
+    Results written for an earlier plan (a re-run the same day) are ignored;
+    results that arrived before the merge started are used.
+    Returns: merged (setup, wait, patterns) of the shards that arrived, or
+    None without a plan
+    """
+    deadline = time.time() + SHARD_WAIT
+    plan = wait_for_plan(shards, run_id, deadline)
+    if plan is None:
+        return None
+
+    paths = [shard_results_path(shard, shards, run_id) for shard in range(shards)]
+    results = {}
+
+    while True:
+        for shard, path in enumerate(paths):
+            if shard not in results:
+                result = read_shard(path, plan["planned_at"])
+                if result is not None:
+                    results[shard] = result
+        if len(results) == shards or time.time() >= deadline:
+            break
+        time.sleep(5)
+
+    missing = [str(shard) for shard in range(shards) if shard not in results]
+    if missing:
+        log(f"⚠️  No results from shard(s) {', '.join(missing)} after {SHARD_WAIT}s, reporting the rest")
+
+    return merge_results(results[shard] for shard in sorted(results))
+
+
+def run_screener(merge_shards=None, run_id=None):
+    """
+    Screen the universe and send the report. With SCREENER_SHARDS > 1 the
+    universe is split across a process pool; with merge_shards the results
+    of separately run shards (of run_id) are collected instead of
+    screening here.
+    Returns: False if there was no shard plan to merge, else True
+    """
+    log("=== Indonesian Volume Screener ===")
+
+    if merge_shards:
+        log(f"🧩 Merging results of {merge_shards} shard(s)")
+        with metrics.stage("merge"):
+            result = collect_shards(merge_shards, run_id)
+        if result is None:
+            return False
+        report(*result)
+        return True
+
+    if use_bar_store() and os.getenv("REBUILD_BAR_STORE") == "1":
+        log("♻️  REBUILD_BAR_STORE enabled, clearing bar store")
+        conn = bar_store.open_store()
+        bar_store.clear(conn)
+        conn.close()
+
+    with metrics.stage("universe"):
+        tickers, watchlist_set = get_ticker_universe()
+
+    if SCREENER_SHARDS > 1:
+        with metrics.stage("shards"):
+            result = screen_sharded(tickers, watchlist_set, SCREENER_SHARDS)
+    else:
+        result = screen_tickers(tickers, watchlist_set)
+
+    report(*result)
+    return True
+
+
+def report(spikes_setup, spikes_wait, watchlist_patterns):
+    """Store signals and send the main and per-chat reports"""
+    with metrics.stage("store"):
+        conn = storage.connect()
+        storage.record_signals(conn, "spike_setup", spikes_setup)
+        storage.record_signals(conn, "spike_wait", spikes_wait)
+        storage.record_signals(conn, "pattern", watchlist_patterns)
+        watchlists = storage.load_watchlists(conn)
+        conn.close()
+
+    metrics.count("signals", len(spikes_setup), kind="spike_setup")
+    metrics.count("signals", len(spikes_wait), kind="spike_wait")
+    metrics.count("signals", len(watchlist_patterns), kind="pattern")
+
+    log(f"📊 SETUP spikes: {len(spikes_setup)}")
+    log(f"⏳ WAIT spikes: {len(spikes_wait)}")
+    log(f"⚠️  Watchlist patterns: {len(watchlist_patterns)}")
+
+    now_wib = datetime.now(WIB).strftime("%H:%M WIB")
+    setup_section = (
+        [format_spike(spike) for spike in spikes_setup[:REPORT_LIMIT]], len(spikes_setup)
+    )
+    pattern_section = (
+        [format_pattern(pattern) for pattern in watchlist_patterns[:REPORT_LIMIT]], len(watchlist_patterns)
+    )
+    messages = build_report(now_wib, [setup_section, pattern_section])
+
+    if messages:
+        with metrics.stage("telegram"):
+            for message in messages:
+                send_telegram(message)
 
         log(f"✓ Sent {len(messages)} report(s)")
     else:
         log("✓ No signals to report")
 
+    if watchlists:
+        index = fanout.build_ticker_index(watchlists)
+        per_chat = fanout.merge_sections(
+            fanout.fan_out(spikes_setup, index, format_spike, REPORT_LIMIT, skip_chats={TELEGRAM_CHAT_ID}),
+            fanout.fan_out(watchlist_patterns, index, format_pattern, REPORT_LIMIT, skip_chats={TELEGRAM_CHAT_ID})
+        )
+
+        with metrics.stage("telegram"):
+            sent = telegram_sender.get_sender().send_many(
+                (chat_id, message)
+                for chat_id, sections in per_chat.items()
+                for message in build_report(now_wib, sections)
+            )
+        log(f"✓ Sent {sent} report(s) to {len(per_chat)} watchlist chat(s)")
+
     log("=== Screener Complete ===")
 
 